@@ -36,4 +36,21 @@ admin.site.register(ClassicBook)
 admin.site.register(Library)
 admin.site.register(Scripture)
 admin.site.register(ScriptureChapter)
-admin.site.register(Contact)
\ No newline at end of file
+admin.site.register(Contact)
+
+@admin.register(MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ['content_type', 'object_id', 'field', 'kind', 'status', 'attempts', 'run_after',
+                    'original_size', 'processed_size', 'updated_at']
+    list_filter = ['status', 'kind', 'content_type']
+
+@admin.register(DocumentPreview)
+class DocumentPreviewAdmin(admin.ModelAdmin):
+    list_display = ['content_type', 'object_id', 'field', 'page_count', 'source', 'updated_at']
+    list_filter = ['content_type']
+
+@admin.register(ProcessedMedia)
+class ProcessedMediaAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'content_hash', 'original_size', 'processed_size', 'created_at']
+    list_filter = ['kind']
+    search_fields = ['content_hash']
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ArticlesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles'
+
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals() # 注册缓存失效信号
+
+        # 建立文章模型注册表，迁移后 ContentType id 可能变化，需要重新查询
+        from .registry import registry
+        registry.build()
+        post_migrate.connect(
+            lambda **kwargs: registry.clear_content_types(),
+            weak=False, dispatch_uid='articles_registry_clear',
+        )
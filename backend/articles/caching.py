@@ -0,0 +1,202 @@
+# articles/caching.py
+
+"""
+文章接口响应缓存 / 条件请求
+
+缓存键 = (视图集, 动作, URL 参数, 规范化后的查询参数, 域名, 模型版本号)
+- 每个模型有一个版本号，文章保存/删除时由信号递增 (见 articles.signals)，
+  旧版本的缓存自然失效，不需要扫描或删除缓存键
+- 版本号初始值取当前毫秒时间戳，即使版本键被淘汰也不会与旧缓存的版本号重复
+- 管理员请求 (可见未发布文章) 不读也不写缓存
+- 阅读量、点赞数等计数器不依赖缓存，详情接口命中缓存时会覆盖为最新数值
+
+多进程部署时需要 Redis / Memcached 等共享缓存，否则版本号只在单个进程内生效。
+
+ConditionalGetMixin 为 list / retrieve 提供 ETag / Last-Modified：
+先用一条聚合查询 (最大更新时间 + 行数) 计算校验值，未变化时直接返回 304，不查询正文、不序列化。
+评论数等不修改更新时间、但要立即反映到列表上的计数器列在 validator_counter_fields 中，一并参与校验。
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'resp_version'
+RESPONSE_KEY_PREFIX = 'resp'
+
+# 只修改这些字段时不递增版本号 (计数器变化频繁，由缓存过期时间兜底)
+COUNTER_FIELDS = frozenset([
+    'total_views', 'today_views', 'last_view_date', 'likes', 'dislikes',
+])
+
+# 模型变化时还需要失效的其他模型：章节变化影响经训详情，分类改名影响书评的 category_name
+CACHE_DEPENDENCIES = {
+    'articles.scripturechapter': ['articles.scripture'],
+    'articles.bookreviewcategory': ['articles.bookreview'],
+}
+
+
+def _version_key(label):
+    return f'{VERSION_KEY_PREFIX}:{label}'
+
+
+def get_model_version(model):
+    key = _version_key(model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_model_version(model):
+    """使某个模型 (及依赖它的模型) 的所有响应缓存失效"""
+    label = model._meta.label_lower
+    for target in [label] + CACHE_DEPENDENCIES.get(label, []):
+        key = _version_key(target)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), None)
+
+
+class CachedResponseMixin:
+    """
+    视图集响应缓存 Mixin
+    - list 动作在这里缓存
+    - retrieve 动作由 SmartViewCountMixin 处理 (需要兼顾阅读量统计)
+    """
+    cache_timeout = None # 默认使用 settings.ARTICLE_CACHE_TIMEOUT
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'ARTICLE_CACHE_TIMEOUT', 300)
+
+    def get_response_cache_key(self, request):
+        """返回缓存键；不应缓存的请求返回 None"""
+        if not getattr(settings, 'ARTICLE_CACHE_ENABLED', True):
+            return None
+        if request.method not in ('GET', 'HEAD') or request.user.is_staff:
+            return None
+
+        model = self.queryset.model
+        raw = json.dumps([
+            type(self).__name__,
+            self.action,
+            sorted(self.kwargs.items()),
+            sorted((k, sorted(v)) for k, v in request.query_params.lists()),
+            request.scheme,
+            request.get_host(),
+        ], ensure_ascii=False, default=str)
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'{RESPONSE_KEY_PREFIX}:{model._meta.label_lower}:{get_model_version(model)}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        cache_key = self.get_response_cache_key(request)
+        if cache_key:
+            data = cache.get(cache_key)
+            if data is not None:
+                return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if cache_key and response.status_code == 200:
+            cache.set(cache_key, response.data, self.get_cache_timeout())
+        return response
+
+
+def make_etag(*parts):
+    """弱 ETag：阅读量等计数器不参与校验，响应体不保证逐字节一致"""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+class ConditionalGetMixin:
+    """
+    条件请求 Mixin (ETag / Last-Modified)
+    - list:     对过滤后的整个结果集 (不只是当前页) 计算 Max(更新时间) + Count
+    - retrieve: 只查询单行的更新时间
+    ETag 中还包含查询参数和是否管理员，不同页码、排序、搜索词的校验值互不相同。
+    响应带 Cache-Control: no-cache，浏览器每次都会带上校验值重新验证。
+    """
+    last_modified_field = 'updated_at'
+    conditional_actions = ('list', 'retrieve')
+    # 参与校验的计数器字段 (模型没有的字段忽略)：list 取总和，retrieve 取当前值
+    validator_counter_fields = ()
+
+    def get_conditional_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def get_conditional_state(self):
+        """
+        返回 {'last_modified': ..., ...}，其余键值只参与 ETag 计算
+        返回 None 表示不做条件判断 (例如对象不存在，交给正常流程返回 404)
+        """
+        queryset = self.get_conditional_queryset().order_by()
+        field_names = {f.name for f in queryset.model._meta.concrete_fields}
+        counter_fields = [name for name in self.validator_counter_fields if name in field_names]
+        if self.action == 'list':
+            return queryset.aggregate(
+                last_modified=Max(self.last_modified_field), count=Count('pk'),
+                **{name: Sum(name) for name in counter_fields},
+            )
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return (
+            queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values('pk', *counter_fields, last_modified=F(self.last_modified_field))
+            .first()
+        )
+
+    def get_etag_extra(self, request):
+        """额外参与 ETag 计算的值 (例如按访客变化的字段)"""
+        return ()
+
+    def handle_not_modified(self, request, state):
+        """返回 304 之前的钩子 (例如仍然记录阅读量)"""
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+
+        state = self.get_conditional_state()
+        if state is None:
+            return handler(request, *args, **kwargs)
+
+        last_modified = state.get('last_modified')
+        etag = make_etag(
+            type(self).__name__,
+            self.action,
+            sorted(state.items()),
+            sorted((k, sorted(v)) for k, v in request.query_params.lists()),
+            request.user.is_staff,
+            *self.get_etag_extra(request),
+        )
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        elif response.status_code == 304:
+            self.handle_not_modified(request, state)
+
+        response['ETag'] = etag
+        if last_modified_ts is not None:
+            response['Last-Modified'] = http_date(last_modified_ts)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
@@ -0,0 +1,204 @@
+# articles/counters.py
+
+"""
+阅读量写回缓冲 (write-behind)
+
+开启 VIEW_COUNT_BUFFERED 后，详情页的阅读量不再每次直接 UPDATE 文章行，
+而是先在缓存中按时间片累计 (每个 model/id 一个原子计数器)，
+再由 flush_view_counts 命令定期把已结束的时间片批量写回数据库。
+
+缓存键结构 (bucket = 时间戳 // VIEW_COUNT_FLUSH_INTERVAL)：
+- view_buffer:<bucket>:<app.model>:<id>   该时间片内的增量
+- view_buffer:<bucket>:seq                该时间片登记的文章数量
+- view_buffer:<bucket>:slot:<n>           第 n 篇文章的 "<app.model>:<id>"
+- view_buffer:flushed                     最近一个已认领 (写回) 的时间片
+- view_buffer:lock                        flush 锁，同一时间只有一个进程写回
+
+注意：多进程部署时必须使用共享缓存 (Redis / Memcached)，
+LocMemCache 只在单进程开发环境下有效。
+"""
+
+import time
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+KEY_PREFIX = 'view_buffer'
+FLUSHED_KEY = f'{KEY_PREFIX}:flushed'
+LOCK_KEY = f'{KEY_PREFIX}:lock'
+
+# flush 锁的过期时间 (秒)，每写回一个时间片续期一次；进程崩溃后锁最多保留这么久
+FLUSH_LOCK_TIMEOUT = 300
+
+# 还没有写回记录 (首次 flush 之前，或记录被缓存淘汰) 时，pending_views 回看的时间片数量；
+# 正常情况下 flush 只落后当前时间片一两个
+PENDING_LOOKBACK_BUCKETS = 6
+
+# 每条 UPDATE 语句最多处理的文章数
+FLUSH_BATCH_SIZE = 500
+
+
+def is_buffered():
+    """是否开启缓冲计数模式"""
+    return getattr(settings, 'VIEW_COUNT_BUFFERED', False)
+
+
+def flush_interval():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10)
+
+
+def _ttl():
+    # 缓冲键的过期时间需要远大于 flush 周期，防止 flush 任务短暂停摆时丢失计数
+    return getattr(settings, 'VIEW_COUNT_BUFFER_TTL', 24 * 3600)
+
+
+def _max_buckets():
+    # 缓冲键在 TTL 后过期，更早的时间片不可能还有增量
+    return _ttl() // flush_interval() + 1
+
+
+def _bucket(ts=None):
+    return int((ts if ts is not None else time.time()) // flush_interval())
+
+
+def _counter_key(bucket, label, pk):
+    return f'{KEY_PREFIX}:{bucket}:{label}:{pk}'
+
+
+def _seq_key(bucket):
+    return f'{KEY_PREFIX}:{bucket}:seq'
+
+
+def _slot_key(bucket, n):
+    return f'{KEY_PREFIX}:{bucket}:slot:{n}'
+
+
+def incr_view(model, pk):
+    """记录一次阅读 (只写缓存，不访问数据库)"""
+    label = model._meta.label_lower
+    bucket = _bucket()
+    key = _counter_key(bucket, label, pk)
+    timeout = _ttl()
+
+    if cache.add(key, 1, timeout):
+        # 该文章在本时间片内首次出现：登记到索引中，供 flush 枚举
+        seq_key = _seq_key(bucket)
+        cache.add(seq_key, 0, timeout)
+        slot = cache.incr(seq_key)
+        cache.set(_slot_key(bucket, slot), f'{label}:{pk}', timeout)
+        return
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        # 计数键在 add 与 incr 之间恰好过期，重新登记
+        incr_view(model, pk)
+
+
+def pending_views(model, pk):
+    """
+    获取某篇文章尚未写回数据库的阅读增量
+    从最近写回的时间片之后开始累加；没有写回记录时只回看 PENDING_LOOKBACK_BUCKETS 个时间片，
+    详情请求不会扫描整个 TTL 范围的缓存键 (更早的增量由 flush 照常写回)
+    """
+    label = model._meta.label_lower
+    current = _bucket()
+    flushed = cache.get(FLUSHED_KEY)
+    if flushed is None:
+        start = current - PENDING_LOOKBACK_BUCKETS
+    else:
+        start = max(current - _max_buckets(), flushed + 1)
+
+    keys = [_counter_key(b, label, pk) for b in range(start, current + 1)]
+    return sum(cache.get_many(keys).values())
+
+
+def flush_view_counts(now=None):
+    """
+    把已结束的时间片写回数据库
+    - 当前时间片和上一个时间片仍可能有写入 (留一个时间片作为宽限期)，不处理
+    - 同一模型的增量用 CASE WHEN 合并，每 FLUSH_BATCH_SIZE 篇文章一条 UPDATE
+    - 用 cache.add 加锁，多个 flush 进程同时运行时只有一个写回，其余直接返回 0
+    返回写回的阅读量总数
+    """
+    token = uuid.uuid4().hex
+    if not cache.add(LOCK_KEY, token, FLUSH_LOCK_TIMEOUT):
+        return 0
+
+    try:
+        current = _bucket(now)
+        last = cache.get(FLUSHED_KEY)
+        if last is None:
+            last = current - _max_buckets()
+
+        total = 0
+        for bucket in range(last + 1, current - 1):
+            total += _flush_bucket(bucket)
+            cache.touch(LOCK_KEY, FLUSH_LOCK_TIMEOUT)
+        return total
+    finally:
+        if cache.get(LOCK_KEY) == token:
+            cache.delete(LOCK_KEY)
+
+
+def _flush_bucket(bucket):
+    """
+    写回一个时间片
+    先认领 (记录 FLUSHED_KEY 并删除缓冲键) 再 UPDATE：UPDATE 失败时把增量放回缓存；
+    进程在两者之间崩溃时丢失这一个时间片的计数，而不会重复累加
+    """
+    seq_key = _seq_key(bucket)
+    count = cache.get(seq_key)
+    if not count:
+        cache.set(FLUSHED_KEY, bucket, None)
+        return 0
+
+    slot_keys = [_slot_key(bucket, n) for n in range(1, count + 1)]
+    slots = cache.get_many(slot_keys)
+    counter_keys = {ref: _counter_key(bucket, *ref.rsplit(':', 1)) for ref in slots.values()}
+    deltas = cache.get_many(list(counter_keys.values()))
+
+    # {label: {pk: delta}}
+    grouped = {}
+    for ref, key in counter_keys.items():
+        delta = deltas.get(key)
+        if delta:
+            label, pk = ref.rsplit(':', 1)
+            grouped.setdefault(label, {})[int(pk)] = delta
+
+    # 认领：之后再运行的 flush 不会重复写回这个时间片
+    cache.set(FLUSHED_KEY, bucket, None)
+    cache.delete_many(slot_keys + list(counter_keys.values()) + [seq_key])
+
+    today = timezone.localdate()
+    try:
+        with transaction.atomic():
+            for label, items in grouped.items():
+                model = apps.get_model(label)
+                pks = list(items)
+                for i in range(0, len(pks), FLUSH_BATCH_SIZE):
+                    chunk = pks[i:i + FLUSH_BATCH_SIZE]
+                    delta = Case(
+                        *[When(pk=pk, then=Value(items[pk])) for pk in chunk],
+                        default=Value(0),
+                        output_field=PositiveIntegerField(),
+                    )
+                    model.objects.filter(pk__in=chunk).update(
+                        total_views=F('total_views') + delta,
+                        today_views=F('today_views') + delta,
+                        last_view_date=today,
+                    )
+    except Exception:
+        # 写回失败：恢复缓冲键，下次 flush 重试
+        timeout = _ttl()
+        cache.set_many({key: delta for key, delta in deltas.items() if delta}, timeout)
+        cache.set_many(slots, timeout)
+        cache.set(seq_key, count, timeout)
+        cache.set(FLUSHED_KEY, bucket - 1, None)
+        raise
+    return sum(sum(items.values()) for items in grouped.values())
@@ -0,0 +1,197 @@
+# articles/documents.py
+
+"""
+PDF 文档下载接口 (论文 / 古籍 / 书库)
+
+GET /api/articles/classics/1/document/
+- 支持 Range 请求 (单个区间，返回 206)，PDF 阅读器可以先只取首页和交叉引用表
+- 强 ETag：文件处理后会保存为新文件名，同名文件内容不变，ETag = (文件名, 大小, 修改时间)
+- If-None-Match / If-Modified-Since 返回 304，If-Range 不匹配时返回完整文件
+- DOCUMENT_SENDFILE 配置为 'x-accel-redirect' / 'x-sendfile' 时只返回响应头，
+  由 Nginx / Apache 直接发送文件 (Range 也由前端服务器处理)
+- ?download=1 以附件形式下载，默认 inline 在浏览器中打开
+
+上传的 PDF 由后台任务压缩，安装了 qpdf 时还会线性化 (见 articles.pdf)，首页只需要文件开头的几百 KB。
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .search import matched_pages
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def document_etag(file):
+    """强 ETag (文件名 + 大小 + 修改时间)"""
+    try:
+        modified = file.storage.get_modified_time(file.name).timestamp()
+    except NotImplementedError:
+        modified = None
+    digest = hashlib.md5(f'{file.name}|{file.size}|{modified}'.encode()).hexdigest()
+    return f'"{digest}"', modified
+
+
+def parse_range(header, size):
+    """
+    解析 Range 请求头，返回 (start, end) (包含 end)
+    不是单个字节区间时返回 None (按完整文件响应)，区间无法满足时返回 False
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # bytes=-N：最后 N 个字节
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _stream(file, start, length):
+    with file.storage.open(file.name, 'rb') as fp:
+        fp.seek(start)
+        while length > 0:
+            chunk = fp.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _sendfile_response(file):
+    """交给前端服务器发送文件；未配置时返回 None"""
+    backend = getattr(settings, 'DOCUMENT_SENDFILE', None)
+    if backend == 'x-accel-redirect':
+        # Nginx: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+        prefix = getattr(settings, 'DOCUMENT_ACCEL_PREFIX', '/protected-media/')
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + file.name
+        return response
+    if backend == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = file.path
+        return response
+    return None
+
+
+def serve_document(request, file, download=False):
+    """返回 file (FieldFile) 的下载响应"""
+    etag, modified = document_etag(file)
+    last_modified = int(modified) if modified is not None else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _sendfile_response(file) or _file_response(request, file, etag, last_modified)
+
+    content_type, _ = mimetypes.guess_type(file.name)
+    if response.status_code != 304:
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        response['Content-Disposition'] = content_disposition_header(
+            as_attachment=download, filename=os.path.basename(file.name),
+        )
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _file_response(request, file, etag, last_modified):
+    size = file.size
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if range_header and _if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(status=206 if byte_range else 200)
+    else:
+        response = StreamingHttpResponse(
+            _stream(file, start, length), status=206 if byte_range else 200,
+        )
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _if_range_matches(request, etag, last_modified):
+    """If-Range 与当前文件一致 (或没有 If-Range) 时才按区间响应"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return last_modified is not None and parse_http_date_safe(if_range) == last_modified
+
+
+class DocumentMixin:
+    """
+    为带 document 字段的视图集提供 document 动作
+    - 列表 / 详情 prefetch PDF 预览 (序列化器的 preview 字段)
+    - ?search= 同时搜索 PDF 分页文本，列表每项附带 matched_pages (命中的页码)，
+      前端可以用 document_url#page=N 直接打开对应页
+    """
+    document_field = 'document'
+    search_document_field = 'document'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('document_previews')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        query = request.query_params.get(api_settings.SEARCH_PARAM, '').strip()
+        if response.status_code == 200 and query and self.search_document_field:
+            self.attach_matched_pages(response.data, query)
+        return response
+
+    def attach_matched_pages(self, data, query):
+        results = data['results'] if isinstance(data, dict) and 'results' in data else data
+        pages = matched_pages(
+            self.queryset.model, [item['id'] for item in results], query, self.search_document_field,
+        )
+        for item in results:
+            item['matched_pages'] = pages.get(item['id'], [])
+
+    @action(detail=True, methods=['get'])
+    def document(self, request, *args, **kwargs):
+        """PDF 下载 / 在线阅读，支持 Range 请求"""
+        file = getattr(self.get_object(), self.document_field)
+        if not file:
+            return Response({"error": "Document not found"}, status=404)
+        download = request.query_params.get('download') in ('1', 'true')
+        try:
+            return serve_document(request, file, download=download)
+        except FileNotFoundError:
+            return Response({"error": "Document not found"}, status=404)
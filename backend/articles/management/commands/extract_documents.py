@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from articles import media
+
+
+class Command(BaseCommand):
+    """
+    为已有的 PDF 补齐预览 (页数 / 首页缩略图 / 分页文本)
+    python manage.py extract_documents --workers 4
+    python manage.py extract_documents --force        # 全部重新提取
+
+    先为缺少预览的文档登记 pdf_preview 任务，再由多个线程并行领取执行。
+    解析和渲染都在子进程中进行 (见 articles.pdf)，线程只负责调度，不受 GIL 限制；
+    任务通过 SKIP LOCKED 领取，可以与 process_media worker 同时运行。
+    """
+    help = "为已有的 PDF 文档并行提取预览和分页文本"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="并行数")
+        parser.add_argument('--force', action='store_true', help="已有预览的文档也重新提取")
+        parser.add_argument('--enqueue-only', action='store_true',
+                            help="只登记任务，交给 process_media worker 执行")
+
+    def handle(self, *args, **options):
+        count = media.enqueue_missing_previews(force=options['force'])
+        self.stdout.write(f"登记 {count} 个文档预览任务")
+        if options['enqueue_only'] or not count:
+            return
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(self.worker, range(options['workers'])))
+
+        summary = {}
+        for result in results:
+            for status, n in result.items():
+                summary[status] = summary.get(status, 0) + n
+        detail = ", ".join(f"{status} {n}" for status, n in summary.items()) or "无任务"
+        self.stdout.write(self.style.SUCCESS(f"✓ {detail} ({time.monotonic() - started:.1f}s)"))
+
+    def worker(self, index):
+        """领取 pdf_preview 任务直到没有剩余"""
+        summary = {}
+        try:
+            while True:
+                batch = media.process_pending_jobs(batch_size=1, kinds=['pdf_preview'])
+                if not batch:
+                    return summary
+                for status, n in batch.items():
+                    summary[status] = summary.get(status, 0) + n
+        finally:
+            # 每个线程有自己的数据库连接，退出前关闭
+            connection.close()
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles import counters
+
+
+class Command(BaseCommand):
+    """
+    把缓存中累计的阅读量批量写回数据库
+    单次执行:  python manage.py flush_view_counts
+    常驻执行:  python manage.py flush_view_counts --loop --interval 10
+    """
+    help = "把缓冲的阅读量批量写回数据库 (配合 VIEW_COUNT_BUFFERED 使用)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="常驻运行，按间隔反复写回")
+        parser.add_argument('--interval', type=int, default=None,
+                            help="常驻模式下的写回间隔(秒)，默认等于 VIEW_COUNT_FLUSH_INTERVAL")
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or counters.flush_interval()
+
+        while True:
+            flushed = counters.flush_view_counts()
+            if flushed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"✓ 写回 {flushed} 次阅读"))
+            if not options['loop']:
+                break
+            time.sleep(interval)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles import media
+
+
+class Command(BaseCommand):
+    """
+    执行媒体后台处理任务 (图片压缩等)
+    单次执行:  python manage.py process_media
+    常驻执行:  python manage.py process_media --loop --interval 2
+    补齐旧图片的多尺寸版本: python manage.py process_media --enqueue-missing-variants
+    可以同时运行多个 worker，任务通过 SKIP LOCKED 领取，不会重复处理
+    """
+    help = "执行媒体后台处理任务"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="常驻运行，没有任务时按间隔轮询")
+        parser.add_argument('--interval', type=float, default=2, help="常驻模式下的轮询间隔(秒)")
+        parser.add_argument('--batch-size', type=int, default=10, help="每次领取的任务数")
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help="删除多少天之前已完成的任务，0 表示不删除")
+        parser.add_argument('--enqueue-missing-variants', action='store_true',
+                            help="为还没有多尺寸版本的已有图片登记处理任务")
+
+    def handle(self, *args, **options):
+        requeued = media.requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"重新排队 {requeued} 个超时任务"))
+        if options['purge_days']:
+            media.purge_finished_jobs(options['purge_days'])
+        if options['enqueue_missing_variants']:
+            count = media.enqueue_missing_variants()
+            self.stdout.write(f"登记 {count} 个图片处理任务")
+
+        while True:
+            summary = media.process_pending_jobs(options['batch_size'])
+            if summary or not options['loop']:
+                detail = ", ".join(f"{status} {count}" for status, count in summary.items()) or "无任务"
+                self.stdout.write(self.style.SUCCESS(f"✓ {detail}"))
+            if not options['loop']:
+                break
+            if not summary:
+                time.sleep(options['interval'])
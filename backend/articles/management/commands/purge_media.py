@@ -0,0 +1,107 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+
+from articles.models import ProcessedMedia
+from articles.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    """
+    清理内容寻址存储中没有任何记录引用的文件
+    python manage.py purge_media --dry-run            # 只列出，不删除
+    python manage.py purge_media --older-than-hours 48
+
+    引用来源：所有模型的 FileField / ImageField，以及图片的多尺寸版本 (<字段>_variants)。
+    文件可能被多篇文章共用，删除文章 / 替换文件时不会删除，由本命令定期清理 (建议每天执行)。
+    """
+    help = "清理没有被引用的上传文件"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=float,
+                            default=getattr(settings, 'PURGE_MEDIA_MIN_AGE_HOURS', 24),
+                            help="只清理修改时间早于该时长的文件")
+        parser.add_argument('--dry-run', action='store_true', help="只列出要删除的文件")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError("默认存储不是 articles.storage.ContentAddressedStorage")
+
+        referenced = self.referenced_names()
+        older_than = time.time() - options['older_than_hours'] * 3600
+        removed = default_storage.purge_unreferenced(
+            referenced, older_than, dry_run=options['dry_run'], recheck=self.referenced_among,
+        )
+        for name in removed:
+            self.stdout.write(f"  {name}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"✓ 将删除 {len(removed)} 个文件 (dry run)"))
+            return
+
+        # 结果文件已被删除的处理记录作废
+        stale = self.stale_records(set(removed))
+        ProcessedMedia.objects.filter(pk__in=stale).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ 删除 {len(removed)} 个文件，作废 {len(stale)} 条处理记录 (引用中 {len(referenced)} 个)"
+        ))
+
+    def file_fields(self):
+        """[(模型, 文件字段名列表, 多尺寸版本字段名列表)]"""
+        result = []
+        for model in apps.get_models():
+            file_fields = [
+                f.name for f in model._meta.concrete_fields if isinstance(f, models.FileField)
+            ]
+            variant_fields = [
+                f.name for f in model._meta.concrete_fields
+                if isinstance(f, models.JSONField) and f.name.endswith('_variants')
+            ]
+            if file_fields or variant_fields:
+                result.append((model, file_fields, variant_fields))
+        return result
+
+    @staticmethod
+    def variant_names(variants):
+        return {v for variant in variants or [] for k, v in variant.items() if k not in ('w', 'h')}
+
+    def referenced_names(self):
+        """所有记录引用的文件名"""
+        names = set()
+        for model, file_fields, variant_fields in self.file_fields():
+            rows = model._default_manager.values_list(*file_fields, *variant_fields)
+            for row in rows.iterator(chunk_size=2000):
+                names.update(name for name in row[:len(file_fields)] if name)
+                for variants in row[len(file_fields):]:
+                    names |= self.variant_names(variants)
+        return names
+
+    def referenced_among(self, names, batch_size=200):
+        """删除前重新查询：names 中当前被记录引用的文件名 (扫描之后新保存的记录也算)"""
+        found = set()
+        for i in range(0, len(names), batch_size):
+            batch = names[i:i + batch_size]
+            for model, file_fields, variant_fields in self.file_fields():
+                manager = model._default_manager
+                for field in file_fields:
+                    found.update(manager.filter(**{f'{field}__in': batch}).values_list(field, flat=True))
+                for field in variant_fields:
+                    # 版本列表是 JSON，先按文本粗筛，再解析确认
+                    query = models.Q()
+                    for name in batch:
+                        query |= models.Q(**{f'{field}__icontains': name})
+                    for variants in manager.filter(query).values_list(field, flat=True):
+                        found |= self.variant_names(variants) & set(batch)
+        return found
+
+    def stale_records(self, removed):
+        if not removed:
+            return []
+        return [
+            pk for pk, result in ProcessedMedia.objects.values_list('pk', 'result').iterator()
+            if removed.intersection(result.get('files', []))
+        ]
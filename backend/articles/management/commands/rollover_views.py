@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles import rollups
+
+
+class Command(BaseCommand):
+    """
+    每日浏览量归档 (建议每天 00:05 由 cron 执行)
+    python manage.py rollover_views
+    python manage.py rollover_views --date 2025-11-30 --keep-days 400
+    """
+    help = "把各文章的今日浏览量写入每日浏览量表并清零"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="归档日期 (YYYY-MM-DD)，默认昨天")
+        parser.add_argument('--chunk-size', type=int, default=rollups.ROLLOVER_CHUNK_SIZE,
+                            help="每批处理的文章数")
+        parser.add_argument('--keep-days', type=int, default=0,
+                            help="只保留最近 N 天的汇总记录，0 表示不清理")
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"无效的日期: {options['date']}")
+
+        summary = rollups.rollover_today_views(day=day, chunk_size=options['chunk_size'])
+        for model_name, views in summary.items():
+            self.stdout.write(f"  {model_name:15s}: {views} 次浏览")
+        self.stdout.write(self.style.SUCCESS(f"✓ 共归档 {sum(summary.values())} 次浏览"))
+
+        if options['keep_days']:
+            deleted = rollups.prune_daily_views(options['keep_days'])
+            self.stdout.write(self.style.SUCCESS(f"✓ 清理 {deleted} 条过期记录"))
@@ -0,0 +1,547 @@
+# articles/media.py
+
+"""
+媒体后台处理
+
+- enqueue_media_jobs: 文章保存后登记 MediaJob (MediaProcessingMixin.save 把两者放在同一事务内)
+- process_pending_jobs: 领取并执行任务，由 `python manage.py process_media` 调用；
+  失败的任务按 MEDIA_JOB_RETRY_DELAY 指数退避后再重试
+- 处理完成后用条件 UPDATE 替换字段：只有字段仍是登记时的文件才替换，
+  处理期间编辑重新上传了文件则丢弃本次结果
+- MEDIA_PROCESSING_SYNC=True 时登记后立即同步处理 (测试 / 本地开发无 worker 时使用)
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .caching import bump_model_version
+from .models import DocumentPage, DocumentPreview, MediaJob, ProcessedMedia
+from .pdf import linearize, run_pdf_tool
+from .registry import registry
+from .utils import encode_image_variants
+
+logger = logging.getLogger(__name__)
+
+# 存储 <-> 临时文件复制的块大小
+CHUNK_SIZE = 1024 * 1024
+# 分页文本每批写入的行数
+PAGE_BATCH_SIZE = 200
+
+
+def is_sync():
+    return getattr(settings, 'MEDIA_PROCESSING_SYNC', False)
+
+
+def max_attempts():
+    return getattr(settings, 'MEDIA_JOB_MAX_ATTEMPTS', 3)
+
+
+def retry_delay(attempts):
+    """第 attempts 次失败后到下次重试的等待时间：MEDIA_JOB_RETRY_DELAY 秒，每次失败翻倍"""
+    return timedelta(seconds=getattr(settings, 'MEDIA_JOB_RETRY_DELAY', 60) * 2 ** (attempts - 1))
+
+
+def enqueue_media_jobs(instance, fields):
+    """为 instance 新上传的字段登记处理任务"""
+    ct = ContentType.objects.get_for_model(instance)
+    # 逐条 create 而不是 bulk_create：MySQL 的 bulk_create 不回填主键，同步模式需要主键
+    jobs = [
+        MediaJob.objects.create(
+            content_type=ct,
+            object_id=instance.pk,
+            field=field,
+            kind=instance.media_fields[field],
+            source=getattr(instance, field).name,
+        )
+        for field in fields
+    ]
+    if is_sync():
+        for job in jobs:
+            _run_now(job)
+            # 同步处理时把新文件名同步到内存中的实例
+            instance.refresh_from_db(fields=[
+                name for name in (job.field, f'{job.field}_variants') if hasattr(instance, name)
+            ])
+    return jobs
+
+
+def _run_now(job):
+    """同步模式：登记后立即执行"""
+    job.status = MediaJob.PROCESSING
+    job.attempts = 1
+    MediaJob.objects.filter(pk=job.pk).update(status=job.status, attempts=job.attempts)
+    return run_job(job)
+
+
+def enqueue_missing_variants():
+    """为已有但还没有多尺寸版本的图片登记任务 (跳过有未完成或已失败任务的)，返回登记数量"""
+    count = 0
+    for article_type in registry.all():
+        model = article_type.model
+        for field, kind in getattr(model, 'media_fields', {}).items():
+            variants_field = f'{field}_variants'
+            if kind != 'image' or not hasattr(model, variants_field):
+                continue
+            ct = ContentType.objects.get_for_model(model)
+            queued = MediaJob.objects.filter(
+                content_type=ct, field=field, status__in=[MediaJob.PENDING, MediaJob.PROCESSING, MediaJob.FAILED],
+            ).values('object_id')
+            rows = (
+                model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .filter(**{variants_field: []})
+                .exclude(pk__in=queued)
+                .values_list('pk', field)
+            )
+            jobs = [
+                MediaJob(content_type=ct, object_id=pk, field=field, kind=kind, source=name)
+                for pk, name in rows.iterator()
+            ]
+            MediaJob.objects.bulk_create(jobs, batch_size=500)
+            count += len(jobs)
+    return count
+
+
+def enqueue_missing_previews(force=False):
+    """
+    为还没有预览 (或预览不是当前文件) 的 PDF 登记 pdf_preview 任务，返回登记数量
+    force=True 时全部重新提取；已有等待中 / 处理中任务的跳过
+    """
+    count = 0
+    for article_type in registry.all():
+        model = article_type.model
+        for field, kind in getattr(model, 'media_fields', {}).items():
+            if FOLLOW_UPS.get(kind) != 'pdf_preview':
+                continue
+            ct = ContentType.objects.get_for_model(model)
+            queued = MediaJob.objects.filter(
+                content_type=ct, field=field, kind='pdf_preview',
+                status__in=[MediaJob.PENDING, MediaJob.PROCESSING],
+            ).values('object_id')
+            rows = (
+                model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .filter(**{f'{field}__iendswith': '.pdf'})
+                .exclude(pk__in=queued)
+            )
+            if not force:
+                rows = rows.exclude(Exists(DocumentPreview.objects.filter(
+                    content_type=ct, object_id=OuterRef('pk'), field=field, source=OuterRef(field),
+                )))
+            jobs = [
+                MediaJob(content_type=ct, object_id=pk, field=field, kind='pdf_preview', source=name)
+                for pk, name in rows.values_list('pk', field).iterator()
+            ]
+            MediaJob.objects.bulk_create(jobs, batch_size=500)
+            count += len(jobs)
+    return count
+
+
+# ==================== 处理函数 ====================
+
+class SkipJob(Exception):
+    """
+    处理函数主动跳过 (任务记为完成，原因写入 error)
+    follow_up=True 时仍然登记后续任务 (例如超过压缩大小上限的 PDF 仍需要提取预览)
+    """
+
+    def __init__(self, reason, follow_up=False):
+        super().__init__(reason)
+        self.follow_up = follow_up
+
+
+def image_variant_widths():
+    return getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 1200))
+
+
+def process_image(job, model, field):
+    """
+    方向校正 + 多尺寸 JPEG / WebP 编码
+    字段替换为最大宽度的 JPEG，全部版本记录到 <字段>_variants (模型没有该字段时只生成最大宽度)
+    返回 (要更新的字段, 新生成的文件)
+    """
+    storage = field.storage
+    variants_field = f'{job.field}_variants'
+    has_variants = any(f.name == variants_field for f in model._meta.concrete_fields)
+    widths = image_variant_widths() if has_variants else (max(image_variant_widths()),)
+
+    job.original_size = storage.size(job.source)
+    with storage.open(job.source, 'rb') as fp:
+        encoded = encode_image_variants(fp, widths)
+
+    # 重新处理已有版本时去掉旧的宽度后缀，避免 photo-1200-1200.jpg
+    base = re.sub(r'-\d+$', '', os.path.splitext(job.source)[0])
+    extensions = {'jpeg': 'jpg', 'webp': 'webp'}
+    variants, created = [], []
+    for width, height, files in encoded:
+        record = {'w': width, 'h': height}
+        for fmt, content in files.items():
+            name = storage.save(f'{base}-{width}.{extensions[fmt]}', ContentFile(content.getvalue()))
+            record[fmt] = name
+            created.append(name)
+        variants.append(record)
+
+    job.processed_size = storage.size(variants[-1]['jpeg'])
+    updates = {job.field: variants[-1]['jpeg']}
+    if has_variants:
+        updates[variants_field] = variants
+    return updates, created
+
+
+def find_qpdf():
+    """线性化使用的 qpdf 路径，未开启或未安装时返回 None"""
+    if not getattr(settings, 'PDF_LINEARIZE', True):
+        return None
+    return shutil.which(getattr(settings, 'QPDF_BINARY', 'qpdf'))
+
+
+def pdf_limits():
+    """PDF 子进程的超时和内存上限"""
+    return {
+        'timeout': getattr(settings, 'PDF_COMPRESS_TIMEOUT', 300),
+        'memory_limit': getattr(settings, 'PDF_COMPRESS_MEMORY_LIMIT', None),
+    }
+
+
+def _copy_to_temp(storage, name, tmp):
+    """把存储中的文件分块复制到临时目录，返回临时文件路径"""
+    path = os.path.join(tmp, 'source' + os.path.splitext(name)[1].lower())
+    with storage.open(name, 'rb') as fp, open(path, 'wb') as out:
+        shutil.copyfileobj(fp, out, CHUNK_SIZE)
+    return path
+
+
+def process_pdf(job, model, field):
+    """
+    PDF 无损压缩 + 线性化：存储 -> 磁盘临时文件 -> 子进程处理 -> 存储，全程不把文档读入内存
+    超过 PDF_COMPRESS_MAX_SIZE 的文件跳过；压缩后没有变小则保留未压缩的版本
+    """
+    if not job.source.lower().endswith('.pdf'):
+        raise SkipJob("not a pdf")
+
+    storage = field.storage
+    job.original_size = storage.size(job.source)
+    if job.original_size > getattr(settings, 'PDF_COMPRESS_MAX_SIZE', 200 * 1024 * 1024):
+        raise SkipJob(f"larger than PDF_COMPRESS_MAX_SIZE ({job.original_size} bytes)", follow_up=True)
+
+    with tempfile.TemporaryDirectory(dir=settings.FILE_UPLOAD_TEMP_DIR) as tmp:
+        src = _copy_to_temp(storage, job.source, tmp)
+        limits = pdf_limits()
+
+        result = src
+        compressed = os.path.join(tmp, 'compressed.pdf')
+        run_pdf_tool('compress', src, compressed, **limits)
+        if os.path.getsize(compressed) < job.original_size:
+            result = compressed
+
+        qpdf = find_qpdf()
+        if qpdf:
+            linearized = os.path.join(tmp, 'linearized.pdf')
+            linearize(qpdf, result, linearized, **limits)
+            result = linearized
+
+        job.processed_size = os.path.getsize(result)
+        if result == src:
+            return {}, []
+        with open(result, 'rb') as fp:
+            name = storage.save(job.source, File(fp))
+    return {job.field: name}, [name]
+
+
+def process_pdf_preview(job, model, field):
+    """
+    提取 PDF 页数、首页缩略图和分页文本 (子进程)，写入 DocumentPreview / DocumentPage
+    分页文本逐行读取、分批写入，不在 worker 内存中保存整本书的文本
+    同一文件 (内容寻址存储下即相同内容) 已有其他文章的预览时直接复制，不再解析
+    """
+    if not job.source.lower().endswith('.pdf'):
+        raise SkipJob("not a pdf")
+
+    preview = DocumentPreview(content_type=job.content_type, object_id=job.object_id, field=job.field)
+    shared = (
+        DocumentPreview.objects.filter(source=job.source)
+        .exclude(content_type=job.content_type, object_id=job.object_id, field=job.field)
+        .first()
+    )
+    if shared and (not shared.thumbnail or shared.thumbnail.storage.exists(shared.thumbnail.name)):
+        preview.page_count = shared.page_count
+        preview.thumbnail = shared.thumbnail.name
+        preview.thumbnail_width, preview.thumbnail_height = shared.thumbnail_width, shared.thumbnail_height
+        save_document_preview(job, model, preview, _iter_preview_pages(shared))
+        return {}, []
+
+    with tempfile.TemporaryDirectory(dir=settings.FILE_UPLOAD_TEMP_DIR) as tmp:
+        src = _copy_to_temp(field.storage, job.source, tmp)
+        run_pdf_tool(
+            'preview', src, tmp,
+            str(getattr(settings, 'PDF_THUMBNAIL_WIDTH', 320)),
+            shutil.which('pdftoppm') or '',
+            **pdf_limits(),
+        )
+        with open(os.path.join(tmp, 'meta.json')) as fp:
+            meta = json.load(fp)
+
+        preview.page_count = meta['page_count']
+        thumbnail = meta['thumbnail']
+        if thumbnail:
+            with open(os.path.join(tmp, thumbnail['name']), 'rb') as fp:
+                base = os.path.splitext(os.path.basename(job.source))[0]
+                preview.thumbnail.save(f'{base}.jpg', File(fp), save=False)
+            preview.thumbnail_width, preview.thumbnail_height = thumbnail['width'], thumbnail['height']
+        save_document_preview(job, model, preview, _iter_jsonl_pages(os.path.join(tmp, 'pages.jsonl')))
+    return {}, []
+
+
+def _iter_jsonl_pages(path):
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            page = json.loads(line)
+            yield page['page'], page['text']
+
+
+def _iter_preview_pages(preview):
+    """按页码分批读取已有预览的分页文本"""
+    last = 0
+    while True:
+        batch = list(
+            preview.pages.filter(page_number__gt=last)
+            .order_by('page_number')
+            .values_list('page_number', 'text')[:PAGE_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        yield from batch
+        last = batch[-1][0]
+
+
+def save_document_preview(job, model, preview, pages):
+    """
+    保存预览 (未保存的 DocumentPreview) 和分页文本 [(页码, 文本), ...]，替换该字段原有的预览
+    文档在处理期间被替换时丢弃
+    """
+    old_thumbnail = None
+    with transaction.atomic():
+        article = model.objects.select_for_update().filter(pk=job.object_id, **{job.field: job.source})
+        if not article.exists():
+            if preview.thumbnail:
+                preview.thumbnail.delete(save=False)
+            raise SkipJob("source replaced")
+
+        existing = (
+            DocumentPreview.objects.select_for_update()
+            .filter(content_type=job.content_type, object_id=job.object_id, field=job.field)
+            .first()
+        )
+        if existing:
+            preview.pk, preview.created_at = existing.pk, existing.created_at
+            old_thumbnail = existing.thumbnail.name
+            existing.pages.all().delete()
+        preview.source = job.source
+        preview.save()
+
+        batch = []
+        for page_number, text in pages:
+            batch.append(DocumentPage(preview=preview, page_number=page_number, text=text))
+            if len(batch) >= PAGE_BATCH_SIZE:
+                DocumentPage.objects.bulk_create(batch)
+                batch = []
+        DocumentPage.objects.bulk_create(batch)
+
+        # 列表 / 详情的 ETag 取自 updated_at，预览变化也需要让客户端重新获取
+        article.update(updated_at=timezone.now())
+
+    if old_thumbnail and old_thumbnail != preview.thumbnail.name:
+        preview.thumbnail.storage.delete(old_thumbnail)
+    bump_model_version(model)
+
+
+PROCESSORS = {
+    'image': process_image,
+    'pdf': process_pdf,
+    'pdf_preview': process_pdf_preview,
+}
+
+# 任务完成后对最终文件登记的后续任务
+FOLLOW_UPS = {
+    'pdf': 'pdf_preview',
+}
+
+# 按内容哈希复用处理结果的处理类型 (pdf_preview 按文件名复用，见 process_pdf_preview)
+CACHEABLE_KINDS = ('image', 'pdf')
+
+
+def process_with_cache(job, model, field):
+    """
+    执行处理函数，返回 (要更新的字段, 新生成的文件)
+    存储为内容寻址存储时按 (处理类型, 内容哈希) 记录结果，相同内容再次上传时直接套用
+    结果中的字段名以 {field} 占位，可以套用到其他模型的同类字段
+    """
+    content_hash = getattr(field.storage, 'content_hash', lambda name: None)(job.source)
+    if not content_hash or job.kind not in CACHEABLE_KINDS:
+        return PROCESSORS[job.kind](job, model, field)
+
+    record = ProcessedMedia.objects.filter(kind=job.kind, content_hash=content_hash).first()
+    if record and all(field.storage.exists(name) for name in record.result['files']):
+        job.original_size, job.processed_size = record.original_size, record.processed_size
+        columns = {f.name for f in model._meta.concrete_fields}
+        updates = {
+            key.format(field=job.field): value for key, value in record.result['updates'].items()
+            if key.format(field=job.field) in columns
+        }
+        # 结果文件与其他文章共用，丢弃时不删除
+        return updates, []
+
+    updates, created = PROCESSORS[job.kind](job, model, field)
+    ProcessedMedia.objects.update_or_create(
+        kind=job.kind, content_hash=content_hash,
+        defaults={
+            'result': {
+                'updates': {key.replace(job.field, '{field}', 1): value for key, value in updates.items()},
+                'files': created,
+            },
+            'original_size': job.original_size,
+            'processed_size': job.processed_size,
+        },
+    )
+    return updates, created
+
+
+# ==================== 执行 ====================
+
+def run_job(job):
+    """执行一个已领取的任务，返回最终状态"""
+    model = job.content_type.model_class()
+    try:
+        current = model and model.objects.filter(pk=job.object_id, **{job.field: job.source})
+        if model is None or not current.exists():
+            # 文章已删除或字段已被替换
+            return _finish(job, MediaJob.DONE, "skipped: source replaced")
+
+        field = model._meta.get_field(job.field)
+        updates, created = process_with_cache(job, model, field)
+        final = job.source
+        if updates:
+            if 'updated_at' in {f.name for f in model._meta.concrete_fields}:
+                # 列表 / 详情的 ETag 取自 updated_at，替换文件后需要让客户端重新获取
+                updates['updated_at'] = timezone.now()
+            # 只有字段仍是原文件时才替换，否则丢弃处理结果
+            if current.update(**updates):
+                final = updates.get(job.field, job.source)
+                if final != job.source:
+                    field.storage.delete(job.source)
+                bump_model_version(model)
+            else:
+                for name in created:
+                    field.storage.delete(name)
+                return _finish(job, MediaJob.DONE, "skipped: source replaced")
+        status = _finish(job, MediaJob.DONE)
+        _enqueue_follow_up(job, final)
+        return status
+    except SkipJob as e:
+        status = _finish(job, MediaJob.DONE, f"skipped: {e}")
+        if e.follow_up:
+            _enqueue_follow_up(job, job.source)
+        return status
+    except Exception:
+        logger.exception("media job %s failed", job.pk)
+        if job.attempts >= max_attempts():
+            return _finish(job, MediaJob.FAILED, traceback.format_exc(limit=5))
+        job.run_after = timezone.now() + retry_delay(job.attempts)
+        return _finish(job, MediaJob.PENDING, traceback.format_exc(limit=5))
+
+
+def _enqueue_follow_up(job, source):
+    kind = FOLLOW_UPS.get(job.kind)
+    if not kind:
+        return
+    follow_up = MediaJob.objects.create(
+        content_type=job.content_type, object_id=job.object_id, field=job.field, kind=kind, source=source,
+    )
+    if is_sync():
+        _run_now(follow_up)
+
+
+def _finish(job, status, error=""):
+    job.status = status
+    job.error = error
+    job.finished_at = timezone.now() if status in (MediaJob.DONE, MediaJob.FAILED) else None
+    MediaJob.objects.filter(pk=job.pk).update(
+        status=job.status, error=job.error, finished_at=job.finished_at, updated_at=timezone.now(),
+        run_after=job.run_after,
+        original_size=job.original_size, processed_size=job.processed_size,
+    )
+    return status
+
+
+def claim_jobs(batch_size=10, kinds=None):
+    """领取一批等待中的任务 (SKIP LOCKED：多个 worker 互不阻塞、不重复领取)，跳过还在重试等待中的"""
+    queryset = MediaJob.objects.filter(status=MediaJob.PENDING).filter(
+        Q(run_after__isnull=True) | Q(run_after__lte=timezone.now())
+    )
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    with transaction.atomic():
+        jobs = list(queryset.select_for_update(skip_locked=True).order_by('pk')[:batch_size])
+        if jobs:
+            now = timezone.now()
+            for job in jobs:
+                job.status = MediaJob.PROCESSING
+                job.attempts += 1
+                job.started_at = now
+            MediaJob.objects.bulk_update(jobs, ['status', 'attempts', 'started_at'])
+    return jobs
+
+
+def requeue_stale_jobs(timeout=None):
+    """worker 异常退出时遗留的处理中任务，超时后重新排队"""
+    if timeout is None:
+        timeout = getattr(settings, 'MEDIA_JOB_STALE_TIMEOUT', 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return MediaJob.objects.filter(
+        status=MediaJob.PROCESSING, started_at__lt=cutoff,
+    ).update(status=MediaJob.PENDING)
+
+
+def process_pending_jobs(batch_size=10, kinds=None):
+    """处理一批任务，返回 {状态: 数量}"""
+    summary = {}
+    for job in claim_jobs(batch_size, kinds):
+        status = run_job(job)
+        summary[status] = summary.get(status, 0) + 1
+    return summary
+
+
+def purge_finished_jobs(keep_days):
+    """删除 keep_days 天之前完成的任务"""
+    cutoff = timezone.now() - timedelta(days=keep_days)
+    deleted, _ = MediaJob.objects.filter(status=MediaJob.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def media_status(instance):
+    """文章各媒体字段最近一次处理任务的状态"""
+    if not instance.media_fields:
+        return {}
+    jobs = (
+        MediaJob.objects.filter(
+            content_type=ContentType.objects.get_for_model(instance),
+            object_id=instance.pk,
+        )
+        .order_by('field', '-pk')
+        .values('field', 'status', 'attempts', 'error', 'original_size', 'processed_size', 'updated_at')
+    )
+    status = {}
+    for job in jobs:
+        status.setdefault(job.pop('field'), job)
+    return status
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyViewStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('date', models.DateField(verbose_name='日期')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='浏览量')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': '每日浏览量',
+                'verbose_name_plural': '每日浏览量',
+                'db_table': 'articles_daily_view_stat',
+                'indexes': [models.Index(fields=['date', 'content_type'], name='articles_da_date_014cf2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'date'), name='uniq_daily_view_stat')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# 为各文章表的搜索字段创建 MySQL FULLTEXT 索引 (ngram 分词，支持中文)
+# 字段组合与 articles.search.FULLTEXT_INDEXES 一致；非 MySQL 数据库跳过
+
+from django.db import migrations
+
+FULLTEXT_INDEXES = [
+    ('articles_news', 'ft_news', ['title', 'content', 'author']),
+    ('articles_book_info', 'ft_book_info', ['title', 'author', 'isbn', 'publisher']),
+    ('articles_book_review', 'ft_book_review', ['title', 'content']),
+    ('articles_opinion', 'ft_opinion', ['title', 'content', 'author']),
+    ('articles_literature', 'ft_literature', ['title', 'content']),
+    ('articles_qa', 'ft_qa', ['title', 'content']),
+    ('articles_translation', 'ft_translation', ['title', 'content', 'original_title', 'original_author']),
+    ('articles_history', 'ft_history', ['title', 'content']),
+    ('articles_paper', 'ft_paper', ['title']),
+    ('articles_classic_book', 'ft_classic_book', ['title']),
+    ('articles_library', 'ft_library', ['title', 'author_intro', 'content_intro', 'isbn']),
+    ('articles_scripture', 'ft_scripture', ['title']),
+    ('articles_scripture_chapter', 'ft_scripture_chapter', ['title', 'content']),
+]
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    qn = schema_editor.quote_name
+    # InnoDB 每次只能高效地添加一个 FULLTEXT 索引，逐表执行
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(
+            f"ALTER TABLE {qn(table)} ADD FULLTEXT INDEX {qn(name)} "
+            f"({', '.join(qn(c) for c in columns)}) WITH PARSER ngram"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    qn = schema_editor.quote_name
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f"ALTER TABLE {qn(table)} DROP INDEX {qn(name)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_daily_view_stat'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:40
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COMMENT_COUNT_MODELS = [
+    'news', 'bookinfo', 'bookreview', 'opinion', 'literature', 'qa', 'translation',
+    'history', 'paper', 'classicbook', 'library', 'scripture',
+]
+
+
+def backfill_comment_count(apps, schema_editor):
+    """每张表一条 UPDATE，用相关子查询统计显示中的评论数"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Comment = apps.get_model('comments', 'Comment')
+    for model_name in COMMENT_COUNT_MODELS:
+        ct = ContentType.objects.filter(app_label='articles', model=model_name).first()
+        if ct is None:
+            continue
+        counts = (
+            Comment.objects.filter(content_type=ct, object_id=OuterRef('pk'), is_active=True)
+            .order_by()
+            .values('object_id')
+            .annotate(n=Count('pk'))
+            .values('n')
+        )
+        apps.get_model('articles', model_name).objects.update(
+            comment_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_fulltext_indexes'),
+        ('comments', '0002_comment_thread'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookinfo',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='bookreview',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='classicbook',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='history',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='library',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='literature',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='opinion',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='paper',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='qa',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='scripture',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='translation',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_comment_count'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('field', models.CharField(max_length=50, verbose_name='字段')),
+                ('kind', models.CharField(max_length=20, verbose_name='处理类型')),
+                ('source', models.CharField(max_length=255, verbose_name='原始文件')),
+                ('status', models.CharField(choices=[('pending', '等待处理'), ('processing', '处理中'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='尝试次数')),
+                ('error', models.TextField(blank=True, default='', verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': '媒体处理任务',
+                'verbose_name_plural': '媒体处理任务',
+                'db_table': 'articles_media_job',
+                'indexes': [models.Index(fields=['status', 'id'], name='articles_me_status_232345_idx'), models.Index(fields=['content_type', 'object_id'], name='articles_me_content_107e85_idx')],
+            },
+        ),
+    ]
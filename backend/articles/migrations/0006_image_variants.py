@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_media_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookinfo',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='bookreview',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='history',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='library',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='literature',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='opinion',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='paper',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='scripture',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+        migrations.AddField(
+            model_name='translation',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='图片尺寸版本'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediajob',
+            name='original_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='原始大小'),
+        ),
+        migrations.AddField(
+            model_name='mediajob',
+            name='processed_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='处理后大小'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_media_job_sizes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentPreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('field', models.CharField(max_length=50, verbose_name='字段')),
+                ('source', models.CharField(max_length=255, verbose_name='文档文件')),
+                ('page_count', models.PositiveIntegerField(default=0, verbose_name='页数')),
+                ('thumbnail', models.ImageField(blank=True, null=True, upload_to='articles/previews/%Y/%m/', verbose_name='首页缩略图')),
+                ('thumbnail_width', models.PositiveIntegerField(blank=True, null=True, verbose_name='缩略图宽度')),
+                ('thumbnail_height', models.PositiveIntegerField(blank=True, null=True, verbose_name='缩略图高度')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': '文档预览',
+                'verbose_name_plural': '文档预览',
+                'db_table': 'articles_document_preview',
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField(verbose_name='页码')),
+                ('text', models.TextField(blank=True, default='', verbose_name='文本')),
+                ('preview', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='articles.documentpreview')),
+            ],
+            options={
+                'verbose_name': '文档分页文本',
+                'verbose_name_plural': '文档分页文本',
+                'db_table': 'articles_document_page',
+                'ordering': ['preview', 'page_number'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentpreview',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id', 'field'), name='uniq_document_preview'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentpage',
+            constraint=models.UniqueConstraint(fields=('preview', 'page_number'), name='uniq_document_page'),
+        ),
+    ]
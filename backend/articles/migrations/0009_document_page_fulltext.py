@@ -0,0 +1,32 @@
+# 为 PDF 分页文本创建 MySQL FULLTEXT 索引 (ngram 分词，支持中文)
+# 与 articles.search.FULLTEXT_INDEXES['articles.documentpage'] 一致；非 MySQL 数据库跳过
+
+from django.db import migrations
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    qn = schema_editor.quote_name
+    schema_editor.execute(
+        f"ALTER TABLE {qn('articles_document_page')} ADD FULLTEXT INDEX {qn('ft_document_page')} "
+        f"({qn('text')}) WITH PARSER ngram"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    qn = schema_editor.quote_name
+    schema_editor.execute(f"ALTER TABLE {qn('articles_document_page')} DROP INDEX {qn('ft_document_page')}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0008_document_preview'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
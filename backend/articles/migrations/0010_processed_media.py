@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_document_page_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='处理类型')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='内容哈希')),
+                ('result', models.JSONField(default=dict, verbose_name='处理结果')),
+                ('original_size', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='原始大小')),
+                ('processed_size', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='处理后大小')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '媒体处理结果',
+                'verbose_name_plural': '媒体处理结果',
+                'db_table': 'articles_processed_media',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'content_hash'), name='uniq_processed_media')],
+            },
+        ),
+    ]
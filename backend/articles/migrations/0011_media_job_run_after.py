@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0010_processed_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediajob',
+            name='run_after',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='重试时间'),
+        ),
+    ]
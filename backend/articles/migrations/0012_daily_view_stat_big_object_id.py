@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0011_media_job_run_after'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyviewstat',
+            name='object_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
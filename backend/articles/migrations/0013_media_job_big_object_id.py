@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0012_daily_view_stat_big_object_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediajob',
+            name='object_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
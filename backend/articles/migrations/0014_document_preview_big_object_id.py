@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0013_media_job_big_object_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentpreview',
+            name='object_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
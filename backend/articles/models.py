@@ -1,12 +1,10 @@
 # articles/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.fields import GenericRelation
-
-# 引入压缩工具
-from .utils import compress_image, compress_pdf
+from django.contrib.contenttypes.models import ContentType
 
 # ==================== 抽象基类 (保持不变) ====================
 
@@ -28,6 +26,9 @@ class PublishableModel(models.Model):
         help_text=_("勾选后文章将在前台显示")
     )
 
+    # 前台可见的过滤条件，视图集、搜索、统计等统一使用
+    PUBLISHED_FILTER = {'is_published': True}
+
     class Meta:
         abstract = True
 
@@ -51,7 +52,45 @@ class ReactionModel(models.Model):
         abstract = True
 
 
-class BaseArticle(TimeStampedModel, PublishableModel, ViewCountModel, ReactionModel):
+class CommentCountModel(models.Model):
+    """评论数抽象基类 (由 comments.Comment 在保存 / 删除时维护，列表页不必统计评论表)"""
+    comment_count = models.PositiveIntegerField(_("评论数"), default=0)
+
+    class Meta:
+        abstract = True
+
+
+class MediaProcessingMixin:
+    """
+    媒体后台处理 Mixin
+    新上传的文件先原样保存，save() 只登记 MediaJob，压缩 / 转码由 process_media 命令在后台执行，
+    完成后替换字段 (MEDIA_PROCESSING_SYNC=True 时在 save() 内同步处理，用于测试)
+    media_fields: {字段名: 处理类型}
+    图片字段可以另有 <字段名>_variants JSONField，保存后台生成的多尺寸版本
+    """
+    media_fields = {}
+
+    def save(self, *args, **kwargs):
+        # 未提交到存储的 FieldFile 即本次新上传的文件
+        uploaded = [
+            name for name in self.media_fields
+            if getattr(self, name) and not getattr(self, name)._committed
+        ]
+        for name in uploaded:
+            # 旧图片的尺寸版本不再适用，处理完成前只返回原图
+            if hasattr(self, f'{name}_variants'):
+                setattr(self, f'{name}_variants', [])
+        if not uploaded:
+            super().save(*args, **kwargs)
+            return
+        from .media import enqueue_media_jobs
+        # 文章和任务在同一事务内保存：登记失败时文章一起回滚，不会留下永远不处理的原图
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            enqueue_media_jobs(self, uploaded)
+
+
+class BaseArticle(TimeStampedModel, PublishableModel, ViewCountModel, ReactionModel, CommentCountModel):
     """文章基类"""
     title = models.CharField(_("标题"), max_length=200, db_index=True)
     content = models.TextField(_("内容"), blank=True, default="")
@@ -80,25 +119,25 @@ class BaseArticle(TimeStampedModel, PublishableModel, ViewCountModel, ReactionMo
 
 # ==================== 具体模型 (添加 Save 方法) ====================
 
-class News(BaseArticle):
+class News(MediaProcessingMixin, BaseArticle):
     """通讯"""
     image = models.ImageField(
         _("图片"),
         upload_to='articles/news/%Y/%m/',
         blank=True, null=True
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("通讯")
         verbose_name_plural = _("通讯")
         db_table = 'articles_news'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
-
 
-class BookInfo(BaseArticle):
+class BookInfo(MediaProcessingMixin, BaseArticle):
     """书讯"""
     author_intro = models.TextField(_("作者简介"), blank=True, default="")
     catalog = models.TextField(_("目录"), blank=True, default="")
@@ -114,16 +153,16 @@ class BookInfo(BaseArticle):
         upload_to='articles/books/%Y/%m/',
         blank=True, null=True
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("书讯")
         verbose_name_plural = _("书讯")
         db_table = 'articles_book_info'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
-
 
 class BookReviewCategory(models.Model):
     """书评分类"""
@@ -140,7 +179,7 @@ class BookReviewCategory(models.Model):
         return self.name
 
 
-class BookReview(BaseArticle):
+class BookReview(MediaProcessingMixin, BaseArticle):
     """书评"""
     book_publish_date = models.DateField(_("书籍出版日期"), blank=True, null=True)
     image = models.ImageField(
@@ -155,58 +194,61 @@ class BookReview(BaseArticle):
         verbose_name=_("分类"),
         related_name='reviews'
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("书评")
         verbose_name_plural = _("书评")
         db_table = 'articles_book_review'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
-
 
-class Opinion(BaseArticle):
+class Opinion(MediaProcessingMixin, BaseArticle):
     """观点"""
     image = models.ImageField(
         _("图片"),
         upload_to='articles/opinions/%Y/%m/',
         blank=True, null=True
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("观点")
         verbose_name_plural = _("观点")
         db_table = 'articles_opinion'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
-
 
-class Literature(BaseArticle):
+class Literature(MediaProcessingMixin, BaseArticle):
     """文艺"""
     image = models.ImageField(
         _("图片"),
         upload_to='articles/literature/%Y/%m/',
         blank=True, null=True
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("文艺")
         verbose_name_plural = _("文艺")
         db_table = 'articles_literature'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
-
 
 class QA(BaseArticle):
     """问答"""
     is_approved = models.BooleanField(_("是否通过审核"), default=False, db_index=True)
     author = None # 问答不需要作者字段
 
+    # 问答需要审核通过才在前台显示
+    PUBLISHED_FILTER = {'is_published': True, 'is_approved': True}
+
     class Meta:
         verbose_name = _("问答")
         verbose_name_plural = _("问答")
@@ -215,7 +257,7 @@ class QA(BaseArticle):
     # QA 没有图片，不需要重写 save
 
 
-class Translation(BaseArticle):
+class Translation(MediaProcessingMixin, BaseArticle):
     """译林"""
     original_title = models.CharField(_("原文标题"), max_length=200)
     original_author = models.CharField(_("原文作者"), max_length=100, blank=True, default="")
@@ -225,36 +267,36 @@ class Translation(BaseArticle):
         upload_to='articles/translations/%Y/%m/',
         blank=True, null=True
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("译林")
         verbose_name_plural = _("译林")
         db_table = 'articles_translation'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
 
-
-class History(BaseArticle):
+class History(MediaProcessingMixin, BaseArticle):
     """文史"""
     image = models.ImageField(
         _("图片"),
         upload_to='articles/history/%Y/%m/',
         blank=True, null=True
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("文史")
         verbose_name_plural = _("文史")
         db_table = 'articles_history'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
 
-
-class Paper(BaseArticle):
+class Paper(MediaProcessingMixin, BaseArticle):
     """论文"""
     image = models.ImageField(
         _("封面图片"),
@@ -267,21 +309,21 @@ class Paper(BaseArticle):
         blank=True, null=True
     )
     content = None # 论文没有 content 字段
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    # PDF 页数、首页缩略图和分页文本 (后台提取，见 DocumentPreview)
+    document_previews = GenericRelation('DocumentPreview')
+
+    media_fields = {'image': 'image', 'document': 'pdf'} # 图片 / PDF 后台压缩
 
     class Meta:
         verbose_name = _("论文")
         verbose_name_plural = _("论文")
         db_table = 'articles_paper'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        # 只有当扩展名是 pdf 时才尝试压缩
-        if self.document and self.document.name.lower().endswith('.pdf'):
-            self.document = compress_pdf(self.document)
-        super().save(*args, **kwargs)
-
 
-class ClassicBook(BaseArticle):
+class ClassicBook(MediaProcessingMixin, BaseArticle):
     """古籍"""
     document = models.FileField(
         upload_to='articles/classics/%Y/%m/',
@@ -289,18 +331,18 @@ class ClassicBook(BaseArticle):
     )
     content = None
 
+    # PDF 页数、首页缩略图和分页文本 (后台提取，见 DocumentPreview)
+    document_previews = GenericRelation('DocumentPreview')
+
+    media_fields = {'document': 'pdf'} # PDF 后台压缩
+
     class Meta:
         verbose_name = _("古籍")
         verbose_name_plural = _("古籍")
         db_table = 'articles_classic_book'
 
-    def save(self, *args, **kwargs):
-        if self.document and self.document.name.lower().endswith('.pdf'):
-            self.document = compress_pdf(self.document)
-        super().save(*args, **kwargs)
 
-
-class Library(BaseArticle):
+class Library(MediaProcessingMixin, BaseArticle):
     """书库"""
     document = models.FileField(
         _("PDF文档"),
@@ -315,22 +357,23 @@ class Library(BaseArticle):
         blank=True, null=True
     )
     isbn = models.CharField(_("ISBN"), max_length=30, blank=True, default="")
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    # PDF 页数、首页缩略图和分页文本 (后台提取，见 DocumentPreview)
+    document_previews = GenericRelation('DocumentPreview')
+
+    media_fields = {'image': 'image', 'document': 'pdf'} # 图片 / PDF 后台压缩
 
     class Meta:
         verbose_name = _("书库")
         verbose_name_plural = _("书库")
         db_table = 'articles_library'
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        if self.document and self.document.name.lower().endswith('.pdf'):
-            self.document = compress_pdf(self.document)
-        super().save(*args, **kwargs)
-
 
 # ==================== 经训相关 ====================
 
-class Scripture(TimeStampedModel, PublishableModel):
+class Scripture(MediaProcessingMixin, TimeStampedModel, PublishableModel, CommentCountModel):
     """经训"""
     title = models.CharField(_("标题"), max_length=200)
     image = models.ImageField(
@@ -338,6 +381,10 @@ class Scripture(TimeStampedModel, PublishableModel):
         upload_to='articles/scriptures/%Y/%m/',
         blank=True, null=True
     )
+    # 后台生成的多尺寸 WebP / JPEG 版本：[{w, h, jpeg, webp}, ...]，按宽度升序
+    image_variants = models.JSONField(_("图片尺寸版本"), default=list, blank=True, editable=False)
+
+    media_fields = {'image': 'image'} # 图片后台压缩
 
     class Meta:
         verbose_name = _("经训")
@@ -348,10 +395,6 @@ class Scripture(TimeStampedModel, PublishableModel):
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
-        self.image = compress_image(self.image)
-        super().save(*args, **kwargs)
-
 
 class ScriptureChapter(TimeStampedModel, PublishableModel):
     """经训章节"""
@@ -378,6 +421,165 @@ class ScriptureChapter(TimeStampedModel, PublishableModel):
         return f"{self.scripture.title} - {self.title}"
 
 
+# ==================== 浏览统计 ====================
+
+class DailyViewStat(models.Model):
+    """
+    文章每日浏览量
+    由 rollover_views 命令每晚从各文章表的 today_views 汇总写入
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    date = models.DateField(_("日期"))
+    views = models.PositiveIntegerField(_("浏览量"), default=0)
+
+    class Meta:
+        verbose_name = _("每日浏览量")
+        verbose_name_plural = _("每日浏览量")
+        db_table = 'articles_daily_view_stat'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id', 'date'],
+                name='uniq_daily_view_stat',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'content_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} id={self.object_id} {self.date}: {self.views}"
+
+
+# ==================== 媒体处理 ====================
+
+class MediaJob(models.Model):
+    """
+    媒体后台处理任务
+    由 MediaProcessingMixin.save() 登记，process_media 命令用 SELECT ... FOR UPDATE SKIP LOCKED 领取，
+    多个 worker 可以同时运行
+    """
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, _('等待处理')),
+        (PROCESSING, _('处理中')),
+        (DONE, _('已完成')),
+        (FAILED, _('失败')),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    field = models.CharField(_("字段"), max_length=50)
+    kind = models.CharField(_("处理类型"), max_length=20)
+    # 登记时的文件名；处理时字段已被替换为其他文件则跳过
+    source = models.CharField(_("原始文件"), max_length=255)
+    status = models.CharField(_("状态"), max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(_("尝试次数"), default=0)
+    # 失败重试前的等待：在此之前不会被领取
+    run_after = models.DateTimeField(_("重试时间"), null=True, blank=True)
+    error = models.TextField(_("错误信息"), blank=True, default="")
+    # 处理前后的文件大小 (字节)，用于统计压缩效果
+    original_size = models.PositiveBigIntegerField(_("原始大小"), null=True, blank=True)
+    processed_size = models.PositiveBigIntegerField(_("处理后大小"), null=True, blank=True)
+    created_at = models.DateTimeField(_("创建时间"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("更新时间"), auto_now=True)
+    started_at = models.DateTimeField(_("开始时间"), null=True, blank=True)
+    finished_at = models.DateTimeField(_("完成时间"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("媒体处理任务")
+        verbose_name_plural = _("媒体处理任务")
+        db_table = 'articles_media_job'
+        indexes = [
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} id={self.object_id} {self.field}: {self.status}"
+
+
+class ProcessedMedia(models.Model):
+    """
+    按内容哈希记录的处理结果 (配合内容寻址存储 articles.storage)
+    同一内容再次上传时直接套用结果，不再重新压缩 / 转码
+    result: {"updates": 要更新的字段, "files": 结果文件}，任一文件已被清理时作废
+    """
+    kind = models.CharField(_("处理类型"), max_length=20)
+    content_hash = models.CharField(_("内容哈希"), max_length=64)
+    result = models.JSONField(_("处理结果"), default=dict)
+    original_size = models.PositiveBigIntegerField(_("原始大小"), null=True, blank=True)
+    processed_size = models.PositiveBigIntegerField(_("处理后大小"), null=True, blank=True)
+    created_at = models.DateTimeField(_("创建时间"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("媒体处理结果")
+        verbose_name_plural = _("媒体处理结果")
+        db_table = 'articles_processed_media'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'content_hash'], name='uniq_processed_media'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.content_hash[:12]}"
+
+
+class DocumentPreview(models.Model):
+    """
+    PDF 预览：页数 + 首页缩略图，每个 (文章, 字段) 一行
+    PDF 处理任务完成后由后续的 pdf_preview 任务生成，source 为生成时的文件名
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    field = models.CharField(_("字段"), max_length=50)
+    source = models.CharField(_("文档文件"), max_length=255)
+    page_count = models.PositiveIntegerField(_("页数"), default=0)
+    thumbnail = models.ImageField(
+        _("首页缩略图"),
+        upload_to='articles/previews/%Y/%m/',
+        blank=True, null=True
+    )
+    thumbnail_width = models.PositiveIntegerField(_("缩略图宽度"), null=True, blank=True)
+    thumbnail_height = models.PositiveIntegerField(_("缩略图高度"), null=True, blank=True)
+    created_at = models.DateTimeField(_("创建时间"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("更新时间"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("文档预览")
+        verbose_name_plural = _("文档预览")
+        db_table = 'articles_document_preview'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id', 'field'], name='uniq_document_preview',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} id={self.object_id} {self.field}: {self.page_count} 页"
+
+
+class DocumentPage(models.Model):
+    """PDF 分页文本 (按页存储，供搜索定位页码)"""
+    preview = models.ForeignKey(DocumentPreview, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.PositiveIntegerField(_("页码"))
+    text = models.TextField(_("文本"), blank=True, default="")
+
+    class Meta:
+        verbose_name = _("文档分页文本")
+        verbose_name_plural = _("文档分页文本")
+        db_table = 'articles_document_page'
+        ordering = ['preview', 'page_number']
+        constraints = [
+            models.UniqueConstraint(fields=['preview', 'page_number'], name='uniq_document_page'),
+        ]
+
+    def __str__(self):
+        return f"{self.preview_id} p.{self.page_number}"
+
+
 # ==================== 联系我们 (无媒体字段) ====================
 
 class Contact(TimeStampedModel):
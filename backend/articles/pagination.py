@@ -0,0 +1,167 @@
+# articles/pagination.py
+
+"""
+文章列表分页
+- StandardResultsSetPagination: 页码分页 (默认)
+- KeysetPagination:             游标 (keyset) 分页，不执行 COUNT(*)，深翻页也不需要 OFFSET 扫描
+- ArticlePagination:            默认页码分页，请求带 ?pagination=cursor 或 cursor 参数时切换为游标分页
+"""
+
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """标准分页配置"""
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    游标分页
+    排序键为 (排序字段, id)，对应 (-updated_at, is_published) / (is_published, -total_views) 索引，
+    id 作为相同排序值之间的稳定次序。排序字段取自 ?ordering= 的第一个字段，
+    必须在视图的 ordering_fields 中，否则使用视图的默认排序。
+    """
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = StandardResultsSetPagination.page_size_query_param
+    max_page_size = StandardResultsSetPagination.max_page_size
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+
+        field = self.ordering.lstrip('-')
+        cursor = self.decode_cursor(request)
+        reverse = cursor['r'] if cursor else False
+
+        # 向前翻页时反向查询，再把结果翻转回来
+        descending = self.ordering.startswith('-') != reverse
+        if descending:
+            queryset = queryset.order_by(f'-{field}', '-pk')
+        else:
+            queryset = queryset.order_by(field, 'pk')
+
+        if cursor:
+            try:
+                value = queryset.model._meta.get_field(field).to_python(cursor['v'])
+            except (FieldDoesNotExist, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            op = 'lt' if descending else 'gt'
+            bound = 'lte' if descending else 'gte'
+            # 冗余的 <= / >= 条件让 MySQL 能直接使用排序字段上的索引做范围扫描
+            queryset = queryset.filter(
+                Q(**{f'{field}__{bound}': value}),
+                Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': cursor['id']}),
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        has_next = cursor is not None if reverse else has_more
+        has_previous = has_more if reverse else cursor is not None
+        self.next_item = results[-1] if has_next and results else None
+        self.previous_item = results[0] if has_previous and results else None
+        self.field = field
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+            if size > 0:
+                return min(size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request, view):
+        allowed = getattr(view, 'ordering_fields', None) or []
+        param = request.query_params.get(self.ordering_query_param)
+        if param:
+            first = param.split(',')[0].strip()
+            if first.lstrip('-') in allowed:
+                return first
+
+        default = getattr(view, 'ordering', None) or ['-pk']
+        if isinstance(default, str):
+            return default
+        return default[0]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            cursor = {'v': cursor['v'], 'id': int(cursor['id']), 'r': bool(cursor['r']), 'o': cursor['o']}
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # 游标与当前排序不一致时无法定位
+        if cursor['o'] != self.ordering:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, item, reverse):
+        value = item._meta.get_field(self.field).value_to_string(item)
+        cursor = {'v': value, 'id': item.pk, 'r': int(reverse), 'o': self.ordering}
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_item is None:
+            return None
+        return self.encode_cursor(self.next_item, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_item is None:
+            return None
+        return self.encode_cursor(self.previous_item, reverse=True)
+
+
+class ArticlePagination(StandardResultsSetPagination):
+    """
+    文章列表分页
+    - 默认：页码分页，旧客户端不受影响
+    - ?pagination=cursor 或带 cursor 参数：游标分页 (返回 next / previous，不返回 count)
+    """
+    mode_query_param = 'pagination'
+    keyset = None
+
+    def use_keyset(self, request):
+        return (request.query_params.get(self.mode_query_param) == 'cursor'
+                or KeysetPagination.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,144 @@
+# articles/pdf.py
+
+"""
+PDF 处理工具 (在独立子进程中运行)
+
+后台任务 (articles.media.process_pdf) 先把 PDF 从存储分块复制到磁盘临时文件，再执行
+    python articles/pdf.py compress <输入文件> <输出文件>
+    qpdf --linearize <输入文件> <输出文件>    (安装了 qpdf 时)
+    python articles/pdf.py preview <输入文件> <输出目录> <缩略图宽度> [pdftoppm 路径]
+- 输入输出都是磁盘文件，worker 进程不读入整个文档
+- 子进程有超时和内存上限 (见 run_pdf_tool)，异常的大扫描件只会让子进程失败，不会拖垮 worker
+- 线性化 (Fast Web View) 把首页需要的对象放在文件开头，阅读器用 Range 请求取前几百 KB 即可显示首页
+本文件只依赖标准库、pypdf 和 Pillow，不加载 Django。
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+try:
+    import resource
+except ImportError: # Windows 没有 resource 模块，不限制内存
+    resource = None
+
+
+def compress(src, dst):
+    """无损压缩：压缩内容流 + 去除元数据"""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(src)
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    # 压缩写入端的页面 (内容流此时已复制到 writer)
+    for page in writer.pages:
+        page.compress_content_streams()
+
+    # 去除元数据以减小体积
+    writer.add_metadata({})
+
+    with open(dst, 'wb') as fp:
+        writer.write(fp)
+
+
+def preview(src, outdir, thumbnail_width, pdftoppm=''):
+    """
+    提取页数、每页文本和首页缩略图，写入 outdir：
+    - pages.jsonl: 每行 {"page": 页码, "text": 文本}，逐页写出，不在内存中累积
+    - thumbnail.jpg: 首页缩略图 (有 pdftoppm 时渲染首页，否则取首页中最大的嵌入图片，扫描件即整页图片)
+    - meta.json: {"page_count": 页数, "thumbnail": {"name", "width", "height"} 或 null}
+    """
+    from pypdf import PdfReader
+
+    width = int(thumbnail_width)
+    reader = PdfReader(src)
+    page_count = 0
+    with open(os.path.join(outdir, 'pages.jsonl'), 'w', encoding='utf-8') as fp:
+        for page_count, page in enumerate(reader.pages, 1):
+            try:
+                text = page.extract_text() or ''
+            except Exception: # 个别页面解析失败不影响其他页
+                text = ''
+            fp.write(json.dumps({'page': page_count, 'text': text.replace('\x00', '')}, ensure_ascii=False))
+            fp.write('\n')
+
+    thumbnail = None
+    if page_count:
+        path = os.path.join(outdir, 'thumbnail.jpg')
+        if (pdftoppm and _render_first_page(pdftoppm, src, path, width)) or _first_page_image(reader, path, width):
+            from PIL import Image
+
+            with Image.open(path) as img:
+                thumbnail = {'name': 'thumbnail.jpg', 'width': img.width, 'height': img.height}
+
+    with open(os.path.join(outdir, 'meta.json'), 'w') as fp:
+        json.dump({'page_count': page_count, 'thumbnail': thumbnail}, fp)
+
+
+def _render_first_page(pdftoppm, src, path, width):
+    """pdftoppm 渲染首页为 JPEG，失败返回 False"""
+    result = subprocess.run(
+        [pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-jpeg',
+         '-scale-to-x', str(width), '-scale-to-y', '-1', src, os.path.splitext(path)[0]],
+        capture_output=True,
+    )
+    return result.returncode == 0 and os.path.exists(path)
+
+
+def _first_page_image(reader, path, width):
+    """取首页中面积最大的嵌入图片缩放保存，没有图片返回 False"""
+    from PIL import Image
+
+    try:
+        images = list(reader.pages[0].images)
+        if not images:
+            return False
+        img = max((i.image for i in images), key=lambda i: i.width * i.height)
+    except Exception:
+        return False
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+    img.save(path, format='JPEG', quality=75, optimize=True)
+    return True
+
+
+COMMANDS = {
+    'compress': compress,
+    'preview': preview,
+}
+
+
+def _run(label, args, timeout, memory_limit, ok_codes=(0,)):
+    def limit_memory():
+        if resource is not None and memory_limit:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    result = subprocess.run(
+        args,
+        capture_output=True,
+        timeout=timeout,
+        preexec_fn=limit_memory if resource is not None else None,
+    )
+    if result.returncode not in ok_codes:
+        stderr = result.stderr.decode(errors='replace').strip().splitlines()
+        raise RuntimeError(f"{label} failed ({result.returncode}): " + "\n".join(stderr[-5:]))
+
+
+def run_pdf_tool(command, *args, timeout=300, memory_limit=None):
+    """
+    在子进程中执行 COMMANDS 中的命令
+    超时抛出 subprocess.TimeoutExpired；失败抛出 RuntimeError (带子进程 stderr 的最后几行)
+    """
+    _run(f'pdf {command}', [sys.executable, __file__, command, *args], timeout, memory_limit)
+
+
+def linearize(qpdf, src, dst, timeout=300, memory_limit=None):
+    """用 qpdf 线性化 (退出码 3 表示有警告，但输出文件可用)"""
+    _run('qpdf --linearize', [qpdf, '--linearize', src, dst], timeout, memory_limit, ok_codes=(0, 3))
+
+
+if __name__ == '__main__':
+    COMMANDS[sys.argv[1]](*sys.argv[2:])
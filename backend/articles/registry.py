@@ -0,0 +1,103 @@
+# articles/registry.py
+
+"""
+文章模型注册表 (进程内)
+
+公开的模型名 (news / paper / bookreview ...) -> 模型类、ContentType id、发布过滤条件。
+reactions 和 comments 按模型名查找文章类型时使用，不再每个请求查询 ContentType 表。
+
+- 模型映射在 ArticlesConfig.ready() 中建立 (不访问数据库)
+- ContentType id 第一次用到时才查询 (ready 时数据库可能还没迁移)，之后缓存在进程内
+- post_migrate 后清空 ContentType id 缓存 (测试库重建、flush 后 id 可能变化)
+"""
+
+import threading
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+
+from .models import CommentCountModel, PublishableModel, ReactionModel
+
+
+class ArticleType:
+    """一种文章类型"""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model._meta.model_name
+        self.published_filter = dict(model.PUBLISHED_FILTER)
+        self.has_reactions = issubclass(model, ReactionModel)
+        self.has_comment_count = issubclass(model, CommentCountModel)
+        self._content_type_id = None
+
+    @property
+    def content_type_id(self):
+        if self._content_type_id is None:
+            self._content_type_id = ContentType.objects.get_for_model(self.model).pk
+        return self._content_type_id
+
+    def published(self):
+        """前台可见的查询集"""
+        return self.model.objects.filter(**self.published_filter)
+
+    def exists(self, object_id, published=True):
+        """文章是否存在，只执行 SELECT 1 ... LIMIT 1，不加载整行"""
+        queryset = self.published() if published else self.model.objects.all()
+        return queryset.filter(pk=object_id).exists()
+
+    def __repr__(self):
+        return f'<ArticleType {self.name}>'
+
+
+class ModelRegistry:
+
+    def __init__(self):
+        self._types = {}
+        self._by_content_type = {}
+        self._lock = threading.Lock()
+
+    def build(self):
+        types = {
+            model._meta.model_name: ArticleType(model)
+            for model in apps.get_app_config('articles').get_models()
+            if issubclass(model, PublishableModel)
+        }
+        with self._lock:
+            self._types = types
+            self._by_content_type = {}
+
+    def clear_content_types(self):
+        """清空 ContentType id 缓存，下次使用时重新查询"""
+        with self._lock:
+            for article_type in self._types.values():
+                article_type._content_type_id = None
+            self._by_content_type = {}
+
+    def get(self, name):
+        """按模型名查找，未注册返回 None"""
+        if not self._types:
+            self.build()
+        return self._types.get(str(name).lower()) if name else None
+
+    def get_for_content_type(self, content_type_id):
+        """按 ContentType id 反查，非文章类型返回 None"""
+        if not self._by_content_type:
+            if not self._types:
+                self.build()
+            # 一条查询取出所有文章类型的 ContentType
+            types = {t.model: t for t in self._types.values()}
+            mapping = {}
+            for model, ct in ContentType.objects.get_for_models(*types).items():
+                types[model]._content_type_id = ct.pk
+                mapping[ct.pk] = types[model]
+            with self._lock:
+                self._by_content_type = mapping
+        return self._by_content_type.get(content_type_id)
+
+    def all(self):
+        if not self._types:
+            self.build()
+        return list(self._types.values())
+
+
+registry = ModelRegistry()
@@ -0,0 +1,132 @@
+# articles/rollups.py
+
+"""
+每日浏览量汇总
+
+- rollover_today_views: 把各文章表的 today_views 快照写入 DailyViewStat 并清零
+  (每晚由 `python manage.py rollover_views` 执行)
+- top_viewed: 基于 DailyViewStat 查询最近 N 天的热门文章，不扫描文章表
+"""
+
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, Value, When
+from django.utils import timezone
+
+from . import counters
+from .models import DailyViewStat, ViewCountModel
+
+# 每批处理的文章数 (一条 SELECT + 一条加锁的 SELECT + 累加 / 插入汇总记录 + 一条 UPDATE)
+ROLLOVER_CHUNK_SIZE = 1000
+
+
+def view_count_models():
+    """所有带阅读量字段的文章模型"""
+    return [
+        model for model in apps.get_app_config('articles').get_models()
+        if issubclass(model, ViewCountModel)
+    ]
+
+
+def rollover_today_views(day=None, chunk_size=ROLLOVER_CHUNK_SIZE):
+    """
+    把 today_views 快照写入 day (默认昨天) 的 DailyViewStat，并从 today_views 中扣除
+    - 按主键分块，每块在一个事务内完成
+    - 扣除的是快照值而不是直接清零，快照之后新产生的阅读量会保留到下一天
+    - 同一天重复执行时累加，不会覆盖已写入的数据
+    返回 {模型名: 汇总的阅读量}
+    """
+    if day is None:
+        day = timezone.localdate() - timedelta(days=1)
+
+    # 缓冲模式下先把缓存中的增量写回，保证快照完整
+    if counters.is_buffered():
+        counters.flush_view_counts()
+
+    summary = {}
+    for model in view_count_models():
+        ct = ContentType.objects.get_for_model(model)
+        total = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                model.objects.filter(pk__gt=last_pk, today_views__gt=0)
+                .order_by('pk')
+                .values_list('pk', 'today_views')[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            total += _rollover_chunk(model, ct, day, dict(rows))
+        summary[model._meta.model_name] = total
+    return summary
+
+
+def _rollover_chunk(model, ct, day, snapshot):
+    """
+    汇总一块文章：锁住文章行后重新读取快照，已有的记录在数据库中累加 (views = views + 增量)，
+    没有的再插入；并发执行的 rollover 在行锁上排队，不会重复汇总或覆盖彼此的累加结果
+    """
+    with transaction.atomic():
+        snapshot = dict(
+            model.objects.select_for_update()
+            .filter(pk__in=list(snapshot), today_views__gt=0)
+            .values_list('pk', 'today_views')
+        )
+        if not snapshot:
+            return 0
+        pks = list(snapshot)
+
+        stats = DailyViewStat.objects.filter(content_type=ct, date=day, object_id__in=pks)
+        existing = set(stats.values_list('object_id', flat=True))
+        if existing:
+            stats.update(views=F('views') + Case(
+                *[When(object_id=pk, then=Value(snapshot[pk])) for pk in existing],
+                default=Value(0),
+                output_field=PositiveIntegerField(),
+            ))
+        DailyViewStat.objects.bulk_create([
+            DailyViewStat(content_type=ct, object_id=pk, date=day, views=views)
+            for pk, views in snapshot.items() if pk not in existing
+        ])
+
+        model.objects.filter(pk__in=pks).update(
+            today_views=F('today_views') - Case(
+                *[When(pk=pk, then=Value(views)) for pk, views in snapshot.items()],
+                default=Value(0),
+                output_field=PositiveIntegerField(),
+            )
+        )
+    return sum(snapshot.values())
+
+
+def prune_daily_views(keep_days):
+    """删除 keep_days 天之前的汇总记录"""
+    cutoff = timezone.localdate() - timedelta(days=keep_days)
+    deleted, _ = DailyViewStat.objects.filter(date__lt=cutoff).delete()
+    return deleted
+
+
+def top_viewed(days=7, limit=10, model=None):
+    """
+    最近 days 天浏览量最高的文章
+    返回 [(模型类, 文章ID, 浏览量), ...]，只走 DailyViewStat 的 (date, content_type) 索引
+    """
+    start = timezone.localdate() - timedelta(days=days)
+    qs = DailyViewStat.objects.filter(date__gte=start)
+    if model is not None:
+        qs = qs.filter(content_type=ContentType.objects.get_for_model(model))
+
+    rows = (
+        qs.values('content_type', 'object_id')
+        .annotate(total=Sum('views'))
+        .order_by('-total')[:limit]
+    )
+    return [
+        (ContentType.objects.get_for_id(row['content_type']).model_class(),
+         row['object_id'], row['total'])
+        for row in rows
+    ]
@@ -0,0 +1,274 @@
+# articles/search.py
+
+"""
+文章搜索后端
+- FullTextSearchBackend: MySQL FULLTEXT (ngram 分词，支持中文)，按相关度排序
+- LikeSearchBackend:     icontains 回退实现 (SQLite 测试环境 / 未建全文索引的字段组合)
+
+两个后端都会给查询集注解 search_relevance，数值越大越相关。
+全文索引由迁移 0003_fulltext_indexes 创建，字段组合与各视图集的 search_fields 一致，
+MATCH() 的列必须与某个 FULLTEXT 索引完全一致，所以只有登记在 FULLTEXT_INDEXES 中的组合才走全文检索。
+
+带 PDF 的文章 (论文 / 古籍 / 书库) 还会搜索后台提取的分页文本 (DocumentPage，索引见迁移 0009)：
+命中正文的文章即使标题不匹配也会返回，matched_pages() 给出命中的页码，供阅读器直接跳转。
+"""
+
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, CharField, F, FloatField, Func, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from rest_framework import filters
+
+from .models import DocumentPage
+
+# {模型 label: 全文索引字段}，需与迁移 0003_fulltext_indexes 保持一致
+FULLTEXT_INDEXES = {
+    'articles.news': ('title', 'content', 'author'),
+    'articles.bookinfo': ('title', 'author', 'isbn', 'publisher'),
+    'articles.bookreview': ('title', 'content'),
+    'articles.opinion': ('title', 'content', 'author'),
+    'articles.literature': ('title', 'content'),
+    'articles.qa': ('title', 'content'),
+    'articles.translation': ('title', 'content', 'original_title', 'original_author'),
+    'articles.history': ('title', 'content'),
+    'articles.paper': ('title',),
+    'articles.classicbook': ('title',),
+    'articles.library': ('title', 'author_intro', 'content_intro', 'isbn'),
+    'articles.scripture': ('title',),
+    'articles.scripturechapter': ('title', 'content'),
+    'articles.documentpage': ('text',),
+}
+
+# 与 MySQL 的 ngram_token_size 一致，短于该长度的词无法命中全文索引
+NGRAM_TOKEN_SIZE = 2
+
+# 只有 PDF 正文命中时的相关度加成 (与标题等字段的相关度相加)
+DOCUMENT_MATCH_RELEVANCE = 1.0
+
+# 每篇文章最多返回的命中页码数
+MATCHED_PAGES_LIMIT = 10
+
+# BOOLEAN MODE 中有特殊含义的字符
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+
+class MatchAgainst(Func):
+    """MATCH (col, ...) AGAINST (%s IN BOOLEAN MODE)"""
+    output_field = FloatField()
+
+    def __init__(self, fields, query, **extra):
+        super().__init__(*[F(field) for field in fields], Value(query), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        *columns, query = self.get_source_expressions()
+        column_sql, params = [], []
+        for column in columns:
+            sql, column_params = compiler.compile(column)
+            column_sql.append(sql)
+            params.extend(column_params)
+        query_sql, query_params = compiler.compile(query)
+        sql = f"MATCH ({', '.join(column_sql)}) AGAINST ({query_sql} IN BOOLEAN MODE)"
+        return sql, params + list(query_params)
+
+
+def split_terms(query):
+    """拆分搜索词，去掉 BOOLEAN MODE 运算符"""
+    return [t for t in (_BOOLEAN_OPERATORS.sub(' ', term).strip() for term in query.split()) if t]
+
+
+def document_pages(model, document_field):
+    """某个模型某个文档字段的全部分页文本"""
+    return DocumentPage.objects.filter(
+        preview__content_type=ContentType.objects.get_for_model(model),
+        preview__field=document_field,
+    )
+
+
+def with_document_matches(queryset, condition, relevance, pages):
+    """字段命中或 PDF 正文命中 (pages 为命中的分页文本)，正文命中时加上 DOCUMENT_MATCH_RELEVANCE"""
+    object_ids = pages.values('preview__object_id')
+    return queryset.filter(condition | Q(pk__in=object_ids)).annotate(
+        search_relevance=relevance + Case(
+            When(pk__in=object_ids, then=Value(DOCUMENT_MATCH_RELEVANCE)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+class LikeSearchBackend:
+    """icontains 回退实现：每个词至少命中一个字段，命中标题的结果排在前面"""
+
+    def search(self, queryset, fields, query, document_field=None):
+        terms = split_terms(query) or [query]
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for field in fields:
+                term_condition |= Q(**{f'{field}__icontains': term})
+            condition &= term_condition
+
+        relevance = Value(1.0)
+        if 'title' in fields:
+            relevance = Case(
+                When(title__icontains=terms[0], then=Value(2.0)),
+                default=Value(1.0),
+                output_field=FloatField(),
+            )
+
+        if document_field:
+            pages = self.search_pages(queryset.model, document_field, query)
+            # 只有正文命中时字段相关度按 0 计
+            relevance = Case(When(condition, then=relevance), default=Value(0.0), output_field=FloatField())
+            return with_document_matches(queryset, condition, relevance, pages)
+        return queryset.filter(condition).annotate(search_relevance=relevance)
+
+    def search_pages(self, model, document_field, query):
+        """命中搜索词的分页文本 (每个词都要出现在同一页)"""
+        pages = document_pages(model, document_field)
+        for term in split_terms(query) or [query]:
+            pages = pages.filter(text__icontains=term)
+        return pages
+
+
+class FullTextSearchBackend:
+    """MySQL FULLTEXT (ngram) 检索"""
+
+    def __init__(self):
+        self.fallback = LikeSearchBackend()
+
+    def supports(self, model, fields, terms):
+        return (
+            terms
+            and tuple(fields) == FULLTEXT_INDEXES.get(model._meta.label_lower)
+            and all(len(term) >= NGRAM_TOKEN_SIZE for term in terms)
+        )
+
+    def boolean_query(self, terms):
+        # 每个词都必须出现，词内按短语匹配 (ngram 连续命中)
+        return ' '.join(f'+"{term}"' for term in terms)
+
+    def search(self, queryset, fields, query, document_field=None):
+        terms = split_terms(query)
+        if not self.supports(queryset.model, fields, terms):
+            return self.fallback.search(queryset, fields, query, document_field)
+
+        relevance = MatchAgainst(fields, self.boolean_query(terms))
+        if document_field:
+            pages = self.search_pages(queryset.model, document_field, query)
+            queryset = queryset.annotate(search_match=relevance)
+            return with_document_matches(queryset, Q(search_match__gt=0), F('search_match'), pages)
+        return queryset.annotate(search_relevance=relevance).filter(search_relevance__gt=0)
+
+    def search_pages(self, model, document_field, query):
+        terms = split_terms(query)
+        if not self.supports(DocumentPage, ('text',), terms):
+            return self.fallback.search_pages(model, document_field, query)
+        return (
+            document_pages(model, document_field)
+            .annotate(page_relevance=MatchAgainst(['text'], self.boolean_query(terms)))
+            .filter(page_relevance__gt=0)
+        )
+
+
+def matched_pages(model, object_ids, query, document_field='document', limit=MATCHED_PAGES_LIMIT):
+    """
+    每篇文章 PDF 正文中命中搜索词的页码 (按页码升序，最多 limit 个)
+    返回 {文章 id: [页码, ...]}，一条查询 (ROW_NUMBER 窗口函数截取每篇的前 limit 个)
+    """
+    if not object_ids:
+        return {}
+    pages = (
+        get_search_backend().search_pages(model, document_field, query)
+        .filter(preview__object_id__in=object_ids)
+        .annotate(page_rank=Window(
+            RowNumber(), partition_by=F('preview__object_id'), order_by=F('page_number').asc(),
+        ))
+        .filter(page_rank__lte=limit)
+        .order_by('preview__object_id', 'page_number')
+        .values_list('preview__object_id', 'page_number')
+    )
+    result = {}
+    for object_id, page_number in pages:
+        result.setdefault(object_id, []).append(page_number)
+    return result
+
+
+# 时间加权：(距今天数, 加成系数)，综合得分 = 相关度 * (1 + 加成)
+RECENCY_BOOSTS = [(7, 1.0), (30, 0.5), (365, 0.2)]
+
+
+def recency_boost(field='updated_at'):
+    """按更新时间分段的加成系数，用 CASE WHEN 在数据库中计算"""
+    now = timezone.now()
+    return Case(
+        *[When(**{f'{field}__gte': now - timedelta(days=days)}, then=Value(boost))
+          for days, boost in RECENCY_BOOSTS],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def unified_search(sources, query):
+    """
+    多模型统一搜索，所有模型合并为一条 UNION ALL 查询，按 相关度 x 时间加成 排序
+    sources: [(查询集, 类型名, 搜索字段, PDF 字段或 None), ...]，查询集应已过滤发布状态
+    返回 values 查询集，每行包含 type / id / title / updated_at / score，可直接分页
+    """
+    backend = get_search_backend()
+    parts = []
+    for queryset, type_name, fields, document_field in sources:
+        qs = (
+            backend.search(queryset, fields, query, document_field)
+            .annotate(
+                type=Value(type_name, output_field=CharField()),
+                score=F('search_relevance') * (Value(1.0) + recency_boost()),
+            )
+            .order_by()
+            .values('type', 'id', 'title', 'updated_at', 'score')
+        )
+        parts.append(qs)
+
+    first, *rest = parts
+    return first.union(*rest, all=True).order_by('-score', '-updated_at')
+
+
+def get_search_backend():
+    """MySQL 且开启 ARTICLE_FULLTEXT_SEARCH 时使用全文检索，否则使用 LIKE 回退"""
+    if connection.vendor == 'mysql' and getattr(settings, 'ARTICLE_FULLTEXT_SEARCH', True):
+        return FullTextSearchBackend()
+    return LikeSearchBackend()
+
+
+class ArticleSearchFilter(filters.SearchFilter):
+    """
+    使用搜索后端的 SearchFilter
+    search_fields 带前缀 (^ = @ $) 或跨表查询时仍交给 DRF 默认实现
+    视图的 search_document_field 不为空时同时搜索该 PDF 字段的分页文本
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = self.get_search_fields(view, request)
+        terms = self.get_search_terms(request)
+        if not fields or not terms:
+            return queryset
+        if any(field[0] in self.lookup_prefixes or '__' in field for field in fields):
+            return super().filter_queryset(request, queryset, view)
+        document_field = getattr(view, 'search_document_field', None)
+        return get_search_backend().search(queryset, fields, ' '.join(terms), document_field)
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """搜索时如果没有指定 ?ordering=，按相关度排序"""
+
+    def filter_queryset(self, request, queryset, view):
+        if (not request.query_params.get(self.ordering_param)
+                and 'search_relevance' in queryset.query.annotations):
+            default = self.get_default_ordering(view) or []
+            return queryset.order_by('-search_relevance', *default)
+        return super().filter_queryset(request, queryset, view)
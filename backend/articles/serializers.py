@@ -3,7 +3,10 @@
 为所有模型提供序列化支持
 """
 
+from django.template.defaultfilters import truncatechars
+from django.utils.html import strip_tags
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
 from .models import (
     News, BookInfo, BookReview, BookReviewCategory,
@@ -31,24 +34,113 @@ class BaseArticleSerializer(serializers.ModelSerializer):
 
 
 class BaseArticleListSerializer(serializers.ModelSerializer):
-    """列表视图的简化序列化器"""
+    """
+    列表视图的简化序列化器
+    summary 为去除 HTML 后的摘要，取自视图集注解的 summary_source (content 的前若干字符)，
+    列表查询不再加载完整的 content
+    """
+    summary = serializers.SerializerMethodField()
+
+    # 生成摘要所用的字段及截取长度
+    summary_source_field = 'content'
+    summary_source_length = 400
+    summary_length = 120
     
     class Meta:
         fields = [
-            'id', 'title', 'author', 'total_views',
-            'likes', 'updated_at'
+            'id', 'title', 'author', 'summary', 'total_views',
+            'likes', 'comment_count', 'created_at', 'updated_at'
         ]
 
+    def get_summary(self, obj):
+        text = getattr(obj, 'summary_source', None) or ''
+        return truncatechars(strip_tags(text).strip(), self.summary_length)
+
+
+class ResponsiveImageField(serializers.Field):
+    """
+    响应式图片 (只读)，数据来自后台生成的 <字段>_variants，前端直接用于 <picture> / srcset：
+    {"src": 最大 JPEG, "width": ..., "height": ...,
+     "sources": [{"type": "image/webp", "srcset": "... 320w, ... 640w"}, {"type": "image/jpeg", ...}]}
+    尚未处理完成时 sources 为空，src 为原图；没有图片时为 None
+    """
+    formats = (('webp', 'image/webp'), ('jpeg', 'image/jpeg'))
+
+    def __init__(self, image_field='image', **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.image_field = image_field
+
+    def to_representation(self, obj):
+        image = getattr(obj, self.image_field)
+        if not image:
+            return None
+
+        request = self.context.get('request')
+        absolute = request.build_absolute_uri if request else (lambda url: url)
+        variants = getattr(obj, f'{self.image_field}_variants', None) or []
+        if not variants:
+            return {'src': absolute(image.url), 'width': None, 'height': None, 'sources': []}
+
+        largest = variants[-1]
+        sources = []
+        for fmt, mime in self.formats:
+            srcset = ', '.join(
+                f"{absolute(image.storage.url(v[fmt]))} {v['w']}w" for v in variants if fmt in v
+            )
+            if srcset:
+                sources.append({'type': mime, 'srcset': srcset})
+        return {
+            'src': absolute(image.url),
+            'width': largest['w'],
+            'height': largest['h'],
+            'sources': sources,
+        }
+
+
+class DocumentPreviewField(serializers.Field):
+    """
+    PDF 预览 (只读)：{"page_count": ..., "thumbnail": 首页缩略图, "width": ..., "height": ...}
+    数据来自后台提取的 DocumentPreview，视图集已 prefetch document_previews；尚未提取时为 None
+    """
+
+    def __init__(self, document_field='document', **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.document_field = document_field
+
+    def to_representation(self, obj):
+        preview = next(
+            (p for p in obj.document_previews.all() if p.field == self.document_field), None
+        )
+        if preview is None:
+            return None
+
+        thumbnail = None
+        if preview.thumbnail:
+            request = self.context.get('request')
+            url = preview.thumbnail.url
+            thumbnail = request.build_absolute_uri(url) if request else url
+        return {
+            'page_count': preview.page_count,
+            'thumbnail': thumbnail,
+            'width': preview.thumbnail_width,
+            'height': preview.thumbnail_height,
+        }
+
 
 # ==================== 通讯 ====================
 
 class NewsSerializer(BaseArticleSerializer):
     """通讯详情序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleSerializer.Meta):
         model = News
-        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url']
+        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -61,10 +153,11 @@ class NewsSerializer(BaseArticleSerializer):
 class NewsListSerializer(BaseArticleListSerializer):
     """通讯列表序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleListSerializer.Meta):
         model = News
-        fields = BaseArticleListSerializer.Meta.fields + ['image_url']
+        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -79,13 +172,14 @@ class NewsListSerializer(BaseArticleListSerializer):
 class BookInfoSerializer(BaseArticleSerializer):
     """书讯详情序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleSerializer.Meta):
         model = BookInfo
         fields = BaseArticleSerializer.Meta.fields + [
             'author_intro', 'catalog', 'preface', 'isbn',
             'publisher', 'publish_date', 'price', 'pages',
-            'binding', 'image', 'image_url'
+            'binding', 'image', 'image_url', 'image_srcset'
         ]
     
     def get_image_url(self, obj):
@@ -99,10 +193,11 @@ class BookInfoSerializer(BaseArticleSerializer):
 class BookInfoListSerializer(BaseArticleListSerializer):
     """书讯列表序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleListSerializer.Meta):
         model = BookInfo
-        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'publisher']
+        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'image_srcset', 'publisher']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -132,11 +227,12 @@ class BookReviewSerializer(BaseArticleSerializer):
     """书评详情序列化器"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleSerializer.Meta):
         model = BookReview
         fields = BaseArticleSerializer.Meta.fields + [
-            'book_publish_date', 'image', 'image_url',
+            'book_publish_date', 'image', 'image_url', 'image_srcset',
             'category', 'category_name'
         ]
     
@@ -152,10 +248,11 @@ class BookReviewListSerializer(BaseArticleListSerializer):
     """书评列表序列化器"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleListSerializer.Meta):
         model = BookReview
-        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'category_name']
+        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'image_srcset', 'category_name']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -170,10 +267,11 @@ class BookReviewListSerializer(BaseArticleListSerializer):
 class OpinionSerializer(BaseArticleSerializer):
     """观点序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleSerializer.Meta):
         model = Opinion
-        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url']
+        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -186,10 +284,11 @@ class OpinionSerializer(BaseArticleSerializer):
 class OpinionListSerializer(BaseArticleListSerializer):
     """观点列表序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleListSerializer.Meta):
         model = Opinion
-        fields = BaseArticleListSerializer.Meta.fields + ['image_url']
+        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -204,10 +303,11 @@ class OpinionListSerializer(BaseArticleListSerializer):
 class LiteratureSerializer(BaseArticleSerializer):
     """文艺序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleSerializer.Meta):
         model = Literature
-        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url']
+        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -220,10 +320,11 @@ class LiteratureSerializer(BaseArticleSerializer):
 class LiteratureListSerializer(BaseArticleListSerializer):
     """文艺列表序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleListSerializer.Meta):
         model = Literature
-        fields = BaseArticleListSerializer.Meta.fields + ['image_url']
+        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -257,12 +358,13 @@ class QAListSerializer(BaseArticleListSerializer):
 class TranslationSerializer(BaseArticleSerializer):
     """译林序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleSerializer.Meta):
         model = Translation
         fields = BaseArticleSerializer.Meta.fields + [
             'original_title', 'original_author', 'original_publish_date',
-            'image', 'image_url'
+            'image', 'image_url', 'image_srcset'
         ]
     
     def get_image_url(self, obj):
@@ -277,10 +379,11 @@ class TranslationListSerializer(BaseArticleListSerializer):
     """译林列表序列化器"""
     original_title = serializers.CharField()
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleListSerializer.Meta):
         model = Translation
-        fields = BaseArticleListSerializer.Meta.fields + ['original_title', 'image_url']
+        fields = BaseArticleListSerializer.Meta.fields + ['original_title', 'image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -295,10 +398,11 @@ class TranslationListSerializer(BaseArticleListSerializer):
 class HistorySerializer(BaseArticleSerializer):
     """文史序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleSerializer.Meta):
         model = History
-        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url']
+        fields = BaseArticleSerializer.Meta.fields + ['image', 'image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -311,10 +415,11 @@ class HistorySerializer(BaseArticleSerializer):
 class HistoryListSerializer(BaseArticleListSerializer):
     """文史列表序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta(BaseArticleListSerializer.Meta):
         model = History
-        fields = BaseArticleListSerializer.Meta.fields + ['image_url']
+        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'image_srcset']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -329,13 +434,15 @@ class HistoryListSerializer(BaseArticleListSerializer):
 class PaperSerializer(serializers.ModelSerializer):
     """论文序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     document_url = serializers.SerializerMethodField()
+    preview = DocumentPreviewField()
     
     class Meta:
         model = Paper
         fields = [
-            'id', 'title', 'author', 'source', 'image', 'image_url',
-            'document', 'document_url', 'is_published',
+            'id', 'title', 'author', 'source', 'image', 'image_url', 'image_srcset',
+            'document', 'document_url', 'preview', 'is_published',
             'total_views', 'today_views', 'likes', 'dislikes',
             'created_at', 'updated_at'
         ]
@@ -355,17 +462,20 @@ class PaperSerializer(serializers.ModelSerializer):
         if obj.document:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.document.url)
+                # 经由支持 Range 的文档接口 (见 articles.documents)，不直接返回媒体文件地址
+                return reverse(f'articles:{obj._meta.model_name}-document', args=[obj.pk], request=request)
         return None
 
 
 class PaperListSerializer(serializers.ModelSerializer):
     """论文列表序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
+    preview = DocumentPreviewField()
     
     class Meta:
         model = Paper
-        fields = ['id', 'title', 'author', 'image_url', 'total_views', 'likes', 'updated_at']
+        fields = ['id', 'title', 'author', 'image_url', 'image_srcset', 'preview', 'total_views', 'likes', 'comment_count', 'created_at', 'updated_at']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -380,11 +490,12 @@ class PaperListSerializer(serializers.ModelSerializer):
 class ClassicBookSerializer(serializers.ModelSerializer):
     """古籍序列化器"""
     document_url = serializers.SerializerMethodField()
+    preview = DocumentPreviewField()
     
     class Meta:
         model = ClassicBook
         fields = [
-            'id', 'title', 'author', 'source', 'document', 'document_url',
+            'id', 'title', 'author', 'source', 'document', 'document_url', 'preview',
             'is_published', 'total_views', 'today_views', 'likes', 'dislikes',
             'created_at', 'updated_at'
         ]
@@ -397,16 +508,18 @@ class ClassicBookSerializer(serializers.ModelSerializer):
         if obj.document:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.document.url)
+                # 经由支持 Range 的文档接口 (见 articles.documents)，不直接返回媒体文件地址
+                return reverse(f'articles:{obj._meta.model_name}-document', args=[obj.pk], request=request)
         return None
 
 
 class ClassicBookListSerializer(serializers.ModelSerializer):
     """古籍列表序列化器"""
+    preview = DocumentPreviewField()
     
     class Meta:
         model = ClassicBook
-        fields = ['id', 'title', 'author', 'total_views', 'likes', 'updated_at']
+        fields = ['id', 'title', 'author', 'preview', 'total_views', 'likes', 'comment_count', 'created_at', 'updated_at']
 
 
 # ==================== 书库 ====================
@@ -414,14 +527,16 @@ class ClassicBookListSerializer(serializers.ModelSerializer):
 class LibrarySerializer(serializers.ModelSerializer):
     """书库序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     document_url = serializers.SerializerMethodField()
+    preview = DocumentPreviewField()
     
     class Meta:
         model = Library
         fields = [
             'id', 'title', 'author', 'author_intro', 'content_intro',
-            'publish_date', 'isbn', 'image', 'image_url',
-            'document', 'document_url', 'is_published',
+            'publish_date', 'isbn', 'image', 'image_url', 'image_srcset',
+            'document', 'document_url', 'preview', 'is_published',
             'total_views', 'today_views', 'likes', 'dislikes',
             'created_at', 'updated_at'
         ]
@@ -441,17 +556,21 @@ class LibrarySerializer(serializers.ModelSerializer):
         if obj.document:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.document.url)
+                # 经由支持 Range 的文档接口 (见 articles.documents)，不直接返回媒体文件地址
+                return reverse(f'articles:{obj._meta.model_name}-document', args=[obj.pk], request=request)
         return None
 
 
-class LibraryListSerializer(serializers.ModelSerializer):
+class LibraryListSerializer(BaseArticleListSerializer):
     """书库列表序列化器"""
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
+    preview = DocumentPreviewField()
+    summary_source_field = 'content_intro'
     
-    class Meta:
+    class Meta(BaseArticleListSerializer.Meta):
         model = Library
-        fields = ['id', 'title', 'author', 'image_url', 'total_views', 'likes', 'updated_at']
+        fields = BaseArticleListSerializer.Meta.fields + ['image_url', 'image_srcset', 'preview']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -476,11 +595,12 @@ class ScriptureSerializer(serializers.ModelSerializer):
     chapters = ScriptureChapterSerializer(many=True, read_only=True)
     chapter_count = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta:
         model = Scripture
         fields = [
-            'id', 'title', 'image', 'image_url',
+            'id', 'title', 'image', 'image_url', 'image_srcset',
             'is_published', 'chapter_count', 'chapters',
             'created_at', 'updated_at'
         ]
@@ -500,12 +620,16 @@ class ScriptureListSerializer(serializers.ModelSerializer):
     """经训列表序列化器"""
     chapter_count = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_srcset = ResponsiveImageField()
     
     class Meta:
         model = Scripture
-        fields = ['id', 'title', 'image_url', 'chapter_count', 'updated_at']
+        fields = ['id', 'title', 'image_url', 'image_srcset', 'chapter_count', 'comment_count', 'updated_at']
     
     def get_chapter_count(self, obj):
+        # 列表视图会注解 published_chapter_count，避免每条记录一次 COUNT 查询
+        if hasattr(obj, 'published_chapter_count'):
+            return obj.published_chapter_count
         return obj.chapters.filter(is_published=True).count()
     
     def get_image_url(self, obj):
@@ -0,0 +1,30 @@
+# articles/signals.py
+
+"""
+文章变更时递增响应缓存版本号 (见 articles.caching)
+按模型逐个注册 (connect_signals)，不注册全局接收器，以免其他模型的批量删除失去 fast delete
+"""
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .caching import COUNTER_FIELDS, bump_model_version
+
+
+def bump_version_on_save(sender, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    # 只更新计数器时不失效缓存
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    bump_model_version(sender)
+
+
+def bump_version_on_delete(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def connect_signals():
+    for model in apps.get_app_config('articles').get_models():
+        post_save.connect(bump_version_on_save, sender=model, dispatch_uid=f'bump_version_save_{model._meta.label_lower}')
+        post_delete.connect(bump_version_on_delete, sender=model, dispatch_uid=f'bump_version_delete_{model._meta.label_lower}')
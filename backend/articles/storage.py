@@ -0,0 +1,138 @@
+# articles/storage.py
+
+"""
+内容寻址存储 (按内容哈希去重)
+
+上传的文件一边写入一边计算 SHA-256，保存为 cas/<前两位>/<三四位>/<哈希><扩展名>，
+相同内容只存一份：同一张封面 / 同一份 PDF 挂到书讯、书评、书库多篇文章时共用一个文件。
+- 返回的文件名就是哈希，ImageField / FileField 的用法 (url / open / size ...) 不变
+- 文件可能被多条记录共用，delete() 不删除文件；
+  没有任何记录引用的文件由 `python manage.py purge_media` 定期清理
+- 后台处理按哈希记录处理结果 (见 ProcessedMedia)，相同内容不会重复压缩
+- 启用前上传的文件仍按原路径访问，只是不参与去重
+
+启用方式 (settings.STORAGES):
+    "default": {"BACKEND": "articles.storage.ContentAddressedStorage"}
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CAS_PREFIX = 'cas'
+
+_CAS_NAME_RE = re.compile(rf'^{CAS_PREFIX}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.\w+)?$')
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """按 SHA-256 存放文件的 FileSystemStorage"""
+
+    def content_hash(self, name):
+        """内容寻址文件名中的哈希；启用前的旧文件返回 None"""
+        match = _CAS_NAME_RE.match(name.replace('\\', '/'))
+        return match.group(1) if match else None
+
+    def hashed_name(self, digest, name):
+        ext = os.path.splitext(name)[1].lower()
+        return f'{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def get_available_name(self, name, max_length=None):
+        # 文件名在 _save 中由内容决定，同名即同内容，不需要另找可用的文件名
+        return name
+
+    def _save(self, name, content):
+        os.makedirs(self.location, exist_ok=True)
+        hasher = hashlib.sha256()
+
+        if hasattr(content, 'temporary_file_path'):
+            # Django 已把大文件落盘 (TemporaryUploadedFile)：读一遍算哈希，再直接移动，不复制
+            path = content.temporary_file_path()
+            with open(path, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+            move = True
+        else:
+            # 边写临时文件边计算哈希，内存中只有一个块
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            fd, path = tempfile.mkstemp(dir=self.location, prefix='.upload-')
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    hasher.update(chunk)
+                    out.write(chunk)
+            move = False
+
+        final_name = self.hashed_name(hasher.hexdigest(), name)
+        final_path = self.path(final_name)
+        if os.path.exists(final_path):
+            # 已有相同内容，丢弃本次写入；刷新修改时间，
+            # 避免 purge_media 把刚被新记录引用、但上传时间较早的文件当作过期文件删除
+            try:
+                os.utime(final_path)
+            except FileNotFoundError:
+                # 恰好被清理掉了，按新文件保存
+                pass
+            else:
+                if not move:
+                    os.remove(path)
+                return final_name
+
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        if move:
+            file_move_safe(path, final_path, allow_overwrite=True)
+        else:
+            # 同目录内 rename 是原子的，并发写入相同内容时最后一次覆盖，内容不变
+            os.replace(path, final_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(final_path, self.file_permissions_mode)
+        return final_name
+
+    def delete(self, name):
+        """文件可能被多条记录共用，不在这里删除 (见 purge_unreferenced)"""
+        if not self.content_hash(name):
+            super().delete(name)
+
+    def purge_unreferenced(self, referenced, older_than, dry_run=False, recheck=None):
+        """
+        删除 cas/ 下不在 referenced 中、且修改时间早于 older_than (时间戳) 的文件
+        时间阈值避免删除刚上传、还没有写入数据库的文件；
+        recheck(names) 返回其中当前已被引用的文件名，删除前再查一次，
+        排除扫描 referenced 之后才保存的记录引用的文件
+        返回被删除 (或将被删除) 的文件名列表
+        """
+        candidates = {}
+        root = self.path(CAS_PREFIX)
+        for dirpath, _dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.location).replace(os.sep, '/')
+                if name in referenced or not self.content_hash(name):
+                    continue
+                if os.path.getmtime(path) >= older_than:
+                    continue
+                candidates[name] = path
+
+        if recheck is not None and candidates:
+            for name in recheck(list(candidates)):
+                candidates.pop(name, None)
+
+        removed = []
+        for name, path in sorted(candidates.items()):
+            try:
+                # 扫描之后又被重新上传 (_save 会刷新修改时间) 的文件保留
+                if os.path.getmtime(path) >= older_than:
+                    continue
+                if not dry_run:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed.append(name)
+        return removed
@@ -23,5 +23,6 @@ router.register(r'contact', views.ContactViewSet)
 
 urlpatterns = [
     path('search/', views.GlobalSearchView.as_view(), name='global-search'),
+    path('trending/', views.TrendingView.as_view(), name='trending'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,89 +1,57 @@
 # articles/utils.py
 
-import sys
 from io import BytesIO
-from PIL import Image, ImageOps
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from pypdf import PdfReader, PdfWriter
+from PIL import Image, ImageOps, features
 
-def compress_image(image_field, max_width=1200, quality=75):
-    """
-    图片压缩：调整尺寸 + 转换为 JPEG + 降低质量
-    """
-    # 1. 空值或非上传对象检查
-    if not image_field or not hasattr(image_field, 'file'):
-        return image_field
-        
-    # 避免对已经存在的 ImageFieldFile (非新上传的) 重复压缩
-    # InMemoryUploadedFile 是新上传文件的特征
-    if not isinstance(image_field.file, InMemoryUploadedFile):
-        return image_field
-
-    try:
-        img = Image.open(image_field)
-        
-        # 自动旋转（处理手机拍摄的照片方向）
-        img = ImageOps.exif_transpose(img)
+def open_image(source):
+    """打开图片并校正方向、转换为 RGB；无法识别的图片会抛出异常"""
+    img = Image.open(source)
 
-        # 转换为 RGB
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
+    # 自动旋转（处理手机拍摄的照片方向）
+    img = ImageOps.exif_transpose(img)
 
-        # 调整尺寸
-        if img.width > max_width:
-            output_size = (max_width, int(img.height * max_width / img.width))
-            img.thumbnail(output_size, Image.Resampling.LANCZOS)
+    # 转换为 RGB
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
 
-        output_io = BytesIO()
-        img.save(output_io, format='JPEG', quality=quality, optimize=True)
-        output_io.seek(0)
-
-        return InMemoryUploadedFile(
-            output_io,
-            'ImageField',
-            f"{image_field.name.split('.')[0]}.jpg",
-            'image/jpeg',
-            sys.getsizeof(output_io),
-            None
-        )
-    except Exception as e:
-        print(f"Image compression failed: {e}")
-        return image_field
-
-def compress_pdf(file_field):
+def encode_image_variants(source, widths=(320, 640, 1200), quality=75):
     """
-    PDF 压缩：去除多余元数据，压缩内容流 (Lossless)
+    图片多尺寸版本：每个宽度各编码一份 JPEG 和 WebP (Pillow 不支持 WebP 时只有 JPEG)
+    不放大：比原图宽的尺寸合并为一份原宽度版本
+    返回 [(宽, 高, {'jpeg': BytesIO, 'webp': BytesIO}), ...]，按宽度升序
+    (由后台任务 articles.media 调用，不在请求中执行)
     """
-    if not file_field or not hasattr(file_field, 'file'):
-        return file_field
-        
-    if not isinstance(file_field.file, InMemoryUploadedFile):
-        return file_field
-
-    try:
-        reader = PdfReader(file_field)
-        writer = PdfWriter()
-
-        # 复制所有页面并应用压缩
-        for page in reader.pages:
-            page.compress_content_streams()  # 关键步骤：压缩流
-            writer.add_page(page)
-
-        # 去除元数据以减小体积
-        writer.add_metadata({})
-
-        output_io = BytesIO()
-        writer.write(output_io)
-        output_io.seek(0)
-
-        return InMemoryUploadedFile(
-            output_io,
-            'FileField',
-            file_field.name,
-            'application/pdf',
-            sys.getsizeof(output_io),
-            None
-        )
-    except Exception as e:
-        print(f"PDF compression failed: {e}")
-        return file_field
\ No newline at end of file
+    img = open_image(source)
+    max_width = min(img.width, max(widths))
+    targets = sorted({w for w in widths if w < max_width} | {max_width}, reverse=True)
+    formats = {'jpeg': {'quality': quality, 'optimize': True}}
+    if features.check('webp'):
+        formats['webp'] = {'quality': quality, 'method': 4}
+
+    variants = []
+    for width in targets:
+        # 从上一个 (更大的) 版本继续缩小，避免每次都从原图重采样
+        if width != img.width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS)
+        encoded = {}
+        for fmt, options in formats.items():
+            output_io = BytesIO()
+            img.save(output_io, format=fmt.upper(), **options)
+            output_io.seek(0)
+            encoded[fmt] = output_io
+        variants.append((img.width, img.height, encoded))
+    variants.reverse()
+    return variants
+
+def parse_article_items(value, max_items=200):
+    """
+    解析 "news:1,paper:3,news:7" 形式的文章列表参数
+    返回 {模型名: [id, ...]}，格式不正确的项直接忽略，最多取 max_items 项
+    """
+    items = {}
+    for token in (value or '').split(',')[:max_items]:
+        model_name, _, object_id = token.strip().partition(':')
+        if model_name and object_id.isdigit():
+            items.setdefault(model_name.lower(), []).append(int(object_id))
+    return items
@@ -1,93 +1,263 @@
 from django.shortcuts import render
-from django.db.models import F, Q
+from django.db import models
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Substr
 from django.core.cache import cache
-from rest_framework import viewsets, filters, status, permissions,serializers
+from django.utils import timezone
+from rest_framework import viewsets, status, permissions,serializers
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 
+from . import counters, media, rollups
+from .caching import CachedResponseMixin, ConditionalGetMixin
+from .dedupe import get_view_dedupe
+from .documents import DocumentMixin
+from .pagination import ArticlePagination, StandardResultsSetPagination
+from .search import ArticleSearchFilter, RelevanceOrderingFilter, matched_pages, unified_search
+from reactions.lookups import get_my_reactions, get_reaction_owner, reaction_state_tag
 # 引入之前定义的模型和序列化器
 from .models import (
     News, BookInfo, BookReview, BookReviewCategory, Opinion, Literature,
     QA, Translation, History, Paper, ClassicBook, Library,
-    Scripture, ScriptureChapter, Contact
+    Scripture, ScriptureChapter, Contact, ViewCountModel, CommentCountModel
 )
 from .serializers import (
     NewsSerializer, BookInfoSerializer, BookReviewSerializer,
     BookReviewCategorySerializer, OpinionSerializer, LiteratureSerializer,
     QASerializer, TranslationSerializer, HistorySerializer,
     PaperSerializer, ClassicBookSerializer, LibrarySerializer,
-    ScriptureSerializer, ScriptureChapterSerializer
+    ScriptureSerializer, ScriptureChapterSerializer,
+    NewsListSerializer, BookInfoListSerializer, BookReviewListSerializer,
+    OpinionListSerializer, LiteratureListSerializer, QAListSerializer,
+    TranslationListSerializer, HistoryListSerializer, PaperListSerializer,
+    ClassicBookListSerializer, LibraryListSerializer, ScriptureListSerializer
 )
 
 # ==================== 基础配置 ====================
 
-class StandardResultsSetPagination(PageNumberPagination):
-    """标准分页配置"""
-    page_size = 12
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
 class SmartViewCountMixin:
     """
     智能阅读量统计 Mixin
-    策略：使用 Cache 记录 'IP + 文章ID'，30分钟内不重复计数
+    策略：同一访客 (IP) 在去重窗口内不重复计数，去重实现见 articles.dedupe
+    开启 VIEW_COUNT_BUFFERED 后，计数先累计在缓存中，由 flush_view_counts 批量写回
+    详情响应命中缓存 (CachedResponseMixin) 时仍然计数，并把计数器覆盖为最新数值
     """
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        
-        # 获取客户端 IP
+    def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
+            return x_forwarded_for.split(',')[0]
+        return request.META.get('REMOTE_ADDR')
+
+    def record_view(self, request, model, pk):
+        """记录一次阅读，去重窗口内首次访问才增加阅读量"""
+        if get_view_dedupe().seen(model, pk, self.get_client_ip(request)):
+            return
+        if counters.is_buffered():
+            # 缓冲模式：只在缓存中原子自增，不写数据库
+            counters.incr_view(model, pk)
         else:
-            ip = request.META.get('REMOTE_ADDR')
-            
-        # 构建缓存键: view_count:model:id:ip
-        model_name = instance._meta.model_name
-        cache_key = f'view_count:{model_name}:{instance.id}:{ip}'
-        
-        # 检查缓存，如果不存在则增加阅读量
-        if not cache.get(cache_key):
             # 使用 F 表达式原子更新，避免并发问题
-            instance.total_views = F('total_views') + 1
-            instance.today_views = F('today_views') + 1
-            instance.save(update_fields=['total_views', 'today_views', 'last_view_date'])
-            
-            # 设置缓存，有效期 30 分钟 (1800秒)
-            cache.set(cache_key, 1, 1800)
-            
-            # 重新刷新实例以获取最新数值
-            instance.refresh_from_db()
-
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
-
-class BaseArticleViewSet(SmartViewCountMixin, viewsets.ModelViewSet):
+            model.objects.filter(pk=pk).update(
+                total_views=F('total_views') + 1,
+                today_views=F('today_views') + 1,
+                last_view_date=timezone.localdate(),
+            )
+
+    def current_counters(self, model, pk):
+        """最新的阅读量 / 点赞数 / 评论数 (缓冲模式下加上尚未写回的增量)"""
+        fields = ['total_views', 'today_views', 'likes', 'dislikes']
+        if issubclass(model, CommentCountModel):
+            fields.append('comment_count')
+        data = model.objects.filter(pk=pk).values(*fields).first() or {}
+        if data and counters.is_buffered():
+            pending = counters.pending_views(model, pk)
+            data['total_views'] += pending
+            data['today_views'] += pending
+        return data
+
+    def retrieve(self, request, *args, **kwargs):
+        model = self.queryset.model
+        cache_key = self.get_response_cache_key(request)
+        data = cache.get(cache_key) if cache_key else None
+
+        if data is None:
+            instance = self.get_object()
+            # 经训等模型没有阅读量字段，只需缓存序列化结果
+            if isinstance(instance, ViewCountModel):
+                self.record_view(request, model, instance.pk)
+            data = dict(self.get_serializer(instance).data)
+            if cache_key:
+                cache.set(cache_key, data, self.get_cache_timeout())
+        elif issubclass(model, ViewCountModel):
+            # 命中缓存：不再查询和序列化文章，但仍然计数
+            self.record_view(request, model, data['id'])
+
+        if issubclass(model, ViewCountModel):
+            # 计数器不走缓存，覆盖为最新数值
+            data = {**data, **self.current_counters(model, data['id'])}
+        return Response(data)
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        """
+        文章统计
+        GET /api/articles/news/1/stats/
+        unique_visitors 为去重窗口内独立访客数的估算值
+        """
+        model = self.get_queryset().model
+        if not issubclass(model, ViewCountModel):
+            return Response({"error": "Not supported"}, status=404)
+
+        lookup = {'pk': kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        data = (
+            self.get_queryset()
+            .filter(**lookup)
+            .values('id', 'total_views', 'today_views', 'likes', 'dislikes')
+            .first()
+        )
+        if data is None:
+            return Response({"error": "Object not found"}, status=404)
+
+        if counters.is_buffered():
+            pending = counters.pending_views(model, data['id'])
+            data['total_views'] += pending
+            data['today_views'] += pending
+        data['unique_visitors'] = get_view_dedupe().unique_visitors(model, data['id'])
+        return Response(data)
+
+class BaseArticleViewSet(ConditionalGetMixin, SmartViewCountMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     文章视图基类
     集成：权限控制、过滤、搜索、分页、智能阅读量
+    分页：默认页码分页，?pagination=cursor 切换为游标分页
+    缓存：list / retrieve 响应按模型版本号缓存，文章变更后自动失效 (见 articles.caching)
+    条件请求：list / retrieve 返回 ETag / Last-Modified，未变化时返回 304
+    ?with_reactions=1：列表每项附带 my_reaction (当前访客的点赞状态)，在读取响应缓存之后再附加
     """
-    pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = ArticlePagination
+    filter_backends = [DjangoFilterBackend, ArticleSearchFilter, RelevanceOrderingFilter]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] # 未登录只读，登录可编辑
     ordering_fields = ['created_at', 'updated_at', 'total_views']
     ordering = ['-updated_at'] # 默认按更新时间倒序
+    list_serializer_class = None # list 动作使用的简化序列化器
+    validator_counter_fields = ('comment_count',) # 评论数变化不修改 updated_at，单独参与 ETag 校验
 
     def get_queryset(self):
         """
         重写查询集：
         - 管理员(Superuser/Staff): 可以看到所有文章
         - 普通用户/游客: 只能看到 is_published=True 的文章
+        - list 动作只加载列表序列化器需要的列
         """
+        queryset = self.get_visible_queryset()
+        if self.action == 'list':
+            queryset = self.optimize_list_queryset(queryset)
+        return queryset
+
+    def get_visible_queryset(self):
         queryset = super().get_queryset()
         if self.request.user.is_staff:
             return queryset
         
-        # 如果模型有 is_published 字段，则过滤
-        if hasattr(self.queryset.model, 'is_published'):
-            return queryset.filter(is_published=True)
+        # 按模型的发布规则过滤 (见 PublishableModel.PUBLISHED_FILTER)
+        published_filter = getattr(self.queryset.model, 'PUBLISHED_FILTER', None)
+        if published_filter:
+            return queryset.filter(**published_filter)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200 and self.wants_reactions(request):
+            self.attach_my_reactions(request, response.data)
+        return response
+
+    def wants_reactions(self, request):
+        return request.query_params.get('with_reactions') in ('1', 'true')
+
+    def attach_my_reactions(self, request, data):
+        """给列表结果附加 my_reaction，一次查询 (或访客缓存) 取出整页的状态"""
+        results = data['results'] if isinstance(data, dict) and 'results' in data else data
+        model_name = self.queryset.model._meta.model_name
+        mine = get_my_reactions(
+            get_reaction_owner(request),
+            {model_name: [item['id'] for item in results]},
+        )
+        for item in results:
+            item['my_reaction'] = mine.get(f'{model_name}:{item["id"]}')
+
+    def get_etag_extra(self, request):
+        # my_reaction 因访客而异，ETag 需要随访客的点赞状态变化
+        if self.action == 'list' and self.wants_reactions(request):
+            return (reaction_state_tag(get_reaction_owner(request)),)
+        return ()
+
+    def get_conditional_queryset(self):
+        # 校验值只需要更新时间和行数，不做列表的列裁剪和注解
+        return self.filter_queryset(self.get_visible_queryset())
+
+    def handle_not_modified(self, request, state):
+        # 304 也算一次阅读
+        if self.action == 'retrieve' and issubclass(self.queryset.model, ViewCountModel):
+            self.record_view(request, self.queryset.model, state['pk'])
+
+    @action(detail=True, methods=['get'])
+    def media(self, request, *args, **kwargs):
+        """
+        媒体处理状态
+        GET /api/articles/news/1/media/ -> {"image": {"status": "done", ...}}
+        错误信息只对管理员返回
+        """
+        status_map = media.media_status(self.get_object())
+        if not request.user.is_staff:
+            for job in status_map.values():
+                job.pop('error', None)
+        return Response(status_map)
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def optimize_list_queryset(self, queryset):
+        """
+        根据列表序列化器的字段裁剪查询：
+        - defer 序列化器用不到的 TEXT 大字段 (content / catalog / preface ...)
+        - 对 'category.name' 这类跨表字段 select_related，避免 N+1
+        - 序列化器需要摘要时只截取 summary_source_field 的前若干字符
+        """
+        serializer_class = self.get_serializer_class()
+        fields = serializer_class().fields
+        model = queryset.model
+
+        sources, related = set(), set()
+        for field in fields.values():
+            if field.source == '*':
+                continue
+            name, _, rest = field.source.partition('.')
+            sources.add(name)
+            if rest:
+                related.add(name)
+
+        deferred = [
+            f.name for f in model._meta.concrete_fields
+            if isinstance(f, models.TextField) and f.name not in sources
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+
+        related = [
+            name for name in related
+            if model._meta.get_field(name).many_to_one
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+
+        summary_field = getattr(serializer_class, 'summary_source_field', None)
+        if 'summary' in fields and summary_field:
+            queryset = queryset.annotate(
+                summary_source=Substr(summary_field, 1, serializer_class.summary_source_length)
+            )
         return queryset
 
 # ==================== 具体视图集 ====================
@@ -95,11 +265,13 @@ class BaseArticleViewSet(SmartViewCountMixin, viewsets.ModelViewSet):
 class NewsViewSet(BaseArticleViewSet):
     queryset = News.objects.all()
     serializer_class = NewsSerializer
+    list_serializer_class = NewsListSerializer
     search_fields = ['title', 'content', 'author']
 
 class BookInfoViewSet(BaseArticleViewSet):
     queryset = BookInfo.objects.all()
     serializer_class = BookInfoSerializer
+    list_serializer_class = BookInfoListSerializer
     search_fields = ['title', 'author', 'isbn', 'publisher']
 
 class BookReviewCategoryViewSet(viewsets.ModelViewSet):
@@ -111,54 +283,56 @@ class BookReviewCategoryViewSet(viewsets.ModelViewSet):
 class BookReviewViewSet(BaseArticleViewSet):
     queryset = BookReview.objects.all()
     serializer_class = BookReviewSerializer
+    list_serializer_class = BookReviewListSerializer
     search_fields = ['title', 'content']
     filterset_fields = ['category'] # 允许通过 ?category=ID 过滤
 
 class OpinionViewSet(BaseArticleViewSet):
     queryset = Opinion.objects.all()
     serializer_class = OpinionSerializer
+    list_serializer_class = OpinionListSerializer
     search_fields = ['title', 'content', 'author']
 
 class LiteratureViewSet(BaseArticleViewSet):
     queryset = Literature.objects.all()
     serializer_class = LiteratureSerializer
+    list_serializer_class = LiteratureListSerializer
     search_fields = ['title', 'content']
 
 class QAViewSet(BaseArticleViewSet):
     queryset = QA.objects.all()
     serializer_class = QASerializer
-    search_fields = ['title', 'content']
-    
-    def get_queryset(self):
-        # QA 的特殊逻辑：普通用户只能看 is_approved=True
-        queryset = QA.objects.all()
-        if self.request.user.is_staff:
-            return queryset
-        return queryset.filter(is_published=True, is_approved=True)
+    list_serializer_class = QAListSerializer
+    search_fields = ['title', 'content'] # 普通用户只能看 is_approved=True，见 QA.PUBLISHED_FILTER
 
 class TranslationViewSet(BaseArticleViewSet):
     queryset = Translation.objects.all()
     serializer_class = TranslationSerializer
+    list_serializer_class = TranslationListSerializer
     search_fields = ['title', 'content', 'original_title', 'original_author']
 
 class HistoryViewSet(BaseArticleViewSet):
     queryset = History.objects.all()
     serializer_class = HistorySerializer
+    list_serializer_class = HistoryListSerializer
     search_fields = ['title', 'content']
 
-class PaperViewSet(BaseArticleViewSet):
+class PaperViewSet(DocumentMixin, BaseArticleViewSet):
     queryset = Paper.objects.all()
     serializer_class = PaperSerializer
+    list_serializer_class = PaperListSerializer
     search_fields = ['title']
 
-class ClassicBookViewSet(BaseArticleViewSet):
+class ClassicBookViewSet(DocumentMixin, BaseArticleViewSet):
     queryset = ClassicBook.objects.all()
     serializer_class = ClassicBookSerializer
+    list_serializer_class = ClassicBookListSerializer
     search_fields = ['title']
 
-class LibraryViewSet(BaseArticleViewSet):
+class LibraryViewSet(DocumentMixin, BaseArticleViewSet):
     queryset = Library.objects.all()
     serializer_class = LibrarySerializer
+    list_serializer_class = LibraryListSerializer
     search_fields = ['title', 'author_intro', 'content_intro', 'isbn']
 
 # ==================== 经训视图 ====================
@@ -166,8 +340,27 @@ class LibraryViewSet(BaseArticleViewSet):
 class ScriptureViewSet(BaseArticleViewSet):
     queryset = Scripture.objects.all()
     serializer_class = ScriptureSerializer
+    list_serializer_class = ScriptureListSerializer
     search_fields = ['title']
 
+    def optimize_list_queryset(self, queryset):
+        # 章节数通过注解一次查出
+        return super().optimize_list_queryset(queryset).annotate(
+            published_chapter_count=Count('chapters', filter=Q(chapters__is_published=True))
+        )
+
+    def get_conditional_state(self):
+        state = super().get_conditional_state()
+        if self.action != 'retrieve' or state is None:
+            return state
+        # 详情包含全部章节，章节的增删改也要体现在校验值中
+        chapter_state = ScriptureChapter.objects.filter(scripture_id=state['pk']).aggregate(
+            chapter_modified=Max('updated_at'), chapter_count=Count('pk'),
+        )
+        if chapter_state['chapter_modified'] and chapter_state['chapter_modified'] > state['last_modified']:
+            state['last_modified'] = chapter_state['chapter_modified']
+        return {**state, **chapter_state}
+
 class ScriptureChapterViewSet(BaseArticleViewSet):
     queryset = ScriptureChapter.objects.all()
     serializer_class = ScriptureChapterSerializer
@@ -209,46 +402,101 @@ from rest_framework.views import APIView
 class GlobalSearchView(APIView):
     """
     全局搜索接口
-    GET /api/articles/search/?q=关键字
+    GET /api/articles/search/?q=关键字&page=1&page_size=12
+    覆盖全部文章类型，各类型的搜索字段取自对应视图集的 search_fields；
+    所有类型合并为一条 UNION 查询，按 相关度 x 时间加成 排序后分页
+    论文 / 古籍 / 书库同时搜索 PDF 正文，结果附带 matched_pages (命中的页码)
     """
     permission_classes = [permissions.AllowAny]
+    pagination_class = StandardResultsSetPagination
+
+    # 参与全局搜索的视图集
+    searchable_viewsets = [
+        NewsViewSet, BookInfoViewSet, BookReviewViewSet, OpinionViewSet,
+        LiteratureViewSet, QAViewSet, TranslationViewSet, HistoryViewSet,
+        PaperViewSet, ClassicBookViewSet, LibraryViewSet, ScriptureChapterViewSet,
+    ]
 
     def get(self, request, *args, **kwargs):
-        query = request.query_params.get('q', '')
+        query = request.query_params.get('q', '').strip()
         if not query:
-            return Response({"results": []})
+            return Response({"count": 0, "results": []})
+
+        sources, documents = [], {}
+        for viewset in self.searchable_viewsets:
+            model = viewset.queryset.model
+            queryset = model.objects.filter(**model.PUBLISHED_FILTER)
+            document_field = getattr(viewset, 'search_document_field', None)
+            sources.append((queryset, model._meta.model_name, viewset.search_fields, document_field))
+            if document_field:
+                documents[model._meta.model_name] = (model, document_field)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(unified_search(sources, query), request, view=self)
+        self.attach_matched_pages(page, documents, query)
+        return paginator.get_paginated_response(page)
+
+    def attach_matched_pages(self, page, documents, query):
+        """带 PDF 的类型附加 matched_pages (正文命中的页码)，每个类型一条查询"""
+        for type_name, (model, document_field) in documents.items():
+            items = [item for item in page if item['type'] == type_name]
+            if not items:
+                continue
+            pages = matched_pages(model, [item['id'] for item in items], query, document_field)
+            for item in items:
+                item['matched_pages'] = pages.get(item['id'], [])
+
+
+# ==================== 热门文章 (基于每日浏览量汇总) ====================
+
+class TrendingView(APIView):
+    """
+    热门文章接口
+    GET /api/articles/trending/?days=7&limit=10&type=news
+    数据来自每日浏览量汇总表，不扫描文章表 (不包含今天尚未归档的浏览量)
+    """
+    permission_classes = [permissions.AllowAny]
 
-        # 定义需要搜索的模型列表
-        # 可以根据需要调整，为了性能不建议一次搜太多，或者使用 Elasticsearch (进阶)
-        # 这里使用简单的数据库 LIKE 查询聚合
-        
-        results = []
-        
-        # 辅助函数：搜索并追加结果
-        def search_model(Model, Serializer, type_name, search_fields=['title']):
-            # 构造 Q 对象
-            q_obj = Q()
-            for field in search_fields:
-                q_obj |= Q(**{f"{field}__icontains": query})
-            
-            # 过滤发布状态
-            qs = Model.objects.filter(q_obj)
-            if hasattr(Model, 'is_published'):
-                qs = qs.filter(is_published=True)
-            
-            # 取前3条以保证性能
-            data = Serializer(qs[:3], many=True, context={'request': request}).data
-            for item in data:
-                item['type'] = type_name # 标记类型
-                results.append(item)
-
-        # 执行搜索 (示例：搜索几个主要模型)
-        search_model(News, NewsSerializer, 'news', ['title', 'content'])
-        search_model(BookReview, BookReviewSerializer, 'book_review', ['title', 'content'])
-        search_model(Paper, PaperSerializer, 'paper', ['title'])
-        search_model(Opinion, OpinionSerializer, 'opinion', ['title', 'content'])
-        
-        # 按时间排序混合结果
-        results.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
+    def get(self, request, *args, **kwargs):
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), 365)
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+        except ValueError:
+            return Response({"error": "Invalid days/limit"}, status=400)
+
+        model = None
+        type_name = request.query_params.get('type')
+        if type_name:
+            model = next(
+                (m for m in rollups.view_count_models() if m._meta.model_name == type_name),
+                None
+            )
+            if model is None:
+                return Response({"error": "Invalid type"}, status=400)
+
+        # 多取一些，弥补未发布文章被过滤掉的部分
+        ranked = rollups.top_viewed(days=days, limit=limit * 2, model=model)
+
+        # 每种类型一次查询获取标题
+        ids_by_model = {}
+        for model_class, object_id, _ in ranked:
+            ids_by_model.setdefault(model_class, []).append(object_id)
+        titles = {}
+        for model_class, ids in ids_by_model.items():
+            qs = model_class.objects.filter(id__in=ids, **model_class.PUBLISHED_FILTER)
+            for pk, title in qs.values_list('id', 'title'):
+                titles[(model_class, pk)] = title
+
+        results = [
+            {
+                "type": model_class._meta.model_name,
+                "id": object_id,
+                "title": titles[(model_class, object_id)],
+                "views": views,
+            }
+            for model_class, object_id, views in ranked
+            if (model_class, object_id) in titles
+        ][:limit]
+
+        return Response({"days": days, "count": len(results), "results": results})
 
-        return Response({"count": len(results), "results": results})
\ No newline at end of file
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_thread(apps, schema_editor):
+    """按 parent 链计算 root / depth (父评论的 id 总是更小，按 id 顺序一遍即可)"""
+    Comment = apps.get_model('comments', 'Comment')
+    nodes = {}
+    changed = []
+    for pk, parent_id in Comment.objects.order_by('pk').values_list('pk', 'parent_id').iterator():
+        if parent_id is None or parent_id not in nodes:
+            nodes[pk] = (None, 0)
+            continue
+        parent_root, parent_depth = nodes[parent_id]
+        nodes[pk] = (parent_root or parent_id, parent_depth + 1)
+        changed.append(Comment(pk=pk, root_id=nodes[pk][0], depth=nodes[pk][1]))
+    Comment.objects.bulk_update(changed, ['root', 'depth'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='层级'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread', to='comments.comment'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['root', 'is_active', 'depth'], name='comments_co_root_id_fdcc25_idx'),
+        ),
+        migrations.RunPython(backfill_thread, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,31 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import gettext_lazy as _
+from articles.caching import bump_model_version
+from articles.registry import registry
+
+# 加载时 is_active 被 defer，保存前不知道数据库中的值
+UNKNOWN = object()
+
+def adjust_comment_count(content_type_id, object_id, delta):
+    """
+    增减文章的 comment_count (见 articles.models.CommentCountModel)，不加载文章
+    UPDATE 不修改 updated_at，提交后递增模型版本号使响应缓存失效 (列表的 ETag 另含评论数之和)
+    """
+    article_type = registry.get_for_content_type(content_type_id)
+    if article_type is None or not article_type.has_comment_count:
+        return
+    queryset = article_type.model.objects.filter(pk=object_id)
+    if delta < 0:
+        # 无符号列不能减成负数
+        queryset = queryset.filter(comment_count__gte=-delta)
+    if queryset.update(comment_count=F('comment_count') + delta):
+        model = article_type.model
+        transaction.on_commit(lambda: bump_model_version(model))
+
 
 class Comment(models.Model):
     """通用评论模型"""
@@ -21,6 +44,10 @@ class Comment(models.Model):
     
     # 父评论 (实现盖楼/回复)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    # 所属评论串的顶级评论 (顶级评论自身为空) 和层级 (顶级为 0)，由 save() 维护
+    # 评论串中显示范围内的回复用 root_id + depth 一次查出 (见 comments.tree)，不必逐层查询 replies
+    root = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='thread')
+    depth = models.PositiveSmallIntegerField(_("层级"), default=0)
     
     # 元数据
     created_at = models.DateTimeField(auto_now_add=True)
@@ -30,7 +57,43 @@ class Comment(models.Model):
         ordering = ['-created_at'] # 最新评论在前
         indexes = [
             models.Index(fields=['content_type', 'object_id']),
+            models.Index(fields=['root', 'is_active', 'depth']),
         ]
 
     def __str__(self):
-        return f"{self.nickname}: {self.content[:20]}..."
\ No newline at end of file
+        return f"{self.nickname}: {self.content[:20]}..."
+
+    # 从数据库加载时的 is_active，用于判断保存时评论数是否需要变化
+    _saved_is_active = False
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_is_active = instance.__dict__.get('is_active', UNKNOWN)
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.parent_id:
+            parent = self.parent
+            self.root_id = parent.root_id or parent.pk
+            self.depth = parent.depth + 1
+        else:
+            self.root_id = None
+            self.depth = 0
+
+        # 新建或切换 is_active (软删除 / 恢复) 时，在同一事务内更新文章的评论数
+        # (QuerySet.update(is_active=...) 不经过这里，批量操作需要自行调用 adjust_comment_count)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'is_active' not in update_fields:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            saved = self._saved_is_active
+            if saved is UNKNOWN:
+                # 加载时 defer 了 is_active：在事务内重新读取数据库中的值
+                stored = Comment.objects.select_for_update().filter(pk=self.pk)
+                saved = stored.values_list('is_active', flat=True).first() or False
+            delta = int(self.is_active) - int(saved)
+            super().save(*args, **kwargs)
+            if delta:
+                adjust_comment_count(self.content_type_id, self.object_id, delta)
+        self._saved_is_active = self.is_active
@@ -1,25 +1,29 @@
 from rest_framework import serializers
+from articles.registry import registry
 from .models import Comment
 
 class CommentSerializer(serializers.ModelSerializer):
     created_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
     
-    # 显示子评论 (简单嵌套，适用于 UI 直接渲染)
-    # 如果评论量巨大，建议前端分开请求，这里演示一次性返回子评论
+    # 显示子评论 (嵌套结构由 comments.tree.attach_replies 预先组装，不在这里查询)
+    # reply_count 大于 replies 的长度时，其余回复通过 /api/comments/<id>/replies/ 分页加载
     replies = serializers.SerializerMethodField()
+    reply_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = [
             'id', 'nickname', 'content', 'created_at', 
-            'parent', 'replies'
+            'parent', 'depth', 'reply_count', 'replies'
         ]
         read_only_fields = ['nickname'] # 昵称由后端逻辑生成
 
     def get_replies(self, obj):
-        if obj.replies.exists():
-            return CommentSerializer(obj.replies.filter(is_active=True), many=True).data
-        return []
+        replies = getattr(obj, 'tree_replies', [])
+        return CommentSerializer(replies, many=True, context=self.context).data
+
+    def get_reply_count(self, obj):
+        return getattr(obj, 'reply_count', 0)
 
 class CommentCreateSerializer(serializers.ModelSerializer):
     """创建评论专用的 Serializer"""
@@ -34,14 +38,23 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         model_name = validated_data.pop('model')
         object_id = validated_data.pop('object_id')
         
-        # 查找 ContentType
-        try:
-            ct = ContentType.objects.get(app_label='articles', model=model_name)
-        except ContentType.DoesNotExist:
+        # 查找文章类型 (进程内注册表，不查 ContentType 表)
+        article_type = registry.get(model_name)
+        if article_type is None:
             raise serializers.ValidationError("无效的文章类型")
 
+        # 只能评论存在且已发布的文章 (SELECT 1 ... LIMIT 1)
+        if not article_type.exists(object_id):
+            raise serializers.ValidationError("文章不存在")
+
+        # 回复必须属于同一篇文章
+        parent = validated_data.get('parent')
+        if parent and (parent.content_type_id != article_type.content_type_id
+                       or parent.object_id != object_id):
+            raise serializers.ValidationError("回复的评论不属于该文章")
+
         # 注入 ContentType
-        validated_data['content_type'] = ct
+        validated_data['content_type_id'] = article_type.content_type_id
         validated_data['object_id'] = object_id
         
         return super().create(validated_data)
\ No newline at end of file
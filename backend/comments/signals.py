@@ -0,0 +1,16 @@
+# comments/signals.py
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Comment, adjust_comment_count
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """
+    删除显示中的评论时减少文章评论数
+    级联删除的回复也会逐条发送 post_delete，且与删除在同一事务内
+    """
+    if instance.is_active:
+        adjust_comment_count(instance.content_type_id, instance.object_id, -1)
@@ -0,0 +1,90 @@
+# comments/tree.py
+
+"""
+评论树加载
+
+一页评论 (顶级评论，或某条评论的一页直接回复) 作为根，
+用一条查询按 root_id 取出所在评论串中显示范围内的回复，在内存中组装嵌套结构：
+- ROW_NUMBER() OVER (PARTITION BY parent_id) 在数据库中截取每条评论最新的几条回复，
+  未显示的回复不会被加载
+- COUNT() OVER (PARTITION BY parent_id) 同时带出每条评论的直接回复总数；
+  最深一层之下只多取每条评论的第一条回复，用来读取回复数
+不再逐条评论、逐层查询 replies。
+
+- COMMENT_TREE_MAX_DEPTH:    根之下最多内嵌的层数，更深的回复通过 replies 接口加载
+- COMMENT_REPLIES_PER_LEVEL: 每条评论最多内嵌的直接回复数，其余通过 replies 接口分页加载
+
+组装后每条评论带有 tree_replies (内嵌的回复列表) 和 reply_count (直接回复总数)。
+"""
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+
+def get_max_depth():
+    return getattr(settings, 'COMMENT_TREE_MAX_DEPTH', 3)
+
+
+def get_replies_per_level():
+    return getattr(settings, 'COMMENT_REPLIES_PER_LEVEL', 5)
+
+
+def attach_replies(comments, max_depth=None, replies_per_level=None):
+    """为 comments 中的每条评论组装回复树，返回评论列表"""
+    comments = list(comments)
+    if not comments:
+        return comments
+    if max_depth is None:
+        max_depth = get_max_depth()
+    if replies_per_level is None:
+        replies_per_level = get_replies_per_level()
+    if replies_per_level <= 0:
+        # 不内嵌回复，只统计回复数
+        max_depth = 0
+
+    children = {}
+    for reply in thread_replies(comments, max_depth, replies_per_level):
+        children.setdefault(reply.parent_id, []).append(reply)
+
+    # 逐层展开，最深一层只取回复数
+    level, levels_left = comments, max_depth
+    while level:
+        next_level = []
+        for comment in level:
+            replies = children.get(comment.pk, [])
+            comment.reply_count = replies[0].reply_total if replies else 0
+            comment.tree_replies = replies if levels_left > 0 else []
+            next_level.extend(comment.tree_replies)
+        level, levels_left = next_level, levels_left - 1
+    return comments
+
+
+def thread_replies(comments, max_depth, limit):
+    """
+    comments 所在评论串中显示范围内的回复 (一条查询)，按创建时间倒序
+    每条回复带有 reply_total (父评论的直接回复总数)；
+    显示的层级每条评论取前 limit 条，最深一层之下每条评论只取一条 (用于回复数)
+    """
+    min_depth = min(c.depth for c in comments)
+    max_shown = max(c.depth for c in comments) + max_depth
+    partition = F('parent_id')
+    return list(
+        Comment.objects.filter(
+            root_id__in={c.root_id or c.pk for c in comments},
+            is_active=True,
+            depth__gt=min_depth,
+            depth__lte=max_shown + 1,
+        )
+        .annotate(
+            reply_rank=Window(RowNumber(), partition_by=partition, order_by=[F('created_at').desc(), F('pk').desc()]),
+            reply_total=Window(Count('pk'), partition_by=partition),
+        )
+        .filter(
+            Q(depth__lte=max_shown, reply_rank__lte=limit)
+            | Q(depth=max_shown + 1, reply_rank=1)
+        )
+        .order_by('-created_at', '-pk')
+    )
@@ -1,35 +1,116 @@
-from django.contrib.contenttypes.models import ContentType
 from rest_framework import viewsets, mixins, permissions, status
 from rest_framework.response import Response
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from django.db.models import CharField, Value
+from articles.caching import ConditionalGetMixin
+from articles.registry import registry
+from articles.utils import parse_article_items
 from .models import Comment
 from .serializers import CommentSerializer, CommentCreateSerializer
+from .tree import attach_replies, get_replies_per_level
 
-class CommentViewSet(mixins.ListModelMixin,
+
+class RepliesPagination(PageNumberPagination):
+    """回复分页，第 1 页与评论树中内嵌的回复一致"""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self):
+        self.page_size = get_replies_per_level()
+
+
+class CommentViewSet(ConditionalGetMixin,
+                     mixins.ListModelMixin,
                      mixins.CreateModelMixin,
                      viewsets.GenericViewSet):
     """
     评论接口
-    GET /api/comments/?model=news&id=1  -> 获取某文章的评论
+    GET /api/comments/?model=news&id=1  -> 获取某文章的评论 (顶级评论分页，回复按层级内嵌)
+    GET /api/comments/5/replies/?page=2 -> 分页获取某条评论的直接回复 (同样内嵌下级回复)
+    GET /api/comments/counts/?items=news:1,paper:3 -> 批量获取评论数
     POST /api/comments/                 -> 发表评论
+    列表支持 ETag / Last-Modified，按整个评论串 (含回复) 的最新评论时间和评论数计算
     """
     permission_classes = [permissions.AllowAny]
+    last_modified_field = 'created_at'
+    conditional_actions = ('list',)
     
     def get_queryset(self):
         """根据 URL 参数过滤评论"""
-        queryset = Comment.objects.filter(is_active=True, parent=None) # 只获取顶级评论
+        if self.action == 'replies':
+            return Comment.objects.filter(is_active=True)
+        return self.get_thread_queryset().filter(parent=None) # 只获取顶级评论
+
+    def get_conditional_queryset(self):
+        return self.get_thread_queryset()
+
+    def get_thread_queryset(self):
+        """某文章下所有显示中的评论 (含回复)"""
+        queryset = Comment.objects.filter(is_active=True)
         
         model_name = self.request.query_params.get('model')
         object_id = self.request.query_params.get('id')
         
         if model_name and object_id:
-            try:
-                ct = ContentType.objects.get(app_label='articles', model=model_name)
-                queryset = queryset.filter(content_type=ct, object_id=object_id)
-            except ContentType.DoesNotExist:
+            article_type = registry.get(model_name)
+            if article_type is None:
                 return Comment.objects.none()
+            queryset = queryset.filter(content_type_id=article_type.content_type_id, object_id=object_id)
                 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, self.list_threads, *args, **kwargs)
+
+    def list_threads(self, request, *args, **kwargs):
+        """一页顶级评论 + 一次查询取出它们的回复"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(attach_replies(page), many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(attach_replies(queryset), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def replies(self, request, *args, **kwargs):
+        """某条评论的直接回复 (分页)"""
+        comment = self.get_object()
+        queryset = Comment.objects.filter(parent=comment, is_active=True)
+        paginator = RepliesPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = CommentSerializer(attach_replies(page), many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def counts(self, request):
+        """
+        批量评论数，读取文章表上的 comment_count，所有类型合并为一条 UNION ALL 查询
+        返回 {"news:1": 3, "paper:3": 0}，不存在或未发布的文章不出现在结果中
+        """
+        items = parse_article_items(request.query_params.get('items'))
+        if not items:
+            return Response({"error": "Missing items"}, status=status.HTTP_400_BAD_REQUEST)
+
+        parts = []
+        for model_name, ids in items.items():
+            article_type = registry.get(model_name)
+            if article_type is None or not article_type.has_comment_count:
+                continue
+            parts.append(
+                article_type.published().filter(pk__in=ids)
+                .annotate(type=Value(model_name, output_field=CharField()))
+                .order_by()
+                .values_list('type', 'id', 'comment_count')
+            )
+
+        if not parts:
+            return Response({})
+        first, *rest = parts
+        rows = first.union(*rest, all=True) if rest else first
+        return Response({f'{type_name}:{pk}': count for type_name, pk, count in rows})
+
     def get_serializer_class(self):
         if self.action == 'create':
             return CommentCreateSerializer
@@ -108,6 +108,75 @@ REST_FRAMEWORK = {
 
 
 
+# 阅读量写回缓冲
+# 开启后详情页阅读量先累计在缓存中，由 `python manage.py flush_view_counts --loop` 定期批量写回
+# 多进程部署时需要 Redis / Memcached 等共享缓存
+VIEW_COUNT_BUFFERED = False
+VIEW_COUNT_FLUSH_INTERVAL = 10        # 时间片长度 / 写回间隔 (秒)
+VIEW_COUNT_BUFFER_TTL = 24 * 3600     # 缓冲键过期时间 (秒)
+
+# 阅读量去重：同一访客在窗口内只计一次
+# BloomFilterDedupe 每篇文章每个窗口一个缓存值，按预计访客数 / 误判率计算大小 (默认约 2KB)，
+# 访客超出预计时追加容量翻倍的过滤器，误判率保持在 error_rate 以内；
+# 需要精确去重时可改为 'articles.dedupe.CacheKeyDedupe' (每个访客一个缓存键)
+VIEW_DEDUPE_BACKEND = 'articles.dedupe.BloomFilterDedupe'
+VIEW_DEDUPE_OPTIONS = {
+    'window': 1800,              # 去重窗口 (秒)
+    'expected_visitors': 1000,   # 每篇文章每个窗口的预计访客数 (第一片过滤器的容量)
+    'error_rate': 0.001,         # 误判率上限 (误判的访问不计数)
+    'hll_precision': 10,         # 独立访客估算的 HyperLogLog 精度 (1024 个寄存器，误差约 3%)
+}
+
+
+
+# 文章搜索：MySQL 下使用 FULLTEXT (ngram) 全文索引，需 MySQL 5.7.6+；
+# 关闭后回退为 LIKE 查询
+ARTICLE_FULLTEXT_SEARCH = True
+
+# 文章列表 / 详情响应缓存：按模型版本号失效，管理员请求不走缓存
+ARTICLE_CACHE_ENABLED = True
+ARTICLE_CACHE_TIMEOUT = 300           # 缓存时间 (秒)，计数器以外的字段最多延迟这么久
+
+# 评论树：根评论之下最多内嵌的层数 / 每条评论最多内嵌的直接回复数，其余通过 replies 接口加载
+COMMENT_TREE_MAX_DEPTH = 3
+COMMENT_REPLIES_PER_LEVEL = 5
+
+# 当前访客点赞状态的缓存时间 (秒)，toggle 时按访客版本号失效
+MY_REACTIONS_CACHE_TIMEOUT = 300
+
+# 媒体后台处理：上传的图片先原样保存，由 `python manage.py process_media --loop` 压缩后替换
+# 没有运行 worker 的环境 (测试 / 本地开发) 可设为 True，在保存时同步处理
+MEDIA_PROCESSING_SYNC = False
+MEDIA_JOB_MAX_ATTEMPTS = 3            # 失败重试次数
+MEDIA_JOB_RETRY_DELAY = 60            # 失败后等待该时间 (秒) 再重试，每次失败翻倍
+MEDIA_JOB_STALE_TIMEOUT = 600         # 处理中超过该时间 (秒) 视为 worker 已退出，重新排队
+# 图片生成的宽度 (像素)，每个宽度各一份 JPEG + WebP，字段本身替换为最大宽度的 JPEG
+IMAGE_VARIANT_WIDTHS = [320, 640, 1200]
+# PDF 压缩在子进程中执行 (先把文件复制到 FILE_UPLOAD_TEMP_DIR 下的临时文件)
+PDF_COMPRESS_TIMEOUT = 300                      # 子进程超时 (秒)
+PDF_COMPRESS_MAX_SIZE = 200 * 1024 * 1024       # 超过该大小的文件不压缩
+PDF_COMPRESS_MEMORY_LIMIT = 1024 * 1024 * 1024  # 子进程内存上限 (RLIMIT_AS，仅 Unix)
+# 压缩后用 qpdf 线性化 (Fast Web View)，没有安装 qpdf 时自动跳过
+PDF_LINEARIZE = True
+QPDF_BINARY = 'qpdf'
+# PDF 首页缩略图宽度 (像素)；安装了 poppler 的 pdftoppm 时渲染首页，否则取首页中的图片
+PDF_THUMBNAIL_WIDTH = 320
+
+# PDF 下载接口 (/document/) 交给前端服务器发送文件：None / 'x-accel-redirect' (Nginx) / 'x-sendfile' (Apache)
+# Nginx 示例: location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+DOCUMENT_SENDFILE = None
+DOCUMENT_ACCEL_PREFIX = '/protected-media/'
+
+# 上传文件按内容哈希存放 (cas/xx/yy/<sha256>.ext)，相同内容只存一份，处理结果按哈希复用
+# 文件可能被多篇文章共用，不再随记录删除；无引用的文件由 `python manage.py purge_media` 清理
+STORAGES = {
+    "default": {"BACKEND": "articles.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+PURGE_MEDIA_MIN_AGE_HOURS = 24   # 只清理修改时间早于该时长的文件，避免删除刚上传还未保存记录的文件
+
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -0,0 +1,93 @@
+# reactions/lookups.py
+
+"""
+批量查询当前访客的点赞/点踩状态
+
+- 一条查询：按 (user 或 session_key, content_type, object_id) 唯一索引取出多篇文章的记录
+- 结果按访客缓存；每个访客有一个版本号，toggle 时递增，旧缓存自然失效
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from articles.registry import registry
+
+from .models import UserReaction
+
+
+def get_reaction_owner(request):
+    """当前访客的过滤条件；匿名且还没有 Session 时返回 None (不可能有记录)"""
+    if request.user.is_authenticated:
+        return {'user': request.user}
+    if request.session.session_key:
+        return {'session_key': request.session.session_key}
+    return None
+
+
+def _owner_id(owner):
+    if 'user' in owner:
+        return f'u{owner["user"].pk}'
+    return f's{owner["session_key"]}'
+
+
+def get_owner_version(owner):
+    key = f'reaction_version:{_owner_id(owner)}'
+    version = cache.get(key)
+    if version is None:
+        # 初始值取毫秒时间戳，版本键被淘汰后也不会与旧缓存重复
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_owner_version(owner):
+    key = f'reaction_version:{_owner_id(owner)}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def reaction_state_tag(owner):
+    """访客的点赞状态标识 (访客 + 版本号)，状态变化后随之变化，可用于 ETag"""
+    if owner is None:
+        return ''
+    return f'{_owner_id(owner)}:{get_owner_version(owner)}'
+
+
+def get_my_reactions(owner, items):
+    """
+    items: {模型名: [id, ...]} (见 articles.utils.parse_article_items)
+    返回 {"news:1": "like", ...}，没有记录的文章不出现在结果中
+    """
+    if owner is None or not items:
+        return {}
+
+    raw = '|'.join(f'{name}:{",".join(map(str, sorted(set(ids))))}' for name, ids in sorted(items.items()))
+    key = (f'my_reactions:{_owner_id(owner)}:{get_owner_version(owner)}:'
+           f'{hashlib.md5(raw.encode()).hexdigest()}')
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    names, condition = {}, Q()
+    for model_name, ids in items.items():
+        article_type = registry.get(model_name)
+        if article_type is None:
+            continue
+        names[article_type.content_type_id] = model_name
+        condition |= Q(content_type_id=article_type.content_type_id, object_id__in=ids)
+
+    result = {}
+    if names:
+        rows = (
+            UserReaction.objects.filter(condition, **owner)
+            .values_list('content_type_id', 'object_id', 'reaction_type')
+        )
+        result = {f'{names[ct_id]}:{object_id}': kind for ct_id, object_id, kind in rows}
+    cache.set(key, result, getattr(settings, 'MY_REACTIONS_CACHE_TIMEOUT', 300))
+    return result
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:42
+
+# 0001_initial 与当前模型不一致 (字段名、表名、索引)，这里补齐差异
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('reactions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='userreaction',
+            options={},
+        ),
+        migrations.RemoveIndex(
+            model_name='userreaction',
+            name='reactions_u_user_se_dd85a7_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='userreaction',
+            name='reactions_u_created_05eaf4_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='userreaction',
+            new_name='reactions_u_content_bacfac_idx',
+            old_name='reactions_u_content_831f0c_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='userreaction',
+            unique_together=set(),
+        ),
+        # user_session 改名为 session_key，保留已有数据
+        migrations.RenameField(
+            model_name='userreaction',
+            old_name='user_session',
+            new_name='session_key',
+        ),
+        migrations.AlterField(
+            model_name='userreaction',
+            name='session_key',
+            field=models.CharField(blank=True, db_index=True, max_length=40, null=True, verbose_name='Session ID'),
+        ),
+        migrations.AddField(
+            model_name='userreaction',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='userreaction',
+            name='content_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype'),
+        ),
+        migrations.AlterField(
+            model_name='userreaction',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='userreaction',
+            name='object_id',
+            field=models.PositiveIntegerField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='userreaction',
+            name='reaction_type',
+            field=models.CharField(choices=[('like', '点赞'), ('dislike', '点踩')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='userreaction',
+            index=models.Index(fields=['session_key', 'content_type', 'object_id'], name='reactions_u_session_75a51a_idx'),
+        ),
+        migrations.AlterModelTable(
+            name='userreaction',
+            table=None,
+        ),
+    ]
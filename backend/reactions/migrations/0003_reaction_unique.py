@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:42
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Max, Value, When
+
+
+def dedupe_reactions(apps, schema_editor):
+    """
+    建唯一约束前清理数据
+    1. 登录用户的记录清空 session_key (按 user 判断唯一)
+    2. 同一 (用户或 Session, 对象) 的重复记录只保留最新一条，并从文章计数中扣除被删除的记录
+    """
+    UserReaction = apps.get_model('reactions', 'UserReaction')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+
+    UserReaction.objects.filter(user__isnull=False).update(session_key=None)
+
+    removed = Counter()
+    for owner in ('user', 'session_key'):
+        groups = (
+            UserReaction.objects.filter(**{f'{owner}__isnull': False})
+            .values(owner, 'content_type', 'object_id')
+            .annotate(n=Count('pk'), keep=Max('pk'))
+            .filter(n__gt=1)
+        )
+        for group in list(groups):
+            extra = UserReaction.objects.filter(
+                **{owner: group[owner]},
+                content_type_id=group['content_type'],
+                object_id=group['object_id'],
+            ).exclude(pk=group['keep'])
+            removed.update(extra.values_list('content_type_id', 'object_id', 'reaction_type'))
+            extra.delete()
+
+    for (ct_id, object_id, reaction_type), n in removed.items():
+        ct = ContentType.objects.filter(pk=ct_id).first()
+        try:
+            model = apps.get_model(ct.app_label, ct.model)
+        except (AttributeError, LookupError):
+            continue
+        field = 'likes' if reaction_type == 'like' else 'dislikes'
+        model.objects.filter(pk=object_id).update(**{field: Case(
+            When(**{f'{field}__gte': n}, then=F(field) - n),
+            default=Value(0),
+            output_field=models.PositiveIntegerField(),
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('reactions', '0002_sync_model'),
+        ('articles', '0004_comment_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_reactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userreaction',
+            constraint=models.UniqueConstraint(fields=('user', 'content_type', 'object_id'), name='uniq_reaction_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='userreaction',
+            constraint=models.UniqueConstraint(fields=('session_key', 'content_type', 'object_id'), name='uniq_reaction_session'),
+        ),
+    ]
@@ -34,10 +34,20 @@ class UserReaction(models.Model):
 
     class Meta:
         # 联合唯一索引：确保一个用户(或Session)对同一对象只能有一条记录
+        # 登录用户的记录 session_key 为空、匿名记录 user 为空，NULL 不参与唯一性比较，
+        # 两个约束分别只作用于登录 / 匿名记录 (MySQL 不支持带条件的唯一约束)
         indexes = [
             models.Index(fields=['content_type', 'object_id']),
             models.Index(fields=['session_key', 'content_type', 'object_id']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'content_type', 'object_id'], name='uniq_reaction_user',
+            ),
+            models.UniqueConstraint(
+                fields=['session_key', 'content_type', 'object_id'], name='uniq_reaction_session',
+            ),
+        ]
 
     def __str__(self):
         who = self.user.username if self.user else f"Anon({self.session_key})"
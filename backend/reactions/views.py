@@ -1,8 +1,11 @@
-from django.contrib.contenttypes.models import ContentType
-from django.db.models import F
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
 from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from articles.registry import registry
+from articles.utils import parse_article_items
+from .lookups import bump_owner_version, get_my_reactions, get_reaction_owner
 from .models import UserReaction
 
 class ReactionViewSet(viewsets.ViewSet):
@@ -14,6 +17,8 @@ class ReactionViewSet(viewsets.ViewSet):
         "id": 1,              # 文章ID
         "type": "like"        # or "dislike"
     }
+    API: GET /api/reactions/mine/?items=news:1,paper:3
+    -> {"news:1": "like"}  当前访客的点赞/点踩状态，没有记录的文章不返回
     """
     permission_classes = [permissions.AllowAny] # 允许匿名
 
@@ -27,85 +32,104 @@ class ReactionViewSet(viewsets.ViewSet):
         if reaction_type not in ['like', 'dislike']:
             return Response({"error": "Invalid type"}, status=400)
 
-        # 2. 获取 ContentType
-        try:
-            ct = ContentType.objects.get(app_label='articles', model=model_name)
-        except ContentType.DoesNotExist:
+        # 2. 查找文章类型 (进程内注册表，不查 ContentType 表)
+        article_type = registry.get(model_name)
+        if article_type is None or not article_type.has_reactions:
             return Response({"error": "Object not found"}, status=404)
-
-        model_class = ct.model_class()
         try:
-            obj = model_class.objects.get(id=object_id)
-        except model_class.DoesNotExist:
+            object_id = int(object_id)
+        except (TypeError, ValueError):
             return Response({"error": "Object not found"}, status=404)
 
         # 3. 识别用户 (Session 策略)
-        user = request.user if request.user.is_authenticated else None
-        if not request.session.session_key:
-            request.session.save() # 强制生成 session_key
-        session_key = request.session.session_key
-
-        # 查找现有记录
-        filter_kwargs = {
-            'content_type': ct, 
-            'object_id': object_id,
-        }
-        if user:
-            filter_kwargs['user'] = user
+        # 登录用户按 user 唯一，匿名访客按 session_key 唯一 (见 UserReaction.Meta.constraints)
+        if request.user.is_authenticated:
+            owner = {'user': request.user}
         else:
-            filter_kwargs['session_key'] = session_key
+            if not request.session.session_key:
+                request.session.save() # 强制生成 session_key
+            owner = {'session_key': request.session.session_key}
+
+        try:
+            result = toggle_reaction(article_type, object_id, owner, reaction_type)
+        except ArticleNotFound:
+            return Response({"error": "Object not found"}, status=404)
+        bump_owner_version(owner)
+        return Response(result)
+
+    @action(detail=False, methods=['get'])
+    def mine(self, request):
+        items = parse_article_items(request.query_params.get('items'))
+        if not items:
+            return Response({"error": "Missing items"}, status=400)
+        return Response(get_my_reactions(get_reaction_owner(request), items))
+
+
+class ArticleNotFound(Exception):
+    pass
+
 
-        existing_reaction = UserReaction.objects.filter(**filter_kwargs).first()
+def counter_delta(field, delta):
+    """计数器增减表达式，减少时不低于 0 (无符号列直接相减会越界报错)"""
+    if delta > 0:
+        return F(field) + delta
+    return Case(
+        When(**{f'{field}__gte': -delta}, then=F(field) + delta),
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
 
-        # 4. 逻辑处理
-        # 需要同时更新 UserReaction 表 和 文章本身的 likes/dislikes 计数
-        
+
+def toggle_reaction(article_type, object_id, owner, reaction_type):
+    """
+    在一个事务内完成点赞/点踩切换，不加载文章
+    - SELECT ... FOR UPDATE 锁定已有记录，同一访客的并发请求串行执行
+    - 首次创建时两个并发请求都查不到记录，唯一约束保证只有一个插入成功，另一个重试后按已有记录处理
+      (InnoDB 下也可能表现为间隙锁死锁，同样重试一次)
+    - 文章计数用一条条件 UPDATE 更新，受影响行数为 0 说明文章不存在或未发布，整个事务回滚
+    - MySQL 没有 UPDATE ... RETURNING，在同一事务内按主键读取最新计数
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                return _toggle_reaction(article_type, object_id, owner, reaction_type)
+        except (IntegrityError, OperationalError):
+            if attempt:
+                raise
+
+
+def _toggle_reaction(article_type, object_id, owner, reaction_type):
+    ct_id = article_type.content_type_id
+    reactions = UserReaction.objects.filter(content_type_id=ct_id, object_id=object_id, **owner)
+    existing = reactions.select_for_update().values_list('pk', 'reaction_type').first()
+
+    deltas = {}
+    if existing is None:
+        # 情况C: 第一次操作 -> 创建
+        UserReaction.objects.create(
+            content_type_id=ct_id, object_id=object_id, reaction_type=reaction_type, **owner
+        )
+        deltas[reaction_type] = 1
         response_data = {"action": "created", "current": reaction_type}
+    elif existing[1] == reaction_type:
+        # 情况A: 点击了相同的按钮 -> 取消 (删除记录)
+        UserReaction.objects.filter(pk=existing[0]).delete()
+        deltas[reaction_type] = -1
+        response_data = {"action": "removed", "current": None}
+    else:
+        # 情况B: 点击了相反的按钮 -> 切换 (更新记录)
+        UserReaction.objects.filter(pk=existing[0]).update(reaction_type=reaction_type)
+        deltas[reaction_type] = 1
+        deltas[existing[1]] = -1
+        response_data = {"action": "switched", "current": reaction_type}
 
-        if existing_reaction:
-            if existing_reaction.reaction_type == reaction_type:
-                # 情况A: 点击了相同的按钮 -> 取消 (删除记录)
-                existing_reaction.delete()
-                # 更新文章计数 (-1)
-                if reaction_type == 'like':
-                    obj.likes = F('likes') - 1
-                else:
-                    obj.dislikes = F('dislikes') - 1
-                response_data["action"] = "removed"
-                response_data["current"] = None
-            else:
-                # 情况B: 点击了相反的按钮 -> 切换 (更新记录)
-                old_type = existing_reaction.reaction_type
-                existing_reaction.reaction_type = reaction_type
-                existing_reaction.save()
-                # 更新文章计数 (+1 new, -1 old)
-                if reaction_type == 'like':
-                    obj.likes = F('likes') + 1
-                    obj.dislikes = F('dislikes') - 1
-                else:
-                    obj.likes = F('likes') - 1
-                    obj.dislikes = F('dislikes') + 1
-                response_data["action"] = "switched"
-        else:
-            # 情况C: 第一次操作 -> 创建
-            UserReaction.objects.create(
-                user=user,
-                session_key=session_key,
-                content_type=ct,
-                object_id=object_id,
-                reaction_type=reaction_type
-            )
-            # 更新文章计数 (+1)
-            if reaction_type == 'like':
-                obj.likes = F('likes') + 1
-            else:
-                obj.dislikes = F('dislikes') + 1
-
-        obj.save(update_fields=['likes', 'dislikes'])
-        obj.refresh_from_db()
-        
-        return Response({
-            **response_data,
-            "likes": obj.likes,
-            "dislikes": obj.dislikes
-        })
\ No newline at end of file
+    fields = {UserReaction.LIKE: 'likes', UserReaction.DISLIKE: 'dislikes'}
+    articles = article_type.published().filter(pk=object_id)
+    updated = articles.update(**{
+        fields[kind]: counter_delta(fields[kind], delta) for kind, delta in deltas.items()
+    })
+    if not updated:
+        raise ArticleNotFound
+
+    counts = articles.values('likes', 'dislikes').get()
+    return {**response_data, **counts}
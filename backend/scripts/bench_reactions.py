@@ -0,0 +1,167 @@
+"""
+点赞/点踩接口压测
+
+在临时测试库中运行 (与 manage.py test 相同的建库方式，结束后删除)，不影响正式数据：
+    python scripts/bench_reactions.py --threads 16 --toggles 50
+
+输出：
+- 单次切换的 SQL 条数 (含 Session 读写)
+- 并发切换的延迟分位数和吞吐量
+- 并发结束后文章计数与 UserReaction 记录是否一致、是否有重复记录
+
+SQLite 的写操作是串行的，并发结果只有在 MySQL 下才有参考意义。
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import django
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+# 设置 Django 环境
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.test import APIClient
+
+from articles.models import News
+from reactions.models import UserReaction
+
+
+def toggle(client, article, reaction_type):
+    started = time.perf_counter()
+    response = client.post(
+        '/api/reactions/toggle/',
+        {'model': 'news', 'id': article.pk, 'type': reaction_type},
+        format='json',
+    )
+    return response, time.perf_counter() - started
+
+
+def count_queries(article):
+    """单线程下各分支的 SQL 条数"""
+    client = APIClient()
+    toggle(client, article, 'like') # 预热：建立 Session
+    toggle(client, article, 'like')
+    result = {}
+    for label, reaction_type in [('created', 'like'), ('switched', 'dislike'), ('removed', 'dislike')]:
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = toggle(client, article, reaction_type)
+        assert response.data['action'] == label, response.data
+        result[label] = len(queries)
+    return result
+
+
+def run_concurrent(article, threads, toggles):
+    """
+    每个线程一个匿名 Session，交替点赞 / 点踩 / 重复点击；
+    另外每个线程的第一个请求由两个线程同时发出，模拟双击
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads * 2)
+    kinds = ['like', 'like', 'dislike', 'like', 'dislike', 'dislike']
+
+    def worker(client, offset, count):
+        local = []
+        try:
+            barrier.wait()
+            for i in range(count):
+                try:
+                    response, elapsed = toggle(client, article, kinds[(offset + i) % len(kinds)])
+                except Exception as exc:
+                    errors.append(type(exc).__name__)
+                    continue
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+                local.append(elapsed)
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local)
+
+    workers = []
+    for _ in range(threads):
+        client = APIClient()
+        client.post('/api/reactions/toggle/', {'model': 'news', 'id': 0, 'type': 'like'}, format='json')
+        # 同一个 Session 两个线程：第一个请求同时发出 (双击)，之后各自继续
+        workers.append(threading.Thread(target=worker, args=(client, 0, toggles)))
+        workers.append(threading.Thread(target=worker, args=(client, 0, 1)))
+
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def check_consistency(article):
+    article.refresh_from_db()
+    ct = ContentType.objects.get_for_model(News)
+    reactions = UserReaction.objects.filter(content_type=ct, object_id=article.pk)
+    actual = dict(reactions.values_list('reaction_type').annotate(n=Count('pk')))
+    duplicates = (
+        reactions.values('session_key').annotate(n=Count('pk')).filter(n__gt=1).count()
+    )
+    return {
+        'likes': (article.likes, actual.get('like', 0)),
+        'dislikes': (article.dislikes, actual.get('dislike', 0)),
+        'duplicates': duplicates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='点赞/点踩接口压测')
+    parser.add_argument('--threads', type=int, default=8, help='并发 Session 数')
+    parser.add_argument('--toggles', type=int, default=30, help='每个 Session 的切换次数')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['testserver']
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        article = News.objects.create(title='bench', is_published=True)
+
+        print("=" * 60)
+        print(f"数据库: {connection.vendor}")
+        print("单次切换 SQL 条数:")
+        for label, n in count_queries(article).items():
+            print(f"  {label:<10} {n}")
+
+        latencies, errors, elapsed = run_concurrent(article, args.threads, args.toggles)
+        latencies.sort()
+        print(f"并发: {args.threads} 个 Session x {args.toggles} 次 (另加 {args.threads} 次双击)")
+        print(f"  请求数   {len(latencies) + len(errors)}，失败 {len(errors)} {sorted(set(map(str, errors)))}")
+        print(f"  吞吐量   {len(latencies) / elapsed:.1f} 次/秒")
+        print(f"  p50      {statistics.median(latencies) * 1000:.1f} ms")
+        print(f"  p95      {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+        print(f"  max      {latencies[-1] * 1000:.1f} ms")
+
+        result = check_consistency(article)
+        ok = (result['likes'][0] == result['likes'][1]
+              and result['dislikes'][0] == result['dislikes'][1]
+              and result['duplicates'] == 0)
+        print("一致性:")
+        print(f"  likes    文章 {result['likes'][0]} / 记录 {result['likes'][1]}")
+        print(f"  dislikes 文章 {result['dislikes'][0]} / 记录 {result['dislikes'][1]}")
+        print(f"  重复记录 {result['duplicates']}")
+        print("  ✓ 一致" if ok else "  ✗ 不一致")
+        print("=" * 60)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,149 @@
+"""
+旧库 (shuwei) → 新库 (shuwei_dev) 数据迁移
+
+    python scripts/migrate_data.py                      # 迁移全部表 (运行前确认)
+    python scripts/migrate_data.py --yes --workers 4    # 不询问，4 个进程并行
+    python scripts/migrate_data.py --tables 通讯 书评   # 只迁移指定的表
+    python scripts/migrate_data.py --restart            # 忽略检查点，从头开始
+    python scripts/migrate_data.py --list               # 列出可迁移的表
+    python scripts/migrate_data.py --sync --yes         # 增量同步 (可反复执行)
+    python scripts/migrate_data.py --sync --dry-run     # 只报告将写入 / 删除的行，不修改新库
+
+- 每张表的字段对应关系在 TABLES 中声明 (TableSpec)，迁移逻辑只有一份
+- 旧表按主键顺序流式读取 (服务端游标)，按批 bulk_create，每批一个事务
+- 没有依赖关系的表在进程池中并行迁移；书评依赖书评分类、经训章节依赖经训，依赖完成后才开始
+- 每批提交后写入检查点 (scripts/.migrate_checkpoints/<表>.json)，中断后重新运行从检查点继续；
+  新库中已存在的 id 跳过，检查点写入前中断也不会重复插入
+- 整批写入失败时逐行重试，失败的行记录在检查点和结束时的报告中，不中断迁移
+- 结束时输出每张表的行数和吞吐量 (行/秒)
+
+增量同步 (--sync)：全量迁移后反复执行，让新库追上旧库，切换时编辑只需暂停一次同步的时间
+- 有 `更新时间` 列的表只读取水位 (上次同步到的最大更新时间，往前留 --overlap-seconds) 之后变更的行，按批 upsert；
+  首次同步的水位取全量迁移开始时旧表的最大更新时间 (记录在迁移检查点中)，
+  迁移期间和迁移之后的编辑都会被读取；新库中的时间会被后台处理任务改写，不用作水位
+- 按 id 分块比较两边的 id 集合 (只读主键)，补插入缺少的行，删除旧库中已删除的行 (--keep-deleted 时不删除)；
+  只删除从旧表迁移 / 同步过来的 id 范围 (迁移检查点的首尾 id，同步时随旧表扩大) 内的行，
+  新库自己创建的行不受影响；没有迁移检查点时第一次同步不删除
+- 没有更新时间列的表 (书评分类 / 经训章节 / 联系我们 / 用户反应) 只同步新增和删除，--full 时全部重新写入
+- 水位保存在 scripts/.migrate_checkpoints/sync-<表>.json，写入失败的批次不推进水位，下次重新读取
+切换步骤：暂停编辑 → 最后执行一次 --sync (只有最近几分钟的变更) → 切换到新站点
+
+bulk_create 不调用 save()：迁移的图片 / PDF 不会登记处理任务，
+迁移完成后执行 `python manage.py process_media --enqueue-missing-variants` 和
+`python manage.py extract_documents` 补齐。
+"""
+
+import argparse
+import json
 import os
 import sys
-import django
-from django.db import transaction
-from datetime import datetime
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
 
+import django
 
-from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 # 设置 Django 环境
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from django.db import connections
-def get_old_data(table_name, db='old_db'):
-    """从旧数据库获取数据"""
+from django.apps import apps
+from django.db import connections, transaction
+from django.utils import timezone
+
+from articles.caching import bump_model_version
+
+# 从旧数据库每次取回的行数
+CHUNK_SIZE = 2000
+
+CHECKPOINT_DIR = Path(__file__).resolve().parent / '.migrate_checkpoints'
+
+# 增量同步的水位列
+WATERMARK_COLUMN = '更新时间'
+
+
+def get_old_chunks(table_name, columns=None, db='old_db', chunk_size=CHUNK_SIZE, after_id=None, since=None):
+    """
+    从旧数据库按块读取数据 (生成器)，每次产出最多 chunk_size 行 (字典列表)
+    MySQL 使用服务端游标 (SSCursor)：结果集留在服务器上逐块取回，
+    内容表 (通讯 / 书评 / 经训章节 ...) 的正文不会一次性全部读入内存
+    columns: 只读取这些列，None 表示全部列
+    after_id: 只读取 id 大于该值的行 (从检查点继续)
+    since: (列名, 值)，只读取该列大于等于该值的行 (增量同步)
+    """
+    connection = connections[db]
+    connection.ensure_connection()
+    if connection.vendor == 'mysql':
+        from MySQLdb.cursors import SSCursor
+        cursor = connection.connection.cursor(SSCursor)
+    else:
+        cursor = connection.connection.cursor()
+
+    select = ', '.join(f'`{column}`' for column in columns) if columns else '*'
+    conditions, params = [], []
+    if after_id is not None:
+        conditions.append("`id` > %s")
+        params.append(after_id)
+    if since is not None:
+        conditions.append(f"`{since[0]}` >= %s")
+        params.append(since[1])
+    sql = f"SELECT {select} FROM `{table_name}`"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    if connection.vendor != 'mysql':
+        # 原始游标的参数占位符 (SQLite 为 ?)
+        sql = sql.replace('%s', '?')
+    try:
+        # 按主键顺序读取，InnoDB 按聚簇索引顺序扫描，不需要额外排序
+        cursor.execute(sql + " ORDER BY `id`", params)
+        names = [col[0] for col in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [dict(zip(names, row)) for row in rows]
+    finally:
+        # 服务端游标必须读完或关闭后，同一连接才能执行下一条查询
+        cursor.close()
+
+
+def get_old_data(table_name, columns=None, db='old_db', chunk_size=CHUNK_SIZE):
+    """从旧数据库逐行读取数据 (生成器，内部按块取回，见 get_old_chunks)"""
+    for chunk in get_old_chunks(table_name, columns, db, chunk_size):
+        yield from chunk
+
+
+def get_old_ids(table_name, after_id=None, limit=CHUNK_SIZE, db='old_db'):
+    """旧表中 id 大于 after_id 的前 limit 个 id (按 id 排序，只读主键索引)"""
+    sql = f"SELECT `id` FROM `{table_name}`"
+    params = []
+    if after_id is not None:
+        sql += " WHERE `id` > %s"
+        params.append(after_id)
+    with connections[db].cursor() as cursor:
+        cursor.execute(sql + " ORDER BY `id` LIMIT %s", params + [limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_old_max(table_name, column, function='MAX', db='old_db'):
+    """旧表中某列的最大值 (function='MIN' 时为最小值)"""
+    with connections[db].cursor() as cursor:
+        cursor.execute(f"SELECT {function}(`{column}`) FROM `{table_name}`")
+        return cursor.fetchone()[0]
+
+
+def get_old_rows(table_name, columns, ids, db='old_db'):
+    """按 id 读取旧表中的行"""
+    select = ', '.join(f'`{column}`' for column in columns)
+    placeholders = ', '.join(['%s'] * len(ids))
     with connections[db].cursor() as cursor:
-        cursor.execute(f"SELECT * FROM `{table_name}`")
-        columns = [col[0] for col in cursor.description]
-        rows = cursor.fetchall()
-        return [dict(zip(columns, row)) for row in rows]
+        cursor.execute(f"SELECT {select} FROM `{table_name}` WHERE `id` IN ({placeholders}) ORDER BY `id`", ids)
+        names = [col[0] for col in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
 
 
 def safe_get(item, key, default=None):
@@ -30,583 +154,697 @@ def safe_get(item, key, default=None):
     return value
 
 
-def migrate_news():
-    """迁移通讯数据"""
-    from articles.models import News
-    
-    print("开始迁移通讯数据...")
-    old_data = get_old_data('home_通讯')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                News.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    source=safe_get(item, '资源', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条通讯数据")
-    return success
-
-
-def migrate_book_info():
-    """迁移书讯数据"""
-    from articles.models import BookInfo
-    
-    print("开始迁移书讯数据...")
-    old_data = get_old_data('home_书讯')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                BookInfo.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    author_intro=safe_get(item, '作者简介', ''),
-                    catalog=safe_get(item, '目录', ''),
-                    preface=safe_get(item, '前言', ''),
-                    isbn=safe_get(item, 'ISBN', ''),
-                    publisher=safe_get(item, '出版社', ''),
-                    publish_date=safe_get(item, '出版年'),
-                    price=safe_get(item, '定价', ''),
-                    pages=safe_get(item, '页数'),
-                    binding=safe_get(item, '装帧', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条书讯数据")
-    return success
-
-
-def migrate_book_reviews():
-    """迁移书评数据"""
-    from articles.models import BookReview, BookReviewCategory
-    
-    # 先迁移分类
-    print("开始迁移书评分类...")
-    old_categories = get_old_data('home_书评_分类')
-    
-    category_success = 0
-    with transaction.atomic():
-        for cat in old_categories:
-            try:
-                BookReviewCategory.objects.create(
-                    id=cat['id'],
-                    name=safe_get(cat, '名称', ''),
-                    slug=safe_get(cat, '名称', '').lower().replace(' ', '-'),
-                    description=''
-                )
-                category_success += 1
-            except Exception as e:
-                print(f"  ✗ 分类 ID {cat['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {category_success}/{len(old_categories)} 个书评分类")
-    
-    # 迁移书评
-    print("开始迁移书评数据...")
-    old_data = get_old_data('home_书评')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                BookReview.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    source=safe_get(item, '出处', ''),
-                    book_publish_date=safe_get(item, '书籍出版日期'),
-                    category_id=safe_get(item, '分类_id'),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条书评数据")
-    return success
-
-
-def migrate_opinions():
-    """迁移观点数据"""
-    from articles.models import Opinion
-    
-    print("开始迁移观点数据...")
-    old_data = get_old_data('home_观点')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                Opinion.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    source=safe_get(item, '出处', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条观点数据")
-    return success
-
-
-def migrate_literature():
-    """迁移文艺数据"""
-    from articles.models import Literature
-    
-    print("开始迁移文艺数据...")
-    old_data = get_old_data('home_文艺')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                Literature.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    source=safe_get(item, '出处', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条文艺数据")
-    return success
-
-
-def migrate_qa():
-    """迁移问答数据"""
-    from articles.models import QA
-    
-    print("开始迁移问答数据...")
-    old_data = get_old_data('home_问答')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                QA.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    is_approved=safe_get(item, '通过', False),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date())
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条问答数据")
-    return success
-
-
-def migrate_translations():
-    """迁移译林数据"""
-    from articles.models import Translation
-    
-    print("开始迁移译林数据...")
-    old_data = get_old_data('home_译林')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                Translation.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    original_title=safe_get(item, '原文标题', ''),
-                    original_author=safe_get(item, '原文作者', ''),
-                    original_publish_date=safe_get(item, '原文出版日期'),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条译林数据")
-    return success
-
-
-def migrate_history():
-    """迁移文史数据"""
-    from articles.models import History
-    
-    print("开始迁移文史数据...")
-    old_data = get_old_data('home_文史')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                History.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    source=safe_get(item, '资源', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条文史数据")
-    return success
-
-
-def migrate_papers():
-    """迁移论文数据"""
-    from articles.models import Paper
-    
-    print("开始迁移论文数据...")
-    old_data = get_old_data('home_论文')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                Paper.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    author=safe_get(item, '作者', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', ''),
-                    document=safe_get(item, '文档', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条论文数据")
-    return success
-
-
-def migrate_classic_books():
-    """迁移古籍数据"""
-    from articles.models import ClassicBook
-    
-    print("开始迁移古籍数据...")
-    old_data = get_old_data('home_古籍')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                ClassicBook.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    author=safe_get(item, '作者', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    document=safe_get(item, '文档', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条古籍数据")
-    return success
-
-
-def migrate_library():
-    """迁移书库数据"""
-    from articles.models import Library
-    
-    print("开始迁移书库数据...")
-    old_data = get_old_data('home_书库')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                Library.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    content=safe_get(item, '内容', ''),
-                    author=safe_get(item, '作者', ''),
-                    author_intro=safe_get(item, '作者简介', ''),
-                    content_intro=safe_get(item, '内容简介', ''),
-                    isbn=safe_get(item, 'ISBN', ''),
-                    publish_date=safe_get(item, '出版日期'),
-                    is_published=safe_get(item, '发布状态', False),
-                    total_views=safe_get(item, '总浏览量', 0),
-                    today_views=safe_get(item, '今日浏览量', 0),
-                    likes=safe_get(item, 'likes', 0),
-                    dislikes=safe_get(item, 'dislikes', 0),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    last_view_date=safe_get(item, '最后统计日期', datetime.now().date()),
-                    image=safe_get(item, '图片', ''),
-                    document=safe_get(item, '文档', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条书库数据")
-    return success
-
-
-def migrate_scriptures():
-    """迁移经训数据"""
-    from articles.models import Scripture, ScriptureChapter
-    
-    print("开始迁移经训数据...")
-    old_scriptures = get_old_data('home_经训')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_scriptures:
-            try:
-                Scripture.objects.create(
-                    id=item['id'],
-                    title=safe_get(item, '标题', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    created_at=safe_get(item, '更新时间', datetime.now()),
-                    updated_at=safe_get(item, '更新时间', datetime.now()),
-                    image=safe_get(item, '图片', '')
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ 经训 ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_scriptures)} 条经训数据")
-    
-    print("开始迁移经训章节数据...")
-    old_chapters = get_old_data('home_章节_经训')
-    
-    chapter_success = 0
-    with transaction.atomic():
-        for idx, item in enumerate(old_chapters):
-            try:
-                ScriptureChapter.objects.create(
-                    id=item['id'],
-                    scripture_id=item['经训_id'],
-                    title=safe_get(item, '章节', ''),
-                    content=safe_get(item, '内容', ''),
-                    is_published=safe_get(item, '发布状态', False),
-                    order=idx,
-                    created_at=datetime.now(),
-                    updated_at=datetime.now()
-                )
-                chapter_success += 1
-            except Exception as e:
-                print(f"  ✗ 章节 ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {chapter_success}/{len(old_chapters)} 条经训章节数据")
-    return success + chapter_success
-
-
-def migrate_contacts():
-    """迁移联系我们数据"""
-    from articles.models import Contact
-    
-    print("开始迁移联系我们数据...")
-    old_data = get_old_data('home_contact')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                Contact.objects.create(
-                    id=item['id'],
-                    email=safe_get(item, '邮箱', ''),
-                    subject=safe_get(item, '主题', ''),
-                    message=safe_get(item, '内容', ''),
-                    created_at=datetime.now()
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条联系我们数据")
-    return success
-
-
-def migrate_reactions():
-    """迁移用户反应数据"""
-    from reactions.models import UserReaction
-    
-    print("开始迁移用户反应数据...")
-    old_data = get_old_data('home_userreaction')
-    
-    success = 0
-    with transaction.atomic():
-        for item in old_data:
-            try:
-                UserReaction.objects.create(
-                    id=item['id'],
-                    user_session=item['user_session'],
-                    reaction_type=item['reaction_type'],
-                    content_type_id=item['content_type_id'],
-                    object_id=item['object_id'],
-                    created_at=item['created_at']
-                )
-                success += 1
-            except Exception as e:
-                print(f"  ✗ ID {item['id']} 失败: {str(e)}")
-    
-    print(f"✓ 成功迁移 {success}/{len(old_data)} 条反应数据")
-    return success
-
-
-def main():
-    """主函数"""
-    print("=" * 70)
-    print("数据迁移: shuwei → shuwei_dev")
-    print("=" * 70)
-    
-    migrations = [
-        ('通讯', migrate_news),
-        ('书讯', migrate_book_info),
-        ('书评', migrate_book_reviews),
-        ('观点', migrate_opinions),
-        ('文艺', migrate_literature),
-        ('问答', migrate_qa),
-        ('译林', migrate_translations),
-        ('文史', migrate_history),
-        ('论文', migrate_papers),
-        ('古籍', migrate_classic_books),
-        ('书库', migrate_library),
-        ('经训', migrate_scriptures),
-        ('联系我们', migrate_contacts),
-        ('用户反应', migrate_reactions),
+# ==================== 表定义 ====================
+
+# 字段的取值方式 (TableSpec.fields 的值)：
+#   '列名'                    旧表的列，为 NULL 时取 None
+#   ('列名', 默认值)          为 NULL 时取默认值；默认值是函数时调用它 (例如 timezone.now)
+#   ('列名', 默认值, 转换)    取值后再经过转换函数
+#   (None, 默认值)            旧表没有对应的列，直接取默认值
+#   ROW_INDEX                 该行在旧表中的序号 (按 id 排序，从 0 开始)
+ROW_INDEX = object()
+
+
+def to_slug(name):
+    return name.lower().replace(' ', '-')
+
+
+TEXT_FIELDS = {
+    'title': ('标题', ''),
+    'content': ('内容', ''),
+    'author': ('作者', ''),
+}
+
+PUBLISH_FIELDS = {
+    'is_published': ('发布状态', False),
+    'created_at': ('更新时间', timezone.now),
+    'updated_at': ('更新时间', timezone.now),
+}
+
+STAT_FIELDS = {
+    **PUBLISH_FIELDS,
+    'total_views': ('总浏览量', 0),
+    'today_views': ('今日浏览量', 0),
+    'likes': ('likes', 0),
+    'dislikes': ('dislikes', 0),
+    'last_view_date': ('最后统计日期', timezone.localdate),
+}
+
+IMAGE_FIELDS = {
+    'image': ('图片', ''),
+}
+
+
+class TableSpec:
+    """
+    一张旧表 → 一个模型
+    name: 显示名，也是 --tables 参数和检查点文件名
+    depends_on: 必须先迁移完成的表 (外键)
+    """
+
+    def __init__(self, name, table, model, fields, depends_on=()):
+        self.name = name
+        self.table = table
+        self.model_label = model
+        self.fields = fields
+        self.depends_on = tuple(depends_on)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def watermark(self):
+        """增量同步的水位列，旧表没有更新时间列时为 None"""
+        return WATERMARK_COLUMN if WATERMARK_COLUMN in self.columns else None
+
+    @property
+    def update_fields(self):
+        """增量同步时覆盖的字段：取自旧表列的字段 (序号和只有默认值的字段保留新库的值)"""
+        return [
+            field for field, source in self.fields.items()
+            if isinstance(source, str) or (isinstance(source, tuple) and source[0])
+        ]
+
+    @property
+    def columns(self):
+        """需要从旧表读取的列"""
+        columns = ['id']
+        for source in self.fields.values():
+            column = source if isinstance(source, str) else None
+            if isinstance(source, tuple):
+                column = source[0]
+            if column and column not in columns:
+                columns.append(column)
+        return columns
+
+    def build(self, item, index=None):
+        """旧表的一行 → 未保存的模型实例 (index: 该行在旧表中的序号，用于 ROW_INDEX 字段)"""
+        values = {'id': item['id']}
+        for field, source in self.fields.items():
+            if source is ROW_INDEX:
+                value = index
+            elif isinstance(source, str):
+                value = item.get(source)
+            else:
+                column, default, *convert = source
+                value = safe_get(item, column, None) if column else None
+                if value is None:
+                    value = default() if callable(default) else default
+                elif convert:
+                    value = convert[0](value)
+            if isinstance(value, datetime) and timezone.is_naive(value):
+                # 原始游标返回的时间不带时区，按当前时区解释 (与 Django 保存无时区时间的行为一致)
+                value = timezone.make_aware(value)
+            values[field] = value
+        return self.model(**values)
+
+    def __repr__(self):
+        return f'<TableSpec {self.name}: {self.table} -> {self.model_label}>'
+
+
+TABLES = [
+    TableSpec('通讯', 'home_通讯', 'articles.News', {
+        **TEXT_FIELDS, 'source': ('资源', ''), **STAT_FIELDS, **IMAGE_FIELDS,
+    }),
+    TableSpec('书讯', 'home_书讯', 'articles.BookInfo', {
+        **TEXT_FIELDS,
+        'author_intro': ('作者简介', ''),
+        'catalog': ('目录', ''),
+        'preface': ('前言', ''),
+        'isbn': ('ISBN', ''),
+        'publisher': ('出版社', ''),
+        'publish_date': '出版年',
+        'price': ('定价', ''),
+        'pages': '页数',
+        'binding': ('装帧', ''),
+        **STAT_FIELDS, **IMAGE_FIELDS,
+    }),
+    TableSpec('书评分类', 'home_书评_分类', 'articles.BookReviewCategory', {
+        'name': ('名称', ''),
+        'slug': ('名称', '', to_slug),
+        'description': (None, ''),
+    }),
+    TableSpec('书评', 'home_书评', 'articles.BookReview', {
+        **TEXT_FIELDS,
+        'source': ('出处', ''),
+        'book_publish_date': '书籍出版日期',
+        'category_id': '分类_id',
+        **STAT_FIELDS, **IMAGE_FIELDS,
+    }, depends_on=['书评分类']),
+    TableSpec('观点', 'home_观点', 'articles.Opinion', {
+        **TEXT_FIELDS, 'source': ('出处', ''), **STAT_FIELDS, **IMAGE_FIELDS,
+    }),
+    TableSpec('文艺', 'home_文艺', 'articles.Literature', {
+        **TEXT_FIELDS, 'source': ('出处', ''), **STAT_FIELDS, **IMAGE_FIELDS,
+    }),
+    TableSpec('问答', 'home_问答', 'articles.QA', {
+        'title': ('标题', ''),
+        'content': ('内容', ''),
+        'is_approved': ('通过', False),
+        **STAT_FIELDS,
+    }),
+    TableSpec('译林', 'home_译林', 'articles.Translation', {
+        **TEXT_FIELDS,
+        'original_title': ('原文标题', ''),
+        'original_author': ('原文作者', ''),
+        'original_publish_date': '原文出版日期',
+        **STAT_FIELDS, **IMAGE_FIELDS,
+    }),
+    TableSpec('文史', 'home_文史', 'articles.History', {
+        **TEXT_FIELDS, 'source': ('资源', ''), **STAT_FIELDS, **IMAGE_FIELDS,
+    }),
+    TableSpec('论文', 'home_论文', 'articles.Paper', {
+        'title': ('标题', ''),
+        'author': ('作者', ''),
+        **STAT_FIELDS, **IMAGE_FIELDS,
+        'document': ('文档', ''),
+    }),
+    TableSpec('古籍', 'home_古籍', 'articles.ClassicBook', {
+        'title': ('标题', ''),
+        'author': ('作者', ''),
+        **STAT_FIELDS,
+        'document': ('文档', ''),
+    }),
+    TableSpec('书库', 'home_书库', 'articles.Library', {
+        **TEXT_FIELDS,
+        'author_intro': ('作者简介', ''),
+        'content_intro': ('内容简介', ''),
+        'isbn': ('ISBN', ''),
+        'publish_date': '出版日期',
+        **STAT_FIELDS, **IMAGE_FIELDS,
+        'document': ('文档', ''),
+    }),
+    TableSpec('经训', 'home_经训', 'articles.Scripture', {
+        'title': ('标题', ''), **PUBLISH_FIELDS, **IMAGE_FIELDS,
+    }),
+    TableSpec('经训章节', 'home_章节_经训', 'articles.ScriptureChapter', {
+        'scripture_id': '经训_id',
+        'title': ('章节', ''),
+        'content': ('内容', ''),
+        'is_published': ('发布状态', False),
+        'order': ROW_INDEX,
+        'created_at': (None, timezone.now),
+        'updated_at': (None, timezone.now),
+    }, depends_on=['经训']),
+    TableSpec('联系我们', 'home_contact', 'articles.Contact', {
+        'email': ('邮箱', ''),
+        'subject': ('主题', ''),
+        'message': ('内容', ''),
+        'created_at': (None, timezone.now),
+    }),
+    TableSpec('用户反应', 'home_userreaction', 'reactions.UserReaction', {
+        'session_key': 'user_session',
+        'reaction_type': 'reaction_type',
+        'content_type_id': 'content_type_id',
+        'object_id': 'object_id',
+        'created_at': 'created_at',
+    }),
+]
+
+TABLES_BY_NAME = {spec.name: spec for spec in TABLES}
+
+
+# ==================== 检查点 ====================
+
+def checkpoint_path(checkpoint_dir, name):
+    return Path(checkpoint_dir) / f'{name}.json'
+
+
+def load_checkpoint(checkpoint_dir, name):
+    try:
+        with open(checkpoint_path(checkpoint_dir, name), encoding='utf-8') as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(checkpoint_dir, name, state):
+    """先写临时文件再改名，中断时不会留下写了一半的检查点"""
+    path = checkpoint_path(checkpoint_dir, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as fp:
+        json.dump(state, fp, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def clear_checkpoints(checkpoint_dir, names):
+    for name in names:
+        checkpoint_path(checkpoint_dir, name).unlink(missing_ok=True)
+
+
+# ==================== 迁移 ====================
+
+@contextmanager
+def keep_timestamps(model):
+    """
+    临时关闭 auto_now / auto_now_add，保留旧表中的时间
+    (只在迁移子进程中修改字段定义，不影响网站进程)
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
     ]
-    
-    total_migrated = 0
+    for field, _auto_now, _auto_now_add in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def existing_ids(model, objects):
+    return set(model.objects.filter(pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True))
+
+
+def bulk_write(model, objects, **options):
+    """bulk_create 一批实例，整批失败时逐行写入，找出出错的行；返回 [(id, 错误), ...]"""
+    if not objects:
+        return []
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objects, **options)
+        return []
+    except Exception:
+        pass
+
     failed = []
-    
-    for name, func in migrations:
-        print(f"\n{'='*70}")
+    for obj in objects:
         try:
-            count = func()
-            total_migrated += count
+            with transaction.atomic():
+                model.objects.bulk_create([obj], **options)
         except Exception as e:
-            print(f"\n✗ {name} 迁移失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            failed.append(name)
-            
-            response = input(f"\n是否继续迁移其他数据？(yes/no): ")
-            if response.lower() != 'yes':
-                break
-    
+            failed.append((obj.pk, str(e)))
+    return failed
+
+
+def insert_batch(model, objects):
+    """
+    写入一批实例，返回 (新插入数, 已存在数, [(id, 错误), ...])
+    新库中已有的 id 跳过
+    """
+    existing = existing_ids(model, objects)
+    objects = [obj for obj in objects if obj.pk not in existing]
+    failed = bulk_write(model, objects)
+    return len(objects) - len(failed), len(existing), failed
+
+
+def upsert_batch(model, objects, update_fields):
+    """
+    写入或覆盖一批实例 (INSERT ... ON DUPLICATE KEY UPDATE)，返回 (新插入数, 更新数, [(id, 错误), ...])
+    """
+    existing = existing_ids(model, objects)
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    if connections[model.objects.db].features.supports_update_conflicts_with_target:
+        # MySQL 不能指定冲突列 (按任一唯一索引冲突)，SQLite / PostgreSQL 需要指定
+        options['unique_fields'] = [model._meta.pk.name]
+    failed = bulk_write(model, objects, **options)
+    failed_ids = {object_id for object_id, _error in failed}
+    written = [obj.pk for obj in objects if obj.pk not in failed_ids]
+    updated = sum(1 for pk in written if pk in existing)
+    return len(written) - updated, updated, failed
+
+
+def build_objects(spec, rows, indexes=None):
+    """旧表的行 → 实例列表；转换失败的行返回在 [(id, 错误), ...] 中"""
+    objects, failed = [], []
+    for offset, item in enumerate(rows):
+        try:
+            objects.append(spec.build(item, indexes[offset] if indexes else None))
+        except Exception as e:
+            failed.append((item['id'], str(e)))
+    return objects, failed
+
+
+def migrate_table(name, batch_size=1000, checkpoint_dir=CHECKPOINT_DIR):
+    """
+    迁移一张表 (在进程池中执行)，返回本次运行的统计
+    检查点: {"first_id", "last_id", "read", "created", "existing", "failed": [[id, 错误], ...], "done",
+             "watermark": 开始迁移时旧表的最大更新时间 (增量同步的初始水位)}
+    """
+    spec = TABLES_BY_NAME[name]
+    model = spec.model
+    state = load_checkpoint(checkpoint_dir, name) or {
+        'first_id': None, 'last_id': None, 'read': 0, 'created': 0, 'existing': 0, 'failed': [], 'done': False,
+        'watermark': None,
+    }
+    result = {'name': name, 'read': 0, 'created': 0, 'existing': 0, 'failed': [], 'seconds': 0.0,
+              'resumed_from': state['last_id'], 'done': state['done']}
+    if state['done']:
+        return result
+
+    started = time.monotonic()
+    if state['last_id'] is None and spec.watermark:
+        # 在读取之前记录：迁移开始之后的编辑，更新时间都不早于该值，首次增量同步会重新读取
+        watermark = get_old_max(spec.table, spec.watermark)
+        # SQLite 的 MAX() 返回文本，MySQL 返回 datetime
+        state['watermark'] = watermark.isoformat() if isinstance(watermark, datetime) else watermark
+    try:
+        with keep_timestamps(model):
+            chunks = get_old_chunks(spec.table, spec.columns, chunk_size=batch_size, after_id=state['last_id'])
+            for chunk in chunks:
+                indexes = range(state['read'], state['read'] + len(chunk))
+                objects, failed = build_objects(spec, chunk, indexes)
+                created, existing, insert_failed = insert_batch(model, objects)
+                failed += insert_failed
+
+                if state.get('first_id') is None:
+                    state['first_id'] = chunk[0]['id']
+                state['last_id'] = chunk[-1]['id']
+                state['read'] += len(chunk)
+                state['created'] += created
+                state['existing'] += existing
+                state['failed'] += failed
+                save_checkpoint(checkpoint_dir, name, state)
+
+                result['read'] += len(chunk)
+                result['created'] += created
+                result['existing'] += existing
+                result['failed'] += failed
+        state['done'] = result['done'] = True
+        save_checkpoint(checkpoint_dir, name, state)
+    finally:
+        result['seconds'] = time.monotonic() - started
+        connections.close_all()
+
+    # bulk_create 不发送 post_save 信号，手动使响应缓存失效
+    bump_model_version(model)
+    return result
+
+
+# ==================== 增量同步 ====================
+
+def initial_watermark(name, checkpoint_dir):
+    """
+    首次同步的水位：全量迁移开始时旧表的最大更新时间 (迁移检查点)
+    没有迁移检查点时返回 None，全部读取一遍
+    不从新库的更新时间推算：后台处理任务 (process_media / extract_documents) 会把它改为处理时间
+    """
+    migrated = load_checkpoint(checkpoint_dir, name) or {}
+    return datetime.fromisoformat(migrated['watermark']) if migrated.get('watermark') else None
+
+
+def diff_ids(spec, model, batch_size, bounds=None):
+    """
+    按 id 分块比较旧表和新表 (两边都只读主键)
+    产出 (旧表有、新表没有的 [(旧表中的序号, id)], 新表有、旧表已删除的 [id])
+    bounds: (最小 id, 最大 id)，只在这个范围 (来自旧表的 id) 内查找已删除的行，None 时不查找
+    """
+    offset, last = 0, None
+    while True:
+        old_ids = get_old_ids(spec.table, last, batch_size)
+        if not old_ids:
+            break
+        new_ids = model.objects.filter(pk__lte=old_ids[-1])
+        if last is not None:
+            new_ids = new_ids.filter(pk__gt=last)
+        new_ids = set(new_ids.values_list('pk', flat=True))
+        missing = [(offset + i, object_id) for i, object_id in enumerate(old_ids) if object_id not in new_ids]
+        extra = [
+            object_id for object_id in sorted(new_ids.difference(old_ids))
+            if bounds and bounds[0] <= object_id <= bounds[1]
+        ]
+        yield missing, extra
+        offset += len(old_ids)
+        last = old_ids[-1]
+
+    if bounds is None:
+        return
+    # 旧表当前最大 id 之后、迁移过的范围之内的行都已在旧表中删除
+    while True:
+        tail = model.objects.filter(pk__gte=bounds[0], pk__lte=bounds[1]).order_by('pk')
+        if last is not None:
+            tail = tail.filter(pk__gt=last)
+        tail = list(tail.values_list('pk', flat=True)[:batch_size])
+        if not tail:
+            return
+        yield [], tail
+        last = tail[-1]
+
+
+def sync_bounds(name, state, checkpoint_dir):
+    """
+    可以删除的 id 范围 (从旧表迁移 / 同步过来的 id)：上次同步记录的范围，首次同步取迁移检查点的首尾 id
+    """
+    if state.get('first_id') is not None:
+        return state['first_id'], state['last_id']
+    migrated = load_checkpoint(checkpoint_dir, name) or {}
+    if migrated.get('first_id') is not None:
+        return migrated['first_id'], migrated['last_id']
+    return None
+
+
+def sync_table(name, batch_size=1000, checkpoint_dir=CHECKPOINT_DIR, overlap=60, full=False, deletes=True,
+               dry_run=False):
+    """
+    增量同步一张表 (在进程池中执行)，返回本次运行的统计
+    1. 旧表中水位之后变更的行按批 upsert (没有更新时间列的表只在 full=True 时全部重新写入)
+    2. 按 id 分块比较两边，补插入缺少的行，删除旧表中已删除的行 (只限来自旧表的 id 范围)
+    dry_run=True 时只统计，不写入新库、不推进水位；将删除的 id 返回在 deleted_ids 中
+    状态: sync-<表>.json {"watermark": 最大更新时间, "first_id", "last_id": 来自旧表的 id 范围, "synced_at"}
+    """
+    spec = TABLES_BY_NAME[name]
+    model = spec.model
+    state_name = f'sync-{name}'
+    state = load_checkpoint(checkpoint_dir, state_name) or {}
+    bounds = sync_bounds(name, state, checkpoint_dir) if deletes else None
+    watermark = None
+    if spec.watermark:
+        watermark = (
+            datetime.fromisoformat(state['watermark']) if state.get('watermark')
+            else initial_watermark(name, checkpoint_dir)
+        )
+    result = {'name': name, 'read': 0, 'created': 0, 'updated': 0, 'deleted': 0, 'failed': [],
+              'seconds': 0.0, 'watermark': watermark.isoformat() if watermark else None,
+              'dry_run': dry_run, 'deleted_ids': []}
+    if deletes and bounds is None:
+        result['note'] = "没有迁移检查点，本次不检查已删除的行"
+
+    started = time.monotonic()
+    try:
+        with keep_timestamps(model):
+            newest = watermark
+            if spec.watermark or full:
+                since = None
+                if spec.watermark and watermark is not None and not full:
+                    since = (spec.watermark, watermark - timedelta(seconds=overlap))
+                for chunk in get_old_chunks(spec.table, spec.columns, chunk_size=batch_size, since=since):
+                    # 从头读取全表时序号准确；只读变更行时不更新序号字段 (见 update_fields)
+                    indexes = None if since else range(result['read'], result['read'] + len(chunk))
+                    objects, failed = build_objects(spec, chunk, indexes)
+                    if dry_run:
+                        existing = existing_ids(model, objects)
+                        created, updated, upsert_failed = len(objects) - len(existing), len(existing), []
+                    else:
+                        created, updated, upsert_failed = upsert_batch(model, objects, spec.update_fields)
+                    result['read'] += len(chunk)
+                    result['created'] += created
+                    result['updated'] += updated
+                    result['failed'] += failed + upsert_failed
+                    if spec.watermark:
+                        values = [item[spec.watermark] for item in chunk if item[spec.watermark] is not None]
+                        if values and (newest is None or max(values) > newest):
+                            newest = max(values)
+
+            for missing, extra in diff_ids(spec, model, batch_size, bounds):
+                if missing and dry_run:
+                    result['created'] += len(missing)
+                elif missing:
+                    indexes = {object_id: index for index, object_id in missing}
+                    rows = get_old_rows(spec.table, spec.columns, list(indexes))
+                    objects, failed = build_objects(spec, rows, [indexes[row['id']] for row in rows])
+                    created, _existing, insert_failed = insert_batch(model, objects)
+                    result['created'] += created
+                    result['failed'] += failed + insert_failed
+                if extra and dry_run:
+                    result['deleted'] += len(extra)
+                    result['deleted_ids'] += extra
+                elif extra:
+                    _total, deleted = model.objects.filter(pk__in=extra).delete()
+                    result['deleted'] += deleted.get(model._meta.label, 0)
+
+        if spec.watermark and not result['failed'] and newest is not None:
+            # 有写入失败的行时不推进水位，下次同步重新读取
+            result['watermark'] = newest.isoformat()
+        # 来自旧表的 id 范围随旧表扩大 (同步插入的新行以后在旧表删除时也要删除)
+        low, high = get_old_max(spec.table, 'id', 'MIN'), get_old_max(spec.table, 'id')
+        if bounds:
+            low = bounds[0] if low is None else min(low, bounds[0])
+            high = bounds[1] if high is None else max(high, bounds[1])
+        if not dry_run:
+            save_checkpoint(checkpoint_dir, state_name, {
+                'watermark': result['watermark'], 'first_id': low, 'last_id': high,
+                'synced_at': timezone.now().isoformat(),
+            })
+    finally:
+        result['seconds'] = time.monotonic() - started
+        connections.close_all()
+
+    if not dry_run and (result['read'] or result['created'] or result['deleted']):
+        bump_model_version(model)
+    return result
+
+
+def run(names, workers, task, columns, **options):
+    """
+    按依赖关系调度，在进程池中并行执行 task(表名, **options) (migrate_table / sync_table)
+    返回 {表名: 统计}；进程异常时统计为 {"error": ...}，依赖它的表不再执行
+    """
+    selected = set(names)
+    pending = list(names)
+    running = {}
+    results = {}
+
+    # 子进程不能共用父进程的数据库连接
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                deps = [dep for dep in TABLES_BY_NAME[name].depends_on if dep in selected]
+                if any(dep not in results for dep in deps):
+                    continue
+                pending.remove(name)
+                broken = [dep for dep in deps if results[dep].get('error') or results[dep]['failed']]
+                if broken:
+                    results[name] = {'name': name, 'error': f"依赖的表 {', '.join(broken)} 未完整写入"}
+                    print(f"  ✗ {name}: {results[name]['error']}")
+                    continue
+                print(f"  → 开始 {name}")
+                running[pool.submit(task, name, **options)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = {'name': name, 'error': f"{type(e).__name__}: {e}"}
+                print_progress(results[name], columns)
+    return results
+
+
+# 报告中的统计列: (标题, 统计键)
+MIGRATE_COLUMNS = [('读取', 'read'), ('插入', 'created'), ('已存在', 'existing')]
+SYNC_COLUMNS = [('变更', 'read'), ('插入', 'created'), ('更新', 'updated'), ('删除', 'deleted')]
+
+
+def print_progress(result, columns):
+    name = result['name']
+    if result.get('error'):
+        print(f"  ✗ {name}: {result['error']}")
+    elif result.get('done') and not result['read'] and result.get('resumed_from') is not None:
+        print(f"  ✓ {name}: 检查点显示已完成，跳过")
+    else:
+        detail = "，".join(f"{title} {result[key]}" for title, key in columns)
+        print(f"  ✓ {name}: {detail}，失败 {len(result['failed'])} ({result['seconds']:.1f}s)")
+    if result.get('note'):
+        print(f"    ! {result['note']}")
+    if result.get('deleted_ids'):
+        ids = result['deleted_ids']
+        print(f"    将删除 {len(ids)} 行: {', '.join(map(str, ids[:20]))}{' ...' if len(ids) > 20 else ''}")
+
+
+def print_report(results, names, elapsed, columns, title="迁移完成总结"):
     print("\n" + "=" * 70)
-    print("迁移完成总结")
+    print(title)
     print("=" * 70)
-    print(f"总共成功迁移: {total_migrated} 条记录")
-    
+    header = "".join(f"{column:>10}" for column, _key in columns)
+    print(f"{'表':<10}{header}{'失败':>8}{'耗时(s)':>10}{'行/秒':>10}")
+    total_read = total_created = 0
+    failed = []
+    for name in names:
+        result = results.get(name, {'error': "未执行"})
+        if result.get('error'):
+            print(f"{name:<10}  ✗ {result['error']}")
+            failed.append(name)
+            continue
+        rate = result['read'] / result['seconds'] if result['seconds'] else 0
+        values = "".join(f"{result[key]:>10}" for _title, key in columns)
+        print(f"{name:<10}{values}{len(result['failed']):>8}{result['seconds']:>10.1f}{rate:>10.0f}")
+        total_read += result['read']
+        total_created += result['created']
+        if result['failed']:
+            failed.append(name)
+            for object_id, error in result['failed'][:10]:
+                print(f"    ✗ ID {object_id}: {error}")
+            if len(result['failed']) > 10:
+                print(f"    ... 共 {len(result['failed'])} 行失败，详见检查点文件")
+    print("-" * 70)
+    rate = total_read / elapsed if elapsed else 0
+    print(f"共读取 {total_read} 行，插入 {total_created} 行，用时 {elapsed:.1f}s ({rate:.0f} 行/秒)")
     if failed:
-        print(f"\n失败的迁移: {', '.join(failed)}")
+        print(f"\n未完整写入的表: {', '.join(failed)}")
     else:
-        print("\n✓ 所有数据迁移成功！")
-    
+        print("\n✓ 所有数据写入成功！")
     print("=" * 70)
+    return failed
 
 
-if __name__ == '__main__':
-    response = input("\n⚠️  警告：此操作将迁移所有数据到 shuwei_dev。是否继续？(yes/no): ")
-    if response.lower() == 'yes':
-        main()
+def main(argv=None):
+    """主函数"""
+    parser = argparse.ArgumentParser(description="旧库 → 新库数据迁移")
+    parser.add_argument('--tables', nargs='+', choices=list(TABLES_BY_NAME), metavar='表',
+                        help="只迁移这些表 (默认全部，见 --list)")
+    parser.add_argument('--workers', type=int, default=4, help="并行迁移的进程数")
+    parser.add_argument('--batch-size', type=int, default=1000, help="每批读取 / 写入的行数")
+    parser.add_argument('--checkpoint-dir', default=str(CHECKPOINT_DIR), help="检查点目录")
+    parser.add_argument('--restart', action='store_true', help="清除检查点 (--sync 时为同步水位)，从头开始")
+    parser.add_argument('--yes', '-y', action='store_true', help="不询问，直接开始 (用于脚本 / 定时任务)")
+    parser.add_argument('--list', action='store_true', help="列出可迁移的表")
+    parser.add_argument('--sync', action='store_true', help="增量同步：只写入上次同步之后的变更，可反复执行")
+    parser.add_argument('--overlap-seconds', type=int, default=60,
+                        help="增量同步时水位往前重叠的秒数 (覆盖时钟误差和提交较晚的事务)")
+    parser.add_argument('--full', action='store_true', help="增量同步时没有更新时间列的表全部重新写入")
+    parser.add_argument('--keep-deleted', action='store_true', help="增量同步时不删除旧库中已删除的行")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="增量同步时只报告将插入 / 更新 / 删除的行，不修改新库")
+    args = parser.parse_args(argv)
+    if args.dry_run and not args.sync:
+        parser.error("--dry-run 只能与 --sync 一起使用")
+
+    if args.list:
+        for spec in TABLES:
+            deps = f" (依赖 {', '.join(spec.depends_on)})" if spec.depends_on else ""
+            print(f"{spec.name:<8} {spec.table} → {spec.model_label}{deps}")
+        return 0
+
+    names = args.tables or [spec.name for spec in TABLES]
+    action = "增量同步" if args.sync else "迁移"
+    if args.dry_run:
+        action += " (dry run)"
+    elif not args.yes:
+        response = input(f"\n⚠️  警告：此操作将{action} {len(names)} 张表的数据到 shuwei_dev。是否继续？(yes/no): ")
+        if response.lower() != 'yes':
+            print(f"已取消{action}")
+            return 1
+    if args.restart and not args.dry_run:
+        clear_checkpoints(args.checkpoint_dir, [f'sync-{name}' for name in names] if args.sync else names)
+
+    print("=" * 70)
+    print(f"数据{action}: shuwei → shuwei_dev ({len(names)} 张表，{args.workers} 个进程)")
+    print("=" * 70)
+    started = time.monotonic()
+    if args.sync:
+        columns = SYNC_COLUMNS
+        results = run(
+            names, args.workers, sync_table, columns,
+            batch_size=args.batch_size, checkpoint_dir=args.checkpoint_dir, overlap=args.overlap_seconds,
+            full=args.full, deletes=not args.keep_deleted, dry_run=args.dry_run,
+        )
     else:
-        print("已取消迁移")
\ No newline at end of file
+        columns = MIGRATE_COLUMNS
+        results = run(
+            names, args.workers, migrate_table, columns,
+            batch_size=args.batch_size, checkpoint_dir=args.checkpoint_dir,
+        )
+    failed = print_report(results, names, time.monotonic() - started, columns, title=f"{action}完成总结")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
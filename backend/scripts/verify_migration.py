@@ -1,44 +1,341 @@
-import os
-import sys
-import django
-
+"""
+数据迁移校验：按 id 分块比较旧库和新库的内容校验和
 
+    python scripts/verify_migration.py                    # 校验全部表
+    python scripts/verify_migration.py --tables 通讯 书评 --chunk-size 500
 
+- 表和字段的对应关系与迁移脚本共用 (migrate_data.TABLES)，只校验直接取自旧表列的字段
+  (经过转换的字段、序号和只有默认值的字段不参与校验)
+- 按 id 范围分块 (FLOOR(id / chunk_size))，每块计算 行数 + BIT_XOR(CRC32(CONCAT_WS(...)))；
+  MySQL 在数据库中一条 GROUP BY 算出全部块的校验和，只返回每块一行，正文不经过网络；
+  其他数据库在 Python 中流式计算
+- 旧库和新库的校验和在两个线程中同时计算，多张表在进程池中并行
+- 只对校验和不一致的块逐行比较，报告缺少的 id 和不一致的字段
+- 时间按新库的 TIME_ZONE 比较 (迁移时旧库的无时区时间按该时区保存)
+- 默认值是函数的字段 (例如 created_at 为 NULL 时取迁移时的当前时间)，旧表为 NULL 的行不比较该字段；
+  这样的行超过 MAX_RUNTIME_NULLS 时整个字段不参与校验
+"""
 
+import argparse
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
+
+import django
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 # 设置 Django 环境
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from articles.models import *
-from reactions.models import UserReaction
-
-models_to_check = [
-    ('通讯', News),
-    ('书讯', BookInfo),
-    ('书评', BookReview),
-    ('观点', Opinion),
-    ('文艺', Literature),
-    ('问答', QA),
-    ('译林', Translation),
-    ('文史', History),
-    ('论文', Paper),
-    ('古籍', ClassicBook),
-    ('书库', Library),
-    ('经训', Scripture),
-    ('经训章节', ScriptureChapter),
-    ('用户反应', UserReaction),
-]
-
-print("=" * 60)
-print("数据迁移验证")
-print("=" * 60)
-
-for name, model in models_to_check:
-    count = model.objects.count()
-    status = "✓" if count > 0 else "✗"
-    print(f"{status} {name:12s}: {count:5d} 条记录")
-
-print("=" * 60)
+from django.db import connections
+from django.utils import timezone
+
+from migrate_data import ROW_INDEX, TABLES, TABLES_BY_NAME, get_old_chunks
+
+# 校验和中 NULL 的表示
+NULL = 'NULL'
+
+# 默认值是函数 (迁移时取当时的值) 的字段标记
+RUNTIME_DEFAULT = object()
+
+# 默认值是函数的字段，旧表为 NULL 的行数超过该值时不再逐行排除，整个字段不参与校验
+MAX_RUNTIME_NULLS = 10000
+
+
+def checked_fields(spec):
+    """
+    参与校验的字段: [(字段名, 旧表列, 旧表为 NULL 时迁移写入的默认值)]
+    默认值是函数 (例如当前时间) 的记为 RUNTIME_DEFAULT，旧表为 NULL 的行不比较 (见 runtime_nulls)
+    """
+    fields = []
+    for field, source in spec.fields.items():
+        if source is ROW_INDEX:
+            continue
+        if isinstance(source, str):
+            fields.append((field, source, None))
+            continue
+        column, default, *convert = source
+        if column is None or convert:
+            continue
+        fields.append((field, column, RUNTIME_DEFAULT if callable(default) else default))
+    return fields
+
+
+def runtime_nulls(spec, fields):
+    """
+    默认值是函数的字段中旧表为 NULL 的 id: {字段名: {id, ...}}
+    返回 (nulls, 因 NULL 行过多而不参与校验的字段名列表)
+    """
+    nulls, skipped = {}, []
+    connection = connections['old_db']
+    try:
+        for field, column, default in fields:
+            if default is not RUNTIME_DEFAULT:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT `id` FROM `{spec.table}` WHERE `{column}` IS NULL LIMIT %s", [MAX_RUNTIME_NULLS + 1]
+                )
+                ids = {row[0] for row in cursor.fetchall()}
+            if len(ids) > MAX_RUNTIME_NULLS:
+                skipped.append(field)
+            elif ids:
+                nulls[field] = ids
+    finally:
+        connection.close()
+    return nulls, skipped
+
+
+def masked(object_id, values, names, nulls):
+    """把旧表为 NULL、迁移时取了函数默认值的字段换成 None，两边按同样的方式计算"""
+    return [
+        None if object_id in nulls.get(name, ()) else value
+        for name, value in zip(names, values)
+    ]
+
+
+def value_text(value):
+    """Python 端计算校验和 / 逐行比较时的统一表示"""
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value)
+        return value.isoformat(' ')
+    return str(value)
+
+
+# ==================== 校验和 ====================
+
+def sql_checksums(alias, table, expressions, params, chunk_size):
+    """MySQL: 一条 GROUP BY 算出每块的 (行数, 校验和)"""
+    sql = (
+        f"SELECT FLOOR(`id` / %s) AS chunk, COUNT(*), "
+        f"BIT_XOR(CRC32(CONCAT_WS('|', {', '.join(expressions)}))) "
+        f"FROM `{table}` GROUP BY chunk"
+    )
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, [chunk_size, *params])
+        return {int(chunk): (count, int(checksum)) for chunk, count, checksum in cursor.fetchall()}
+
+
+def python_checksums(rows, chunk_size):
+    """其他数据库：rows 为 (id, [值, ...]) 的迭代器，在 Python 中按块累计"""
+    chunks = {}
+    for object_id, values in rows:
+        text = '|'.join([str(object_id), *(value_text(value) for value in values)])
+        count, checksum = chunks.get(object_id // chunk_size, (0, 0))
+        chunks[object_id // chunk_size] = (count + 1, checksum ^ zlib.crc32(text.encode()))
+    return chunks
+
+
+def old_checksums(spec, fields, chunk_size, nulls):
+    connection = connections['old_db']
+    try:
+        if connection.vendor == 'mysql':
+            expressions, params = ['`id`'], []
+            for _field, column, default in fields:
+                if default is None or default is RUNTIME_DEFAULT:
+                    expressions.append(f"IFNULL(`{column}`, '{NULL}')")
+                else:
+                    # 迁移时 NULL 写入默认值
+                    expressions.append(f"COALESCE(`{column}`, %s)")
+                    params.append(default)
+            return sql_checksums('old_db', spec.table, expressions, params, chunk_size)
+
+        names = [field for field, _column, _default in fields]
+
+        def rows():
+            for chunk in get_old_chunks(spec.table, spec.columns):
+                for item in chunk:
+                    obj = spec.build(item)
+                    values = [getattr(obj, field) for field in names]
+                    yield item['id'], masked(item['id'], values, names, nulls)
+        return python_checksums(rows(), chunk_size)
+    finally:
+        connection.close()
+
+
+def new_checksums(spec, fields, chunk_size, nulls):
+    model = spec.model
+    connection = connections[model.objects.db]
+    names = [field for field, _column, _default in fields]
+    try:
+        if connection.vendor == 'mysql':
+            expressions, params = ['`id`'], []
+            for field in names:
+                expression = f"IFNULL(`{model._meta.get_field(field).column}`, '{NULL}')"
+                if nulls.get(field):
+                    # 旧表为 NULL 的行与旧库一样按 NULL 计算
+                    ids = sorted(nulls[field])
+                    expression = f"IF(`id` IN ({', '.join(['%s'] * len(ids))}), '{NULL}', {expression})"
+                    params += ids
+                expressions.append(expression)
+            return sql_checksums(model.objects.db, model._meta.db_table, expressions, params, chunk_size)
+
+        rows = model.objects.order_by().values_list('pk', *names).iterator(chunk_size=2000)
+        return python_checksums(((row[0], masked(row[0], row[1:], names, nulls)) for row in rows), chunk_size)
+    finally:
+        connection.close()
+
+
+# ==================== 逐行比较 ====================
+
+def old_rows_between(spec, low, high):
+    with connections['old_db'].cursor() as cursor:
+        select = ', '.join(f'`{column}`' for column in spec.columns)
+        cursor.execute(f"SELECT {select} FROM `{spec.table}` WHERE `id` >= %s AND `id` < %s", [low, high])
+        names = [col[0] for col in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def drill_down(spec, fields, chunk, chunk_size, nulls):
+    """
+    逐行比较一块，返回 (旧库有新库没有的 id, 新库有旧库没有的 id, [(id, 字段, 旧值, 新值), ...])
+    """
+    model = spec.model
+    low, high = chunk * chunk_size, (chunk + 1) * chunk_size
+    names = [field for field, _column, _default in fields]
+
+    old = {item['id']: spec.build(item) for item in old_rows_between(spec, low, high)}
+    new = {
+        row['pk']: row
+        for row in model.objects.filter(pk__gte=low, pk__lt=high).values('pk', *names)
+    }
+    diffs = []
+    for object_id in sorted(old.keys() & new.keys()):
+        for field in names:
+            if object_id in nulls.get(field, ()):
+                continue
+            old_value = value_text(getattr(old[object_id], field))
+            new_value = value_text(new[object_id][field])
+            if old_value != new_value:
+                diffs.append((object_id, field, old_value, new_value))
+    return sorted(old.keys() - new.keys()), sorted(new.keys() - old.keys()), diffs
+
+
+def verify_table(name, chunk_size=1000):
+    """校验一张表 (在进程池中执行)"""
+    spec = TABLES_BY_NAME[name]
+    fields = checked_fields(spec)
+    started = time.monotonic()
+    nulls, skipped = runtime_nulls(spec, fields)
+    fields = [item for item in fields if item[0] not in skipped]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        old_future = pool.submit(old_checksums, spec, fields, chunk_size, nulls)
+        new_future = pool.submit(new_checksums, spec, fields, chunk_size, nulls)
+        old, new = old_future.result(), new_future.result()
+
+    mismatched = sorted(chunk for chunk in old.keys() | new.keys() if old.get(chunk) != new.get(chunk))
+    result = {
+        'name': name,
+        'fields': [field for field, _column, _default in fields],
+        'skipped_fields': skipped,
+        'old_rows': sum(count for count, _checksum in old.values()),
+        'new_rows': sum(count for count, _checksum in new.values()),
+        'chunks': len(old.keys() | new.keys()),
+        'mismatched_chunks': len(mismatched),
+        'missing': [],
+        'extra': [],
+        'diffs': [],
+    }
+    try:
+        for chunk in mismatched:
+            missing, extra, diffs = drill_down(spec, fields, chunk, chunk_size, nulls)
+            result['missing'] += missing
+            result['extra'] += extra
+            result['diffs'] += diffs
+    finally:
+        connections.close_all()
+    result['seconds'] = time.monotonic() - started
+    return result
+
+
+# ==================== 报告 ====================
+
+def print_result(result, max_diffs):
+    name = result['name']
+    if result.get('error'):
+        print(f"✗ {name}: {result['error']}")
+        return False
+    summary = (f"旧库 {result['old_rows']} 行，新库 {result['new_rows']} 行，"
+               f"{result['chunks']} 块 ({result['seconds']:.1f}s)")
+    if result['skipped_fields']:
+        summary += f"，旧表 NULL 过多未校验: {', '.join(result['skipped_fields'])}"
+    if not result['mismatched_chunks']:
+        print(f"✓ {name:<8} {summary}")
+        return True
+
+    print(f"✗ {name:<8} {summary}，{result['mismatched_chunks']} 块不一致")
+    if result['missing']:
+        print(f"    新库缺少 {len(result['missing'])} 行: {format_ids(result['missing'], max_diffs)}")
+    if result['extra']:
+        print(f"    新库多出 {len(result['extra'])} 行: {format_ids(result['extra'], max_diffs)}")
+    for object_id, field, old_value, new_value in result['diffs'][:max_diffs]:
+        print(f"    ID {object_id} {field}: {shorten(old_value)!r} → {shorten(new_value)!r}")
+    if len(result['diffs']) > max_diffs:
+        print(f"    ... 共 {len(result['diffs'])} 个字段不一致")
+    if not (result['missing'] or result['extra'] or result['diffs']):
+        # 数据库中的文本表示不同 (例如浮点数格式)，逐行比较的值一致
+        print("    校验和不同，但逐行比较一致")
+        return True
+    return False
+
+
+def format_ids(ids, limit):
+    text = ', '.join(str(object_id) for object_id in ids[:limit])
+    return text + (' ...' if len(ids) > limit else '')
+
+
+def shorten(value, length=60):
+    return value if len(value) <= length else value[:length] + '…'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按内容校验和比较旧库和新库")
+    parser.add_argument('--tables', nargs='+', choices=list(TABLES_BY_NAME), metavar='表',
+                        help="只校验这些表 (默认全部)")
+    parser.add_argument('--workers', type=int, default=4, help="并行校验的进程数")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="每块的 id 范围")
+    parser.add_argument('--max-diffs', type=int, default=20, help="每张表最多列出的差异数")
+    args = parser.parse_args(argv)
+
+    names = args.tables or [spec.name for spec in TABLES]
+    print("=" * 60)
+    print("数据迁移验证")
+    print("=" * 60)
+
+    started = time.monotonic()
+    results = {}
+    # 子进程不能共用父进程的数据库连接
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(verify_table, name, args.chunk_size): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {'name': name, 'error': f"{type(e).__name__}: {e}"}
+
+    ok = [print_result(results[name], args.max_diffs) for name in names]
+    print("=" * 60)
+    failed = [name for name, passed in zip(names, ok) if not passed]
+    if failed:
+        print(f"不一致的表: {', '.join(failed)} ({time.monotonic() - started:.1f}s)")
+    else:
+        print(f"✓ 全部 {len(names)} 张表一致 ({time.monotonic() - started:.1f}s)")
+    print("=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
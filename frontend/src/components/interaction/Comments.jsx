@@ -4,31 +4,48 @@ import { Box, TextField, Button, Typography, List, ListItem, Avatar, Divider, Pa
 import client from '../../api/client';
 
 // 单条评论组件
-const CommentItem = ({ comment, onReply }) => (
-  <Box sx={{ mb: 2 }}>
-    <Paper elevation={0} sx={{ p: 2, bgcolor: '#f5f5f5' }}>
-      <Typography variant="subtitle2" color="primary" sx={{ fontWeight: 'bold' }}>
-        {comment.nickname}
-      </Typography>
-      <Typography variant="body2" sx={{ my: 1 }}>
-        {comment.content}
-      </Typography>
-      <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
-        <Typography variant="caption" color="text.secondary">{comment.created_at}</Typography>
-        <Button size="small" onClick={() => onReply(comment.id, comment.nickname)}>回复</Button>
-      </Box>
-    </Paper>
-    
-    {/* 递归渲染子评论 */}
-    {comment.replies && comment.replies.length > 0 && (
-      <Box sx={{ pl: 4, mt: 1, borderLeft: '2px solid #e0e0e0' }}>
-        {comment.replies.map(reply => (
-          <CommentItem key={reply.id} comment={reply} onReply={onReply} />
-        ))}
-      </Box>
-    )}
-  </Box>
-);
+const CommentItem = ({ comment, onReply }) => {
+  // 评论树只内嵌部分回复，其余按页从 replies 接口加载
+  const [moreReplies, setMoreReplies] = useState([]);
+  const [nextPage, setNextPage] = useState(comment.replies?.length ? 2 : 1);
+  const replies = [...(comment.replies || []), ...moreReplies];
+  const remaining = (comment.reply_count || 0) - replies.length;
+
+  const loadMoreReplies = async () => {
+    const data = await client.get(`comments/${comment.id}/replies/?page=${nextPage}`);
+    setMoreReplies(prev => [...prev, ...data.results]);
+    setNextPage(nextPage + 1);
+  };
+
+  return (
+    <Box sx={{ mb: 2 }}>
+      <Paper elevation={0} sx={{ p: 2, bgcolor: '#f5f5f5' }}>
+        <Typography variant="subtitle2" color="primary" sx={{ fontWeight: 'bold' }}>
+          {comment.nickname}
+        </Typography>
+        <Typography variant="body2" sx={{ my: 1 }}>
+          {comment.content}
+        </Typography>
+        <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
+          <Typography variant="caption" color="text.secondary">{comment.created_at}</Typography>
+          <Button size="small" onClick={() => onReply(comment.id, comment.nickname)}>回复</Button>
+        </Box>
+      </Paper>
+      
+      {/* 递归渲染子评论 */}
+      {(replies.length > 0 || remaining > 0) && (
+        <Box sx={{ pl: 4, mt: 1, borderLeft: '2px solid #e0e0e0' }}>
+          {replies.map(reply => (
+            <CommentItem key={reply.id} comment={reply} onReply={onReply} />
+          ))}
+          {remaining > 0 && (
+            <Button size="small" onClick={loadMoreReplies}>展开更多回复 ({remaining})</Button>
+          )}
+        </Box>
+      )}
+    </Box>
+  );
+};
 
 const Comments = ({ model, objectId }) => {
   const queryClient = useQueryClient();
@@ -33,7 +33,7 @@ const ArticleDetail = () => {
             style={{ border: 'none' }}
             title="PDF Viewer"
           />
-          <Button variant="contained" href={article.document_url} download sx={{ mt: 2 }}>
+          <Button variant="contained" href={`${article.document_url}?download=1`} sx={{ mt: 2 }}>
             下载 PDF
           </Button>
         </Box>
@@ -6,6 +6,9 @@ import { useNavigate } from 'react-router-dom';
 import client from '../api/client';
 import { CATEGORIES } from '../utils/constants';
 
+// 卡片宽度：xs 占满一行，sm 两列，md 起三列 (与下方 Grid 断点一致)
+const CARD_IMAGE_SIZES = '(min-width: 900px) 33vw, (min-width: 600px) 50vw, 100vw';
+
 const ArticleList = () => {
   const { category } = useParams(); // 获取 URL 中的 category (如 'news')
   const navigate = useNavigate();
@@ -33,11 +36,25 @@ const ArticleList = () => {
             <Card sx={{ height: '100%', display: 'flex', flexDirection: 'column' }}>
               <CardActionArea onClick={() => navigate(`/${category}/${item.id}`)}>
                 {/* 如果有图片且不是null，显示图片；否则显示占位 */}
-                {(config.hasImage || item.image) && (
+                {/* 有多尺寸版本时用 <picture>，浏览器按卡片宽度选择 WebP / JPEG */}
+                {item.image_srcset?.sources.length > 0 ? (
+                  <CardMedia component="picture">
+                    {item.image_srcset.sources.map((source) => (
+                      <source key={source.type} type={source.type} srcSet={source.srcset} sizes={CARD_IMAGE_SIZES} />
+                    ))}
+                    <img
+                      src={item.image_srcset.src}
+                      alt={item.title}
+                      loading="lazy"
+                      style={{ display: 'block', width: '100%', height: 140, objectFit: 'cover' }}
+                    />
+                  </CardMedia>
+                ) : (config.hasImage || item.image_url || item.preview?.thumbnail) && (
                   <CardMedia
                     component="img"
                     height="140"
-                    image={item.image || "https://via.placeholder.com/300x140?text=No+Image"}
+                    // 没有封面的 PDF 文档 (古籍等) 使用首页缩略图
+                    image={item.image_url || item.preview?.thumbnail || "https://via.placeholder.com/300x140?text=No+Image"}
                     alt={item.title}
                   />
                 )}
@@ -55,8 +72,8 @@ const ArticleList = () => {
                     WebkitBoxOrient: 'vertical',
                     WebkitLineClamp: 3,
                   }}>
-                    {/* 去除HTML标签简单的预览 */}
-                    {item.content ? item.content.replace(/<[^>]+>/g, '') : (item.author_intro || '点击查看详情')}
+                    {/* 摘要由后端去除HTML标签后截取 */}
+                    {item.summary || '点击查看详情'}
                   </Typography>
                 </CardContent>
               </CardActionArea>